@@ -0,0 +1,301 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+"""
+A streaming decoder of the on-chain data availability output of the perpetual program (in rollup
+mode), as serialized by output_availability_data in
+services/perpetual/cairo/output/data_availability.cairo:
+  * The funding indices table: its length, followed by the serialized FundingIndicesInfo entries.
+  * The position changes (see serialize_position_change in
+    services/perpetual/cairo/position/serialize_change.cairo), until the end of the data.
+The data may be given as an iterable of ints, as bytes (32-byte big-endian words) or as page files
+that contain such bytes, and is decoded lazily, so that large outputs are never fully materialized.
+"""
+
+import itertools
+import mmap
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from services.perpetual.public.definitions.constants import (
+    ASSET_ID_UPPER_BOUND,
+    BALANCE_LOWER_BOUND,
+    BALANCE_UPPER_BOUND,
+    FUNDING_INDEX_LOWER_BOUND,
+)
+from services.perpetual.public.position import Position
+
+WORD_BYTES = 32
+# The number of words that precede the asset changes in a serialized position change: the position
+# id, the public key, the collateral balance and the funding timestamp.
+POSITION_CHANGE_HEADER_SIZE = 4
+# The factor by which an asset id is multiplied when an asset is packed (see serialize_asset).
+ASSET_PACKING_FACTOR = BALANCE_UPPER_BOUND - BALANCE_LOWER_BOUND
+
+BytesLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+# A page of the data availability output: an iterable of ints, bytes or the path of a page file.
+Page = Union[Iterable[int], BytesLike, str, os.PathLike]
+
+
+class FundingIndicesInfo:
+    """
+    The funding indices of the synthetic assets at a given timestamp (see FundingIndicesInfo in
+    objects.cairo).
+    """
+
+    __slots__ = ("funding_indices", "funding_timestamp")
+
+    def __init__(self, funding_indices: Dict[int, int], funding_timestamp: int):
+        # A map from an asset id to its funding index (fxp 32.32).
+        self.funding_indices = funding_indices
+        self.funding_timestamp = funding_timestamp
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FundingIndicesInfo):
+            return NotImplemented
+        return (self.funding_indices, self.funding_timestamp) == (
+            other.funding_indices,
+            other.funding_timestamp,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"FundingIndicesInfo(funding_indices={self.funding_indices}, "
+            f"funding_timestamp={self.funding_timestamp})"
+        )
+
+
+class PositionChange:
+    """
+    The new values of a position that was changed in the batch. asset_balances maps the id of each
+    asset whose balance changed to its new balance, where a balance of 0 means that the asset was
+    removed from the position.
+    """
+
+    __slots__ = (
+        "position_id",
+        "public_key",
+        "collateral_balance",
+        "funding_timestamp",
+        "asset_balances",
+    )
+
+    def __init__(
+        self,
+        position_id: int,
+        public_key: int,
+        collateral_balance: int,
+        funding_timestamp: int,
+        asset_balances: Dict[int, int],
+    ):
+        self.position_id = position_id
+        self.public_key = public_key
+        self.collateral_balance = collateral_balance
+        self.funding_timestamp = funding_timestamp
+        self.asset_balances = asset_balances
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PositionChange):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return (
+            f"PositionChange(position_id={self.position_id}, public_key={self.public_key}, "
+            f"collateral_balance={self.collateral_balance}, "
+            f"funding_timestamp={self.funding_timestamp}, asset_balances={self.asset_balances})"
+        )
+
+
+DataAvailabilityRecord = Union[FundingIndicesInfo, PositionChange]
+
+
+def iter_words_from_bytes(data: BytesLike) -> Iterator[int]:
+    """
+    Yields the 32-byte big-endian words of data, without copying it.
+    """
+    view = memoryview(data)
+    assert len(view) % WORD_BYTES == 0, f"Data size must be a multiple of {WORD_BYTES} bytes."
+    for offset in range(0, len(view), WORD_BYTES):
+        yield int.from_bytes(view[offset : offset + WORD_BYTES], "big")
+
+
+def iter_words_from_file(path: Union[str, os.PathLike]) -> Iterator[int]:
+    """
+    Yields the words of a page file, which is mapped to memory rather than read.
+    """
+    with open(path, "rb") as page_file:
+        if os.fstat(page_file.fileno()).st_size == 0:
+            # mmap does not support empty files.
+            return
+        with mmap.mmap(page_file.fileno(), 0, access=mmap.ACCESS_READ) as page_data:
+            yield from iter_words_from_bytes(page_data)
+
+
+def iter_words(page: Page) -> Iterator[int]:
+    """
+    Yields the words of a page, given as an iterable of ints, as bytes or as a path of a page file.
+    """
+    if isinstance(page, (str, os.PathLike)):
+        return iter_words_from_file(page)
+    if isinstance(page, (bytes, bytearray, memoryview, mmap.mmap)):
+        return iter_words_from_bytes(page)
+    return iter(page)
+
+
+def iter_page_words(
+    pages: Iterable[Page], max_n_words_per_memory_page: Optional[int] = None
+) -> Iterator[int]:
+    """
+    Yields the words of the data availability output, given as the sequence of memory pages it was
+    split into (see main.cairo).
+    If max_n_words_per_memory_page is given, checks that every page but the last one is full, and
+    that no page is larger than that.
+    """
+    prev_page_size: Optional[int] = None
+    for page_index, page in enumerate(pages):
+        if max_n_words_per_memory_page is not None and prev_page_size is not None:
+            assert (
+                prev_page_size == max_n_words_per_memory_page
+            ), f"Page {page_index - 1} is not full: {prev_page_size} words."
+        page_size = 0
+        for word in iter_words(page):
+            page_size += 1
+            yield word
+        assert page_size > 0, f"Page {page_index} is empty."
+        if max_n_words_per_memory_page is not None:
+            assert (
+                page_size <= max_n_words_per_memory_page
+            ), f"Page {page_index} is too large: {page_size} words."
+        prev_page_size = page_size
+
+
+def read_words(words: Iterator[int], n_words: int) -> List[int]:
+    result = list(itertools.islice(words, n_words))
+    assert (
+        len(result) == n_words
+    ), "Unexpected end of data: the data availability output is truncated."
+    return result
+
+
+def decode_funding_indices_info(words: Iterator[int]) -> FundingIndicesInfo:
+    """
+    Reads a single FundingIndicesInfo entry, as serialized by funding_indices_info_serialize.
+    """
+    (n_funding_indices,) = read_words(words, 1)
+    flat_funding_indices = read_words(words, 2 * n_funding_indices)
+    (funding_timestamp,) = read_words(words, 1)
+    funding_indices = {
+        asset_id: biased_funding_index + FUNDING_INDEX_LOWER_BOUND
+        for asset_id, biased_funding_index in zip(
+            flat_funding_indices[::2], flat_funding_indices[1::2]
+        )
+    }
+    assert len(funding_indices) == n_funding_indices, "Duplicate asset id in funding indices."
+    return FundingIndicesInfo(funding_indices=funding_indices, funding_timestamp=funding_timestamp)
+
+
+def decode_position_change(words: Iterator[int], size: int) -> PositionChange:
+    """
+    Reads the body of a single position change, as serialized by serialize_position_change, given
+    its size (the word that precedes it).
+    """
+    assert (
+        POSITION_CHANGE_HEADER_SIZE <= size < POSITION_CHANGE_HEADER_SIZE + ASSET_ID_UPPER_BOUND
+    ), f"Invalid position change size: {size}."
+    position_id, public_key, biased_collateral_balance, funding_timestamp = read_words(
+        words, POSITION_CHANGE_HEADER_SIZE
+    )
+    asset_balances: Dict[int, int] = {}
+    prev_asset_id = -1
+    for packed_asset in read_words(words, size - POSITION_CHANGE_HEADER_SIZE):
+        asset_id, biased_balance = divmod(packed_asset, ASSET_PACKING_FACTOR)
+        assert (
+            prev_asset_id < asset_id < ASSET_ID_UPPER_BOUND
+        ), f"Invalid asset id in the change of position {position_id}: {asset_id}."
+        asset_balances[asset_id] = biased_balance + BALANCE_LOWER_BOUND
+        prev_asset_id = asset_id
+    return PositionChange(
+        position_id=position_id,
+        public_key=public_key,
+        collateral_balance=biased_collateral_balance + BALANCE_LOWER_BOUND,
+        funding_timestamp=funding_timestamp,
+        asset_balances=asset_balances,
+    )
+
+
+def decode_data_availability(data: Page) -> Iterator[DataAvailabilityRecord]:
+    """
+    Lazily decodes the data availability output, given as a single page (see iter_words): yields
+    the entries of the funding indices table (as FundingIndicesInfo), followed by the position
+    changes (as PositionChange).
+    """
+    words = iter_words(data)
+    (funding_indices_table_size,) = read_words(words, 1)
+    for _ in range(funding_indices_table_size):
+        yield decode_funding_indices_info(words)
+    # The position changes are not preceded by their count, and continue until the end of the data.
+    for size in words:
+        yield decode_position_change(words, size)
+
+
+def decode_data_availability_pages(
+    pages: Iterable[Page], max_n_words_per_memory_page: Optional[int] = None
+) -> Iterator[DataAvailabilityRecord]:
+    """
+    Same as decode_data_availability, where the data is given as memory pages (see
+    iter_page_words).
+    """
+    return decode_data_availability(
+        iter_page_words(pages=pages, max_n_words_per_memory_page=max_n_words_per_memory_page)
+    )
+
+
+def serialize_funding_indices_info(funding_indices_info: FundingIndicesInfo) -> List[int]:
+    """
+    Same as funding_indices_info_serialize in objects.cairo.
+    """
+    result = [len(funding_indices_info.funding_indices)]
+    for asset_id, funding_index in funding_indices_info.funding_indices.items():
+        result += [asset_id, funding_index - FUNDING_INDEX_LOWER_BOUND]
+    result.append(funding_indices_info.funding_timestamp)
+    return result
+
+
+def serialize_position_change(
+    position_id: int, prev_position: Position, new_position: Position
+) -> List[int]:
+    """
+    Same as serialize_position_change in serialize_change.cairo.
+    """
+    prev_balances = {asset.asset_id: asset.balance for asset in prev_position.assets}
+    new_balances = {asset.asset_id: asset.balance for asset in new_position.assets}
+    asset_changes: List[Tuple[int, int]] = []
+    for asset_id in sorted(prev_balances.keys() | new_balances.keys()):
+        new_balance = new_balances.get(asset_id, 0)
+        if asset_id in prev_balances and prev_balances[asset_id] == new_balance:
+            continue
+        asset_changes.append((asset_id, new_balance))
+    return [
+        POSITION_CHANGE_HEADER_SIZE + len(asset_changes),
+        position_id,
+        new_position.public_key,
+        new_position.collateral_balance - BALANCE_LOWER_BOUND,
+        new_position.funding_timestamp,
+    ] + [
+        asset_id * ASSET_PACKING_FACTOR + (balance - BALANCE_LOWER_BOUND)
+        for asset_id, balance in asset_changes
+    ]
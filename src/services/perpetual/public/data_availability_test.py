@@ -0,0 +1,176 @@
+import itertools
+
+import pytest
+
+from services.perpetual.public.data_availability import (
+    WORD_BYTES,
+    FundingIndicesInfo,
+    PositionChange,
+    decode_data_availability,
+    decode_data_availability_pages,
+    iter_page_words,
+    iter_words_from_file,
+    serialize_funding_indices_info,
+    serialize_position_change,
+)
+from services.perpetual.public.definitions.constants import (
+    BALANCE_LOWER_BOUND,
+    FUNDING_INDEX_LOWER_BOUND,
+)
+from services.perpetual.public.position import Position, PositionAsset
+
+BTC_ASSET_ID = 0x4254432D3130
+ETH_ASSET_ID = 0x4554482D3130
+PUBLIC_KEY = 0x3B1E2F8A0F4C5A0E8A8B3B4B0E3F9D1A3A2F7A5E1B2C3D4E5F60718293A4B5C
+
+FUNDING_INDICES_TABLE = [
+    FundingIndicesInfo(funding_indices={}, funding_timestamp=1000),
+    FundingIndicesInfo(
+        funding_indices={BTC_ASSET_ID: FUNDING_INDEX_LOWER_BOUND, ETH_ASSET_ID: 2**32},
+        funding_timestamp=2000,
+    ),
+]
+PREV_POSITION = Position(
+    public_key=PUBLIC_KEY,
+    collateral_balance=100,
+    assets=[
+        PositionAsset(asset_id=BTC_ASSET_ID, balance=5, cached_funding_index=0),
+        PositionAsset(asset_id=ETH_ASSET_ID, balance=-7, cached_funding_index=0),
+    ],
+    funding_timestamp=1000,
+)
+# The BTC balance was removed, the ETH balance was changed and a new asset was added.
+NEW_POSITION = Position(
+    public_key=PUBLIC_KEY,
+    collateral_balance=BALANCE_LOWER_BOUND,
+    assets=[
+        PositionAsset(asset_id=ETH_ASSET_ID, balance=-8, cached_funding_index=2**32),
+        PositionAsset(asset_id=2**120 - 1, balance=2**63 - 1, cached_funding_index=2**32),
+    ],
+    funding_timestamp=2000,
+)
+EXPECTED_RECORDS = FUNDING_INDICES_TABLE + [
+    PositionChange(
+        position_id=2**64 - 1,
+        public_key=PUBLIC_KEY,
+        collateral_balance=BALANCE_LOWER_BOUND,
+        funding_timestamp=2000,
+        asset_balances={BTC_ASSET_ID: 0, ETH_ASSET_ID: -8, 2**120 - 1: 2**63 - 1},
+    ),
+    # A change of the collateral balance only.
+    PositionChange(
+        position_id=7,
+        public_key=PUBLIC_KEY,
+        collateral_balance=100,
+        funding_timestamp=1000,
+        asset_balances={},
+    ),
+]
+
+
+@pytest.fixture
+def words():
+    result = [len(FUNDING_INDICES_TABLE)]
+    for funding_indices_info in FUNDING_INDICES_TABLE:
+        result += serialize_funding_indices_info(funding_indices_info)
+    result += serialize_position_change(
+        position_id=2**64 - 1, prev_position=PREV_POSITION, new_position=NEW_POSITION
+    )
+    new_position = Position(
+        public_key=PUBLIC_KEY,
+        collateral_balance=100,
+        assets=PREV_POSITION.assets[:1],
+        funding_timestamp=1000,
+    )
+    result += serialize_position_change(
+        position_id=7, prev_position=new_position, new_position=new_position
+    )
+    return result
+
+
+def to_bytes(words) -> bytes:
+    return b"".join(word.to_bytes(WORD_BYTES, "big") for word in words)
+
+
+def test_serialization(words):
+    assert words[:5] == [2, 0, 1000, 2, BTC_ASSET_ID]
+    # The size of the position change, followed by its position id, and the packed assets.
+    assert words[9:11] == [7, 2**64 - 1]
+    assert words[14] == BTC_ASSET_ID * 2**64 + 2**63
+    assert words[15] == ETH_ASSET_ID * 2**64 + (2**63 - 8)
+
+
+def test_decode(words):
+    assert list(decode_data_availability(words)) == EXPECTED_RECORDS
+    assert list(decode_data_availability(to_bytes(words))) == EXPECTED_RECORDS
+    # Only the size of the funding indices table.
+    assert list(decode_data_availability([0])) == []
+
+
+def test_decode_lazily(words):
+    consumed_words = []
+
+    def words_iterator():
+        for word in words:
+            consumed_words.append(word)
+            yield word
+
+    records = decode_data_availability(words_iterator())
+    assert next(records) == FUNDING_INDICES_TABLE[0]
+    assert consumed_words == words[:3]
+
+
+def test_decode_pages(words, tmp_path):
+    max_n_words_per_memory_page = 5
+    pages = [
+        words[i : i + max_n_words_per_memory_page]
+        for i in range(0, len(words), max_n_words_per_memory_page)
+    ]
+    assert len(pages[-1]) < max_n_words_per_memory_page
+    page_paths = []
+    for i, page in enumerate(pages):
+        page_path = tmp_path / f"page_{i}"
+        page_path.write_bytes(to_bytes(page))
+        page_paths.append(page_path)
+    # Mix pages of all kinds.
+    mixed_pages = [pages[0], to_bytes(pages[1])] + page_paths[2:]
+    assert (
+        list(
+            decode_data_availability_pages(
+                mixed_pages, max_n_words_per_memory_page=max_n_words_per_memory_page
+            )
+        )
+        == EXPECTED_RECORDS
+    )
+
+    with pytest.raises(AssertionError, match="Page 0 is not full"):
+        list(iter_page_words([words[:4], words[4:]], max_n_words_per_memory_page=5))
+    with pytest.raises(AssertionError, match="Page 1 is too large"):
+        list(iter_page_words([words[:5], words[5:]], max_n_words_per_memory_page=5))
+    with pytest.raises(AssertionError, match="Page 1 is empty"):
+        list(iter_page_words([words, []]))
+
+
+def test_page_file_closed_early(tmp_path):
+    page_path = tmp_path / "page"
+    page_path.write_bytes(to_bytes(range(10)))
+    page_words = iter_words_from_file(page_path)
+    assert list(itertools.islice(page_words, 3)) == [0, 1, 2]
+    # Closing the generator before its end unmaps the page file.
+    page_words.close()
+    page_path.write_bytes(b"")
+    assert list(iter_words_from_file(page_path)) == []
+
+
+def test_invalid_data(words):
+    with pytest.raises(AssertionError, match="truncated"):
+        list(decode_data_availability(words[:-1]))
+    with pytest.raises(AssertionError, match="truncated"):
+        list(decode_data_availability([]))
+    with pytest.raises(AssertionError, match="Invalid position change size"):
+        list(decode_data_availability(words[:9] + [3]))
+    # The asset ids of a position change must be increasing.
+    with pytest.raises(AssertionError, match="Invalid asset id"):
+        list(decode_data_availability(words[:14] + words[15:16] + words[14:15] + words[16:]))
+    with pytest.raises(AssertionError, match="multiple of 32 bytes"):
+        list(decode_data_availability(to_bytes(words)[:-1]))
@@ -0,0 +1,277 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+"""
+Off-chain application of funding to positions, with the same semantics as position_apply_funding
+in services/perpetual/cairo/position/funding.cairo: for each asset, the funding (in fxp 32.32) is
+  (global_funding_index - cached_funding_index) * balance,
+it is subtracted from the collateral balance, and the result is rounded down.
+ColumnarPositions keeps many positions in a columnar layout, so that funding can be applied to all
+of them at once using NumPy.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from services.perpetual.public.data_availability import FundingIndicesInfo
+from services.perpetual.public.definitions.constants import BALANCE_LOWER_BOUND, BALANCE_UPPER_BOUND
+from services.perpetual.public.position import Position, PositionAsset
+
+FXP_32_ONE_BITS = 32
+# A position whose funding computation may exceed this bound (in absolute value) is computed with
+# Python ints rather than with int64. The bound leaves a margin for the floating point estimate of
+# the computation.
+INT64_SAFE_BOUND = 2**61
+
+
+def position_apply_funding(
+    position: Position, funding_indices_info: FundingIndicesInfo
+) -> Position:
+    """
+    Same as position_apply_funding in funding.cairo.
+    """
+    funding_fxp = 0
+    assets = []
+    for asset in position.assets:
+        assert (
+            asset.asset_id in funding_indices_info.funding_indices
+        ), f"Missing funding index of asset {asset.asset_id}."
+        global_funding_index = funding_indices_info.funding_indices[asset.asset_id]
+        funding_fxp += (global_funding_index - asset.cached_funding_index) * asset.balance
+        assets.append(
+            PositionAsset(
+                asset_id=asset.asset_id,
+                balance=asset.balance,
+                cached_funding_index=global_funding_index,
+            )
+        )
+    # Subtracting the funding and rounding down is the same as adding the negated funding, rounded
+    # down.
+    return Position(
+        public_key=position.public_key,
+        collateral_balance=position.collateral_balance + ((-funding_fxp) >> FXP_32_ONE_BITS),
+        assets=assets,
+        funding_timestamp=funding_indices_info.funding_timestamp,
+    )
+
+
+class ColumnarPositions:
+    """
+    A collection of positions in a columnar layout. Position i has the collateral balance
+    collateral_balances[i], and its assets are the rows asset_offsets[i], ...,
+    asset_offsets[i + 1] - 1 of the asset columns, where the id of the asset of row j is
+    asset_ids[asset_indices[j]], and its balance and cached funding index are balances[j] and
+    cached_funding_indices[j].
+    All columns are int64 arrays (balances and funding indices fit in int64), except asset_ids,
+    which is a list, as asset ids may be larger.
+    """
+
+    __slots__ = (
+        "public_keys",
+        "collateral_balances",
+        "funding_timestamps",
+        "asset_offsets",
+        "asset_ids",
+        "asset_indices",
+        "balances",
+        "cached_funding_indices",
+    )
+
+    def __init__(
+        self,
+        public_keys: List[int],
+        collateral_balances: np.ndarray,
+        funding_timestamps: np.ndarray,
+        asset_offsets: np.ndarray,
+        asset_ids: List[int],
+        asset_indices: np.ndarray,
+        balances: np.ndarray,
+        cached_funding_indices: np.ndarray,
+    ):
+        n_positions = len(public_keys)
+        assert len(collateral_balances) == len(funding_timestamps) == n_positions
+        assert len(asset_offsets) == n_positions + 1 and asset_offsets[0] == 0
+        assert len(asset_indices) == len(balances) == len(cached_funding_indices)
+        assert asset_offsets[-1] == len(balances), "Inconsistent number of asset rows."
+        self.public_keys = public_keys
+        self.collateral_balances = collateral_balances
+        self.funding_timestamps = funding_timestamps
+        self.asset_offsets = asset_offsets
+        self.asset_ids = asset_ids
+        self.asset_indices = asset_indices
+        self.balances = balances
+        self.cached_funding_indices = cached_funding_indices
+
+    @property
+    def n_positions(self) -> int:
+        return len(self.public_keys)
+
+    @classmethod
+    def from_positions(cls, positions: Sequence[Position]) -> "ColumnarPositions":
+        asset_ids: List[int] = []
+        asset_id_to_index: Dict[int, int] = {}
+        rows: List[Tuple[int, int, int]] = []
+        for position in positions:
+            for asset in position.assets:
+                asset_index = asset_id_to_index.get(asset.asset_id)
+                if asset_index is None:
+                    asset_index = asset_id_to_index[asset.asset_id] = len(asset_ids)
+                    asset_ids.append(asset.asset_id)
+                rows.append((asset_index, asset.balance, asset.cached_funding_index))
+        asset_columns = np.array(rows, dtype=np.int64).reshape(len(rows), 3)
+        return cls(
+            public_keys=[position.public_key for position in positions],
+            collateral_balances=np.array(
+                [position.collateral_balance for position in positions], dtype=np.int64
+            ),
+            funding_timestamps=np.array(
+                [position.funding_timestamp for position in positions], dtype=np.int64
+            ),
+            asset_offsets=np.cumsum(
+                [0] + [position.n_assets for position in positions], dtype=np.int64
+            ),
+            asset_ids=asset_ids,
+            asset_indices=asset_columns[:, 0].copy(),
+            balances=asset_columns[:, 1].copy(),
+            cached_funding_indices=asset_columns[:, 2].copy(),
+        )
+
+    def to_positions(self) -> List[Position]:
+        positions = []
+        for i, public_key in enumerate(self.public_keys):
+            start, end = int(self.asset_offsets[i]), int(self.asset_offsets[i + 1])
+            positions.append(
+                Position(
+                    public_key=public_key,
+                    collateral_balance=int(self.collateral_balances[i]),
+                    assets=[
+                        PositionAsset(
+                            asset_id=self.asset_ids[asset_index],
+                            balance=balance,
+                            cached_funding_index=cached_funding_index,
+                        )
+                        for asset_index, balance, cached_funding_index in zip(
+                            self.asset_indices[start:end].tolist(),
+                            self.balances[start:end].tolist(),
+                            self.cached_funding_indices[start:end].tolist(),
+                        )
+                    ],
+                    funding_timestamp=int(self.funding_timestamps[i]),
+                )
+            )
+        return positions
+
+    def sum_per_position(self, row_values: np.ndarray) -> np.ndarray:
+        """
+        Returns the sum of the given values of the asset rows of each position.
+        """
+        return sum_segments(values=row_values, offsets=self.asset_offsets)
+
+    def apply_funding(self, funding_indices_info: FundingIndicesInfo) -> "ColumnarPositions":
+        """
+        Same as position_apply_funding, for all the positions. Returns the funded positions, which
+        share the unchanged columns with these positions.
+        The funding is computed with int64 arithmetic, except for positions where it might
+        overflow, which are computed with object arrays.
+        """
+        n_asset_ids = len(self.asset_ids)
+        global_funding_indices = np.zeros(n_asset_ids, dtype=np.int64)
+        for asset_index, asset_id in enumerate(self.asset_ids):
+            assert (
+                asset_id in funding_indices_info.funding_indices
+            ), f"Missing funding index of asset {asset_id}."
+            global_funding_indices[asset_index] = funding_indices_info.funding_indices[asset_id]
+        new_cached_funding_indices = global_funding_indices[self.asset_indices]
+
+        # Estimate the magnitude of the computation, to find the positions where it fits in int64.
+        float_deltas = new_cached_funding_indices.astype(np.float64) - self.cached_funding_indices
+        float_funding_bounds = self.sum_per_position(
+            np.abs(float_deltas) * np.abs(self.balances.astype(np.float64))
+        )
+        n_large_deltas = self.sum_per_position(
+            (np.abs(float_deltas) >= INT64_SAFE_BOUND).astype(np.int64)
+        )
+        exact = (
+            (float_funding_bounds >= INT64_SAFE_BOUND)
+            | (n_large_deltas > 0)
+            | (np.abs(self.collateral_balances.astype(np.float64)) >= INT64_SAFE_BOUND)
+        )
+
+        # Integer overflows in the positions that are computed exactly are ignored, as their
+        # results are overridden.
+        funding_fxp = self.sum_per_position(
+            (new_cached_funding_indices - self.cached_funding_indices) * self.balances
+        )
+        new_collateral_balances = self.collateral_balances + ((-funding_fxp) >> FXP_32_ONE_BITS)
+        if np.any(exact):
+            new_collateral_balances[exact] = self.compute_exact_collateral_balances(
+                positions_mask=exact, new_cached_funding_indices=new_cached_funding_indices
+            )
+
+        return ColumnarPositions(
+            public_keys=self.public_keys,
+            collateral_balances=new_collateral_balances,
+            funding_timestamps=np.full(
+                self.n_positions, funding_indices_info.funding_timestamp, dtype=np.int64
+            ),
+            asset_offsets=self.asset_offsets,
+            asset_ids=self.asset_ids,
+            asset_indices=self.asset_indices,
+            balances=self.balances,
+            cached_funding_indices=new_cached_funding_indices,
+        )
+
+    def compute_exact_collateral_balances(
+        self, positions_mask: np.ndarray, new_cached_funding_indices: np.ndarray
+    ) -> np.ndarray:
+        """
+        Returns the new collateral balances of the positions selected by positions_mask, computed
+        with object arrays (of Python ints), which do not overflow.
+        """
+        n_assets = np.diff(self.asset_offsets)
+        rows_mask = np.repeat(positions_mask, n_assets)
+        funding_fxp = sum_segments(
+            values=(
+                new_cached_funding_indices[rows_mask].astype(object)
+                - self.cached_funding_indices[rows_mask].astype(object)
+            )
+            * self.balances[rows_mask].astype(object),
+            offsets=np.concatenate(([0], np.cumsum(n_assets[positions_mask]))),
+        )
+        collateral_balances = self.collateral_balances[positions_mask].astype(object) + (
+            (-funding_fxp) >> FXP_32_ONE_BITS
+        )
+        for collateral_balance in collateral_balances:
+            assert (
+                BALANCE_LOWER_BOUND <= collateral_balance < BALANCE_UPPER_BOUND
+            ), f"Collateral balance out of range after funding: {collateral_balance}."
+        return collateral_balances.astype(np.int64)
+
+
+def sum_segments(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Returns the sums of the segments values[offsets[i]:offsets[i + 1]] (0 for empty segments).
+    Works for int64, float64 and object arrays.
+    """
+    totals = np.zeros(len(offsets) - 1, dtype=values.dtype)
+    # np.add.reduceat does not support empty segments, so these are skipped. The remaining segments
+    # are consecutive, so each of them ends where the next one starts.
+    starts = offsets[:-1]
+    non_empty = starts < offsets[1:]
+    if np.any(non_empty):
+        totals[non_empty] = np.add.reduceat(values, starts[non_empty])
+    return totals
@@ -0,0 +1,151 @@
+import random
+
+import pytest
+
+from services.perpetual.public.data_availability import FundingIndicesInfo
+from services.perpetual.public.funding import ColumnarPositions, position_apply_funding
+from services.perpetual.public.definitions.constants import (
+    BALANCE_LOWER_BOUND,
+    BALANCE_UPPER_BOUND,
+    FUNDING_INDEX_LOWER_BOUND,
+    FUNDING_INDEX_UPPER_BOUND,
+)
+from services.perpetual.public.position import Position, PositionAsset
+from starkware.python.random_test_utils import parametrize_random_object
+
+ASSET_IDS = [0x4254432D3130, 0x4554482D3130, 2**120 - 1]
+
+
+def test_position_apply_funding():
+    funding_indices_info = FundingIndicesInfo(
+        funding_indices={ASSET_IDS[0]: 2**31, ASSET_IDS[1]: 0}, funding_timestamp=100
+    )
+    for balance, expected_collateral_balance in [(3, 8), (-3, 11)]:
+        position = Position(
+            public_key=1,
+            collateral_balance=10,
+            assets=[PositionAsset(asset_id=ASSET_IDS[0], balance=balance, cached_funding_index=0)],
+        )
+        # The funding is 1.5 * balance, and the collateral balance is rounded down.
+        assert position_apply_funding(
+            position=position, funding_indices_info=funding_indices_info
+        ) == Position(
+            public_key=1,
+            collateral_balance=expected_collateral_balance,
+            assets=[
+                PositionAsset(asset_id=ASSET_IDS[0], balance=balance, cached_funding_index=2**31)
+            ],
+            funding_timestamp=100,
+        )
+
+
+def random_position(random_object: random.Random, large: bool) -> Position:
+    """
+    Returns a random position, whose values may be as large as possible if large is True.
+    """
+    balance_bound = BALANCE_UPPER_BOUND if large else 2**40
+    funding_index_bound = FUNDING_INDEX_UPPER_BOUND if large else 2**40
+    asset_ids = sorted(random_object.sample(ASSET_IDS, random_object.randrange(len(ASSET_IDS) + 1)))
+    return Position(
+        public_key=random_object.randrange(1, 2**251),
+        collateral_balance=random_object.randrange(-(2**50), 2**50),
+        assets=[
+            PositionAsset(
+                asset_id=asset_id,
+                balance=random_object.randrange(-balance_bound, balance_bound),
+                cached_funding_index=random_object.randrange(
+                    -funding_index_bound, funding_index_bound
+                ),
+            )
+            for asset_id in asset_ids
+        ],
+        funding_timestamp=random_object.randrange(1000),
+    )
+
+
+@parametrize_random_object()
+def test_columnar_apply_funding(random_object: random.Random):
+    positions = [random_position(random_object=random_object, large=False) for _ in range(200)]
+    # Positions whose funding overflows int64, but whose collateral balance is still in range.
+    positions += [
+        Position(
+            public_key=1,
+            collateral_balance=BALANCE_LOWER_BOUND + 2**40,
+            assets=[
+                PositionAsset(
+                    asset_id=ASSET_IDS[1],
+                    balance=BALANCE_UPPER_BOUND - 1,
+                    cached_funding_index=FUNDING_INDEX_LOWER_BOUND,
+                ),
+                PositionAsset(
+                    asset_id=ASSET_IDS[2],
+                    balance=BALANCE_LOWER_BOUND,
+                    cached_funding_index=FUNDING_INDEX_LOWER_BOUND,
+                ),
+            ],
+        ),
+        Position(public_key=2, collateral_balance=BALANCE_UPPER_BOUND - 1),
+    ]
+    random_object.shuffle(positions)
+    # The funding of the large assets of the first position almost cancels out, as their global
+    # funding indices are the same.
+    large_assets_funding_index = random_object.randrange(-(2**40), 2**40)
+    funding_indices_info = FundingIndicesInfo(
+        funding_indices={
+            ASSET_IDS[0]: random_object.randrange(-(2**40), 2**40),
+            ASSET_IDS[1]: large_assets_funding_index,
+            ASSET_IDS[2]: large_assets_funding_index,
+        },
+        funding_timestamp=1234,
+    )
+    columnar_positions = ColumnarPositions.from_positions(positions)
+    assert columnar_positions.to_positions() == positions
+    assert columnar_positions.apply_funding(funding_indices_info).to_positions() == [
+        position_apply_funding(position=position, funding_indices_info=funding_indices_info)
+        for position in positions
+    ]
+
+
+@parametrize_random_object()
+def test_columnar_apply_funding_out_of_range(random_object: random.Random):
+    positions = [random_position(random_object=random_object, large=True) for _ in range(50)]
+    funding_indices_info = FundingIndicesInfo(
+        funding_indices={asset_id: FUNDING_INDEX_UPPER_BOUND - 1 for asset_id in ASSET_IDS},
+        funding_timestamp=1234,
+    )
+    columnar_positions = ColumnarPositions.from_positions(positions)
+    funded_positions = []
+    for position in positions:
+        try:
+            funded_positions.append(
+                position_apply_funding(position=position, funding_indices_info=funding_indices_info)
+            )
+        except AssertionError:
+            # The collateral balance of the position is out of range after funding.
+            with pytest.raises(AssertionError, match="out of range after funding"):
+                columnar_positions.apply_funding(funding_indices_info)
+            return
+    assert columnar_positions.apply_funding(funding_indices_info).to_positions() == funded_positions
+
+
+def test_columnar_missing_funding_index():
+    columnar_positions = ColumnarPositions.from_positions(
+        [
+            Position(
+                public_key=1,
+                collateral_balance=0,
+                assets=[PositionAsset(asset_id=ASSET_IDS[0], balance=1, cached_funding_index=0)],
+            )
+        ]
+    )
+    with pytest.raises(AssertionError, match="Missing funding index"):
+        columnar_positions.apply_funding(
+            FundingIndicesInfo(funding_indices={ASSET_IDS[1]: 0}, funding_timestamp=0)
+        )
+    # No positions at all.
+    assert (
+        ColumnarPositions.from_positions([])
+        .apply_funding(FundingIndicesInfo(funding_indices={}, funding_timestamp=0))
+        .to_positions()
+        == []
+    )
@@ -24,17 +24,33 @@
 
 
 import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import os
 import sys
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, cast
 
 import yaml
 
 from services.perpetual.definitions.general_config import GENERAL_CONFIG_HASH_VERSION
 from services.perpetual.public.definitions.constants import ASSET_ID_UPPER_BOUND, RISK_UPPER_BOUND
-from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash_func
-from starkware.python.utils import to_bytes
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
+from starkware.python.utils import imap_in_chunks, to_bytes
 
 CONFIG_FILE_NAME = "production_general_config.yml"
+CACHE_FILE_NAME = ".perpetual_config_hash_cache.json"
+# Bump when the hash computation changes in a way that is not reflected by
+# GENERAL_CONFIG_HASH_VERSION, to invalidate existing cache files.
+CACHE_VERSION = 1
 HASH_BYTES = 32
+# The number of synthetic assets hashed by a single task when hashing in parallel.
+ASSET_HASH_CHUNK_SIZE = 4
+
+# The libyaml based loader is much faster than the pure Python one, and parses the same configs.
+YAML_LOADER = getattr(yaml, "CFullLoader", yaml.FullLoader)
+GENERAL_CONFIG_DIFF_KEY = "general_config"
 
 ASSET_ID_BYTES = 15
 assert 2 ** (ASSET_ID_BYTES * 8) == ASSET_ID_UPPER_BOUND
@@ -70,6 +86,17 @@ def pad_hex_string(val: str, bytes_len: int) -> str:
     return f'0x{"0" * (2 * bytes_len - val_nibbles_len)}{val[2:]}'
 
 
+def calculate_hash_chain(field_values: Sequence) -> bytes:
+    """
+    Calculates the Pedersen hash chain h(...h(h(0, v_0), v_1)..., v_n) of the given field values
+    (see convert2int). The chain is computed on integers; only the result is converted to bytes.
+    """
+    hash_result = 0
+    for value in field_values:
+        hash_result = pedersen_hash(hash_result, convert2int(value))
+    return to_bytes(hash_result, HASH_BYTES)
+
+
 def calculate_general_config_hash(config: dict) -> bytes:
     """
     Calculates the hash of the general config without the synthetic assets info.
@@ -124,10 +151,7 @@ def calculate_general_config_hash(config: dict) -> bytes:
     ]
     field_values.append(str(len(field_values)))
 
-    hash_result = bytes(HASH_BYTES)
-    for value in field_values:
-        hash_result = pedersen_hash_func(hash_result, to_bytes(convert2int(value)))
-    return hash_result
+    return calculate_hash_chain(field_values)
 
 
 def calculate_asset_hash(config: dict, asset_id: str) -> bytes:
@@ -137,8 +161,15 @@ def calculate_asset_hash(config: dict, asset_id: str) -> bytes:
     assert "synthetic_assets_info" in config
     synthetic_assets_info = config["synthetic_assets_info"]
     assert asset_id in synthetic_assets_info
-    synthetic_asset_info = synthetic_assets_info[asset_id]
+    return calculate_synthetic_asset_hash(
+        asset_id=asset_id, synthetic_asset_info=synthetic_assets_info[asset_id]
+    )
 
+
+def calculate_synthetic_asset_hash(asset_id: str, synthetic_asset_info: dict) -> bytes:
+    """
+    Calculates the hash of a synthetic asset definition, given its synthetic asset info.
+    """
     assert "resolution" in synthetic_asset_info
     resolution = synthetic_asset_info["resolution"]
 
@@ -166,26 +197,235 @@ def calculate_asset_hash(config: dict, asset_id: str) -> bytes:
     field_values += oracle_price_signers
     field_values.append(str(len(field_values)))
 
-    hash_result = bytes(HASH_BYTES)
-    for value in field_values:
-        hash_result = pedersen_hash_func(hash_result, to_bytes(convert2int(value)))
-    return hash_result
+    return calculate_hash_chain(field_values)
+
+
+def get_subtree_digest(kind: str, subtree: object) -> str:
+    """
+    Returns a digest of a canonical serialization of a config subtree, used as a hash cache key.
+    """
+    canonical_subtree = json.dumps(
+        [CACHE_VERSION, GENERAL_CONFIG_HASH_VERSION, kind, subtree],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical_subtree.encode()).hexdigest()
+
+
+class HashCache(Dict[str, str]):
+    """
+    A dict from a digest of a config subtree to its hash, which records the keys that are looked up
+    (using get), so that only the hashes used by the current run are saved.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.used_keys: Set[str] = set()
+
+    def get(self, key, default=None):
+        self.used_keys.add(key)
+        return super().get(key, default)
+
+
+def load_hash_cache(cache_file_name: str) -> HashCache:
+    """
+    Loads a hash cache file. A missing or malformed file is treated as an empty cache.
+    """
+    try:
+        with open(cache_file_name, "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return HashCache()
+    if not isinstance(cache, dict) or not all(isinstance(value, str) for value in cache.values()):
+        return HashCache()
+    return HashCache(cache)
+
+
+def save_hash_cache(cache_file_name: str, cache: HashCache):
+    """
+    Atomically writes a hash cache file, with the hashes of the cache that were used since it was
+    loaded. Hashes of subtrees that are no longer in the config are thus dropped.
+    """
+    used_hashes = {key: cache[key] for key in cache.used_keys if key in cache}
+    tmp_file_name = f"{cache_file_name}.tmp"
+    with open(tmp_file_name, "w") as f:
+        json.dump(used_hashes, f, indent=4, sort_keys=True)
+    os.replace(tmp_file_name, cache_file_name)
+
+
+def load_config(config_file_name: str) -> dict:
+    with open(config_file_name, "r") as f:
+        return yaml.load(f, Loader=YAML_LOADER)
+
+
+def get_general_config(config: dict) -> dict:
+    """
+    Returns the config without the synthetic assets info.
+    """
+    return {key: value for key, value in config.items() if key != "synthetic_assets_info"}
 
 
-def generate_config_hashes(config: dict) -> str:
+def get_general_config_hash(config: dict, cache: Optional[Dict[str, str]] = None) -> str:
+    """
+    Returns the general config hash (as a hex string), using the cache if given.
+    The cache key covers every field of the config except the synthetic assets info.
+    """
+    if cache is None:
+        return bytes2str(calculate_general_config_hash(config))
+    key = get_subtree_digest(kind="general_config", subtree=get_general_config(config))
+    config_hash = cache.get(key)
+    if config_hash is None:
+        config_hash = cache[key] = bytes2str(calculate_general_config_hash(config))
+    return config_hash
+
+
+def hash_synthetic_asset(synthetic_asset: Tuple[str, dict]) -> str:
+    """
+    Returns the hash of an (asset_id, synthetic_asset_info) pair as a hex string.
+    """
+    asset_id, synthetic_asset_info = synthetic_asset
+    return bytes2str(
+        calculate_synthetic_asset_hash(asset_id=asset_id, synthetic_asset_info=synthetic_asset_info)
+    )
+
+
+def get_asset_hashes(
+    config: dict,
+    cache: Optional[Dict[str, str]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> Dict[str, str]:
+    """
+    Returns a dict from the asset id of each synthetic asset to its hash (as a hex string), in the
+    order of the config. The cache is used as in get_general_config_hash, with a key covering the
+    asset id and its synthetic asset info subtree.
+    The assets that are not in the cache are hashed by the executor, if given.
+    """
+    assert "synthetic_assets_info" in config
+    synthetic_assets_info = config["synthetic_assets_info"]
+    asset_hashes: Dict[str, Optional[str]] = {}
+    cache_keys: Dict[str, str] = {}
+    uncached_assets: List[Tuple[str, dict]] = []
+    for asset_id, synthetic_asset_info in synthetic_assets_info.items():
+        asset_hashes[asset_id] = None
+        if cache is not None:
+            key = get_subtree_digest(
+                kind="synthetic_asset", subtree=[asset_id, synthetic_asset_info]
+            )
+            cache_keys[asset_id] = key
+            asset_hashes[asset_id] = cache.get(key)
+        if asset_hashes[asset_id] is None:
+            uncached_assets.append((asset_id, synthetic_asset_info))
+
+    new_hashes = imap_in_chunks(
+        func=hash_synthetic_asset,
+        data=uncached_assets,
+        chunk_size=ASSET_HASH_CHUNK_SIZE,
+        executor=executor,
+    )
+    for (asset_id, _), asset_hash in zip(uncached_assets, new_hashes):
+        asset_hashes[asset_id] = asset_hash
+        if cache is not None:
+            cache[cache_keys[asset_id]] = asset_hash
+    assert None not in asset_hashes.values(), "Missing synthetic asset hash."
+    return cast(Dict[str, str], asset_hashes)
+
+
+def generate_config_hashes(
+    config: dict,
+    cache: Optional[Dict[str, str]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> str:
+    """
+    Returns the general config hash and the synthetic asset hashes, formatted for printing.
+    If cache (a dict from a digest of a config subtree to its hash) is given, only hashes that are
+    not in it are computed, and they are added to it.
+    If executor is given, the synthetic assets are hashed by it. The output does not depend on
+    the executor.
+    """
     output = ""
-    config_hash_bytes = calculate_general_config_hash(config)
-    config_hash_hex = bytes2str(config_hash_bytes)
+    config_hash_hex = get_general_config_hash(config=config, cache=cache)
     output += f"Global config hash: {config_hash_hex}\n"
-    for asset_id in config["synthetic_assets_info"].keys():
-        config_hash_bytes = calculate_asset_hash(config=config, asset_id=asset_id)
-        config_hash_hex = bytes2str(config_hash_bytes)
+    asset_hashes = get_asset_hashes(config=config, cache=cache, executor=executor)
+    for asset_id, config_hash_hex in asset_hashes.items():
         asset_id_padded = pad_hex_string(asset_id, ASSET_ID_BYTES)
         output += f"asset_id: {asset_id_padded}, config_hash: {config_hash_hex}\n"
     output += "\n"
     return output
 
 
+def diff_config_hashes(
+    old_config: dict,
+    new_config: dict,
+    cache: Optional[Dict[str, str]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> Dict[str, Any]:
+    """
+    Returns the hash changes between two configs, as a dict of the form
+        {
+            "general_config": {"old_hash": ..., "new_hash": ...},
+            "synthetic_assets": {asset_id: {"old_hash": ..., "new_hash": ...}},
+        }
+    where asset ids are padded hex strings, and the hash of an added (removed) asset is None in the
+    old (new) config. "general_config" is present only if the general config hash changed.
+    Only subtrees that differ between the configs are hashed; cache and executor are used as in
+    generate_config_hashes.
+    """
+    diff: Dict[str, Any] = {"synthetic_assets": {}}
+    if get_general_config(old_config) != get_general_config(new_config):
+        old_hash = get_general_config_hash(config=old_config, cache=cache)
+        new_hash = get_general_config_hash(config=new_config, cache=cache)
+        if old_hash != new_hash:
+            diff[GENERAL_CONFIG_DIFF_KEY] = {"old_hash": old_hash, "new_hash": new_hash}
+
+    old_assets = old_config["synthetic_assets_info"]
+    new_assets = new_config["synthetic_assets_info"]
+    # The assets of the old config, followed by the added assets.
+    changed_asset_ids = [
+        asset_id
+        for asset_id in {**old_assets, **new_assets}
+        if old_assets.get(asset_id) != new_assets.get(asset_id)
+    ]
+
+    def get_changed_asset_hashes(assets: dict) -> Dict[str, str]:
+        changed_assets = {
+            asset_id: assets[asset_id] for asset_id in changed_asset_ids if asset_id in assets
+        }
+        return get_asset_hashes(
+            config={"synthetic_assets_info": changed_assets}, cache=cache, executor=executor
+        )
+
+    old_hashes = get_changed_asset_hashes(assets=old_assets)
+    new_hashes = get_changed_asset_hashes(assets=new_assets)
+    for asset_id in changed_asset_ids:
+        old_hash, new_hash = old_hashes.get(asset_id), new_hashes.get(asset_id)
+        if old_hash != new_hash:
+            diff["synthetic_assets"][pad_hex_string(asset_id, ASSET_ID_BYTES)] = {
+                "old_hash": old_hash,
+                "new_hash": new_hash,
+            }
+    return diff
+
+
+def format_config_diff(diff: Dict[str, Any], output_format: str) -> str:
+    """
+    Formats the result of diff_config_hashes as JSON, or as CSV lines of the form
+    "asset_id,old_hash,new_hash", where the general config change (if any) comes first, with the
+    asset id "general_config", and a missing hash is empty.
+    """
+    if output_format == "json":
+        return json.dumps(diff, indent=4)
+    assert output_format == "csv", f"Unsupported output format: {output_format}."
+    changes = dict(diff["synthetic_assets"])
+    if GENERAL_CONFIG_DIFF_KEY in diff:
+        changes = {GENERAL_CONFIG_DIFF_KEY: diff[GENERAL_CONFIG_DIFF_KEY], **changes}
+    lines = ["asset_id,old_hash,new_hash"] + [
+        f"{asset_id},{change['old_hash'] or ''},{change['new_hash'] or ''}"
+        for asset_id, change in changes.items()
+    ]
+    return "\n".join(lines)
+
+
 def parse_cmdline():
     parser = argparse.ArgumentParser(
         description="Calculates dYdX general config and synthetic asset hash values."
@@ -196,15 +436,64 @@ def parse_cmdline():
         default=CONFIG_FILE_NAME,
         help="Input YAML file containing the general configuration.",
     )
+    parser.add_argument(
+        "--diff",
+        type=str,
+        nargs=2,
+        metavar=("OLD_CONFIG_FILE", "NEW_CONFIG_FILE"),
+        help="Print the hash changes between two general config files, instead of the hashes of "
+        "--general_config_file_name.",
+    )
+    parser.add_argument(
+        "--diff_format",
+        choices=["json", "csv"],
+        default="json",
+        help="The output format of --diff.",
+    )
+    parser.add_argument(
+        "--cache_file",
+        type=str,
+        default=CACHE_FILE_NAME,
+        help="A file caching the hashes of unchanged config subtrees between runs. Only the hashes "
+        "used by the current run are kept in it.",
+    )
+    parser.add_argument(
+        "--no_cache",
+        "--no-cache",
+        action="store_true",
+        help="Recompute all the hashes, without reading or writing the cache file.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes hashing the synthetic assets. If 1, they are hashed in the main "
+        "process.",
+    )
 
     return parser.parse_args()
 
 
 def main():
     args = parse_cmdline()
-    with open(args.general_config_file_name, "r") as f:
-        config = yaml.load(f, Loader=yaml.FullLoader)
-    output = generate_config_hashes(config)
+    cache = None if args.no_cache else load_hash_cache(cache_file_name=args.cache_file)
+    with contextlib.ExitStack() as stack:
+        executor = (
+            None
+            if args.jobs <= 1
+            else stack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs))
+        )
+        if args.diff is not None:
+            old_config, new_config = (load_config(config_file_name=name) for name in args.diff)
+            diff = diff_config_hashes(
+                old_config=old_config, new_config=new_config, cache=cache, executor=executor
+            )
+            output = format_config_diff(diff=diff, output_format=args.diff_format)
+        else:
+            config = load_config(config_file_name=args.general_config_file_name)
+            output = generate_config_hashes(config=config, cache=cache, executor=executor)
+    if cache is not None:
+        save_hash_cache(cache_file_name=args.cache_file, cache=cache)
     print(output)
 
 
@@ -0,0 +1,240 @@
+import concurrent.futures
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import yaml
+
+from services.perpetual.public import generate_perpetual_config_hash
+from services.perpetual.public.generate_perpetual_config_hash import (
+    CACHE_FILE_NAME,
+    HashCache,
+    calculate_asset_hash,
+    calculate_hash_chain,
+    diff_config_hashes,
+    format_config_diff,
+    generate_config_hashes,
+    get_general_config_hash,
+    load_hash_cache,
+    save_hash_cache,
+)
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash_func
+from starkware.python.utils import to_bytes
+
+CONFIG = {
+    "max_funding_rate": 1120,
+    "collateral_asset_info": {"asset_id": "0x1234", "resolution": 1000000},
+    "fee_position_info": {"position_id": 1, "public_key": "0x55"},
+    "positions_tree_height": 64,
+    "orders_tree_height": 64,
+    "timestamp_validation_config": {
+        "price_validity_period": 86400,
+        "funding_validity_period": 604800,
+    },
+    "data_availability_mode": "0",
+    "is_risk_by_balance_only": False,
+    "synthetic_assets_info": {
+        f"0x{asset_id:x}": {
+            "resolution": 10**asset_id,
+            "risk_factor": {
+                "segments": [
+                    {"upper_bound": 2**63 - 1, "risk": 2**31 // asset_id},
+                ]
+            },
+            "oracle_price_signed_asset_ids": [f"0x{asset_id:x}0000"],
+            "oracle_price_quorum": 1,
+            "oracle_price_signers": ["0x1111", "0x2222"],
+        }
+        for asset_id in range(1, 4)
+    },
+}
+
+
+@pytest.fixture
+def config() -> dict:
+    return copy.deepcopy(CONFIG)
+
+
+@pytest.fixture
+def count_asset_hashes(monkeypatch) -> list:
+    hashed_asset_ids = []
+    calculate_synthetic_asset_hash = generate_perpetual_config_hash.calculate_synthetic_asset_hash
+
+    def counting_calculate_synthetic_asset_hash(asset_id: str, synthetic_asset_info: dict) -> bytes:
+        hashed_asset_ids.append(asset_id)
+        return calculate_synthetic_asset_hash(
+            asset_id=asset_id, synthetic_asset_info=synthetic_asset_info
+        )
+
+    monkeypatch.setattr(
+        generate_perpetual_config_hash,
+        "calculate_synthetic_asset_hash",
+        counting_calculate_synthetic_asset_hash,
+    )
+    return hashed_asset_ids
+
+
+def test_calculate_hash_chain():
+    field_values = ["0x1234", 5, "6", True, 2**250]
+    hash_result = bytes(32)
+    for value in [0x1234, 5, 6, 1, 2**250]:
+        hash_result = pedersen_hash_func(hash_result, to_bytes(value))
+    assert calculate_hash_chain(field_values) == hash_result
+
+
+def test_parallel_config_hashes(config: dict):
+    expected_output = generate_config_hashes(config=config)
+    assert expected_output.splitlines()[1] == (
+        "asset_id: 0x000000000000000000000000000001, "
+        f"config_hash: 0x{calculate_asset_hash(config=config, asset_id='0x1').hex()}"
+    )
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        assert generate_config_hashes(config=config, executor=executor) == expected_output
+        cache: dict = {}
+        assert generate_config_hashes(config=config, cache=cache, executor=executor) == (
+            expected_output
+        )
+        assert generate_config_hashes(config=config, cache=cache) == expected_output
+
+
+def test_cached_config_hashes(config: dict, count_asset_hashes: list):
+    expected_output = generate_config_hashes(config=config)
+    assert len(count_asset_hashes) == 3
+
+    cache: dict = {}
+    assert generate_config_hashes(config=config, cache=cache) == expected_output
+    assert len(cache) == 4
+    # Nothing is rehashed, including after a YAML round trip that reorders keys.
+    count_asset_hashes.clear()
+    config = yaml.safe_load(yaml.safe_dump(config, sort_keys=True))
+    assert generate_config_hashes(config=config, cache=cache) == expected_output
+    assert count_asset_hashes == []
+
+    # Only the changed asset is rehashed.
+    config["synthetic_assets_info"]["0x2"]["oracle_price_quorum"] = 2
+    output = generate_config_hashes(config=config, cache=cache)
+    assert count_asset_hashes == ["0x2"]
+    assert output == generate_config_hashes(config=config)
+    assert output != expected_output
+
+    # A change in the general config does not invalidate the asset hashes.
+    count_asset_hashes.clear()
+    config["max_funding_rate"] = 1121
+    output = generate_config_hashes(config=config, cache=cache)
+    assert count_asset_hashes == []
+    assert output.splitlines()[1:] == generate_config_hashes(config=config).splitlines()[1:]
+    assert output.splitlines()[0] != expected_output.splitlines()[0]
+
+
+def test_diff_config_hashes(config: dict, count_asset_hashes: list):
+    assert diff_config_hashes(old_config=config, new_config=config) == {"synthetic_assets": {}}
+    assert count_asset_hashes == []
+
+    new_config = copy.deepcopy(config)
+    new_config["max_funding_rate"] = 1121
+    new_config["synthetic_assets_info"]["0x2"]["oracle_price_quorum"] = 2
+    new_config["synthetic_assets_info"]["0x4"] = new_config["synthetic_assets_info"].pop("0x3")
+    # Not part of the hash.
+    new_config["synthetic_assets_info"]["0x1"]["comment"] = "BTC"
+    diff = diff_config_hashes(old_config=config, new_config=new_config)
+    assert sorted(count_asset_hashes) == ["0x1", "0x1", "0x2", "0x2", "0x3", "0x4"]
+
+    def asset_hash(config: dict, asset_id: str) -> str:
+        return f"0x{calculate_asset_hash(config=config, asset_id=asset_id).hex()}"
+
+    padded_asset_id = "0x{:030x}".format
+    assert diff == {
+        "general_config": {
+            "old_hash": get_general_config_hash(config=config),
+            "new_hash": get_general_config_hash(config=new_config),
+        },
+        "synthetic_assets": {
+            padded_asset_id(2): {
+                "old_hash": asset_hash(config=config, asset_id="0x2"),
+                "new_hash": asset_hash(config=new_config, asset_id="0x2"),
+            },
+            padded_asset_id(3): {
+                "old_hash": asset_hash(config=config, asset_id="0x3"),
+                "new_hash": None,
+            },
+            padded_asset_id(4): {
+                "old_hash": None,
+                "new_hash": asset_hash(config=new_config, asset_id="0x4"),
+            },
+        },
+    }
+
+    csv_lines = format_config_diff(diff=diff, output_format="csv").splitlines()
+    assert csv_lines[0] == "asset_id,old_hash,new_hash"
+    assert csv_lines[1].startswith("general_config,0x")
+    assert (
+        csv_lines[3]
+        == f"{padded_asset_id(3)},{diff['synthetic_assets'][padded_asset_id(3)]['old_hash']},"
+    )
+    assert len(csv_lines) == 5
+
+
+def test_hash_cache_file(tmp_path):
+    cache_file_name = str(tmp_path / "cache.json")
+    assert load_hash_cache(cache_file_name=cache_file_name) == {}
+    save_hash_cache(cache_file_name=cache_file_name, cache=HashCache(a="0x1"))
+    # Only the hashes that were looked up are saved.
+    assert load_hash_cache(cache_file_name=cache_file_name) == {}
+    cache = HashCache(a="0x1", b="0x2")
+    assert cache.get("a") == "0x1"
+    assert cache.get("c") is None
+    cache["c"] = "0x3"
+    save_hash_cache(cache_file_name=cache_file_name, cache=cache)
+    assert load_hash_cache(cache_file_name=cache_file_name) == {"a": "0x1", "c": "0x3"}
+    # Malformed cache files are ignored.
+    with open(cache_file_name, "w") as f:
+        f.write("{")
+    assert load_hash_cache(cache_file_name=cache_file_name) == {}
+
+
+def test_generate_perpetual_config_hash_cli(config: dict, tmp_path):
+    config_file_name = str(tmp_path / "config.yml")
+    cache_file_name = str(tmp_path / "cache.json")
+    with open(config_file_name, "w") as f:
+        yaml.safe_dump(config, f)
+    tool_file = os.path.join(os.path.dirname(__file__), "generate_perpetual_config_hash.py")
+
+    def run_tool(general_config_file_name: str, *extra_args: str) -> str:
+        cli_run = subprocess.run(
+            [sys.executable, tool_file, "--general_config_file_name", general_config_file_name]
+            + list(extra_args),
+            capture_output=True,
+            cwd=str(tmp_path),
+        )
+        assert cli_run.stderr == b""
+        return cli_run.stdout.decode()
+
+    expected_output = generate_config_hashes(config=config) + "\n"
+    assert run_tool(config_file_name, "--no-cache") == expected_output
+    assert run_tool(config_file_name, "--no_cache", "--jobs", "2") == expected_output
+    assert sorted(os.listdir(tmp_path)) == ["config.yml"]
+    # By default, the cache file is in the working directory.
+    assert run_tool(config_file_name) == expected_output
+    assert len(load_hash_cache(cache_file_name=str(tmp_path / CACHE_FILE_NAME))) == 4
+    assert run_tool(config_file_name, "--cache_file", cache_file_name) == expected_output
+    assert len(load_hash_cache(cache_file_name=cache_file_name)) == 4
+    assert run_tool(config_file_name, "--cache_file", cache_file_name) == expected_output
+
+    new_config_file_name = str(tmp_path / "new_config.yml")
+    config["synthetic_assets_info"]["0x2"]["oracle_price_quorum"] = 2
+    with open(new_config_file_name, "w") as f:
+        yaml.safe_dump(config, f)
+    diff_output = run_tool(config_file_name, "--diff", config_file_name, new_config_file_name)
+    assert json.loads(diff_output) == diff_config_hashes(
+        old_config=yaml.safe_load(open(config_file_name)), new_config=config
+    )
+    assert list(json.loads(diff_output)["synthetic_assets"]) == ["0x" + "0" * 29 + "2"]
+
+    # The hash of the old synthetic asset info is dropped from the cache.
+    run_tool(new_config_file_name, "--cache_file", cache_file_name)
+    expected_cache = HashCache()
+    generate_config_hashes(config=config, cache=expected_cache)
+    assert load_hash_cache(cache_file_name=cache_file_name) == expected_cache
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#                                                                             #
+# Generates a large number of (private key, stark key) pairs, e.g., for load  #
+# tests.                                                                      #
+#                                                                             #
+###############################################################################
+
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+import argparse
+import concurrent.futures
+import contextlib
+import functools
+import sys
+from typing import BinaryIO, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from starkware.crypto.signature.fixed_base_table import (
+    batch_to_affine,
+    get_ec_gen_table,
+    jacobian_add_affine,
+)
+from starkware.crypto.signature.signature import EC_GEN, EC_ORDER, grind_key
+from starkware.python.utils import imap_in_chunks
+
+KeyPair = Tuple[int, int]
+
+# The number of bytes of a key in a binary keystore.
+KEY_BYTES = 32
+# A record of a binary keystore is the private key followed by the stark key, each as KEY_BYTES
+# big-endian bytes.
+KEYSTORE_RECORD_BYTES = 2 * KEY_BYTES
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def generate_ground_key_pairs(seed: int, start: int, n_keys: int) -> List[KeyPair]:
+    """
+    Returns the key pairs of the private keys grind_key(seed + i, EC_ORDER) for
+    start <= i < start + n_keys.
+    The stark keys are computed using the EC_GEN fixed base table, normalized to affine coordinates
+    together.
+    """
+    private_keys = [grind_key(seed + i, EC_ORDER) for i in range(start, start + n_keys)]
+    public_keys = get_ec_gen_table().mult_batch(private_keys)
+    return [(private_key, x) for private_key, (x, _) in zip(private_keys, public_keys)]
+
+
+def generate_sequential_key_pairs(first_private_key: int, start: int, n_keys: int) -> List[KeyPair]:
+    """
+    Returns the key pairs of the private keys first_private_key + i for start <= i < start + n_keys.
+    Each public key is computed from the previous one by a single point addition, and the public
+    keys are normalized to affine coordinates together.
+    Such keys are trivially related, and must only be used for testing.
+    """
+    private_key = first_private_key + start
+    assert (
+        0 < private_key and private_key + n_keys <= EC_ORDER
+    ), "The private keys must be in the range [1, EC_ORDER)."
+    points = [get_ec_gen_table().mult_jacobian(private_key)]
+    for _ in range(n_keys - 1):
+        points.append(jacobian_add_affine(points[-1], EC_GEN))
+    return [(private_key + i, x) for i, (x, _) in enumerate(batch_to_affine(points[:n_keys]))]
+
+
+def generate_key_pairs_chunk(
+    chunk: Tuple[int, int], seed: Optional[int], first_private_key: Optional[int]
+) -> List[KeyPair]:
+    start, n_keys = chunk
+    if seed is not None:
+        return generate_ground_key_pairs(seed=seed, start=start, n_keys=n_keys)
+    assert first_private_key is not None, "Either seed or first_private_key must be given."
+    return generate_sequential_key_pairs(
+        first_private_key=first_private_key, start=start, n_keys=n_keys
+    )
+
+
+def generate_key_pairs(
+    n_keys: int,
+    seed: Optional[int] = None,
+    first_private_key: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> Iterator[KeyPair]:
+    """
+    Yields n_keys key pairs. If seed is given, the private keys are grind_key(seed + i, EC_ORDER).
+    Otherwise, they are first_private_key + i (which is faster, but only suitable for testing).
+    The keys are generated in chunks of chunk_size keys, which may be computed by the executor.
+    """
+    assert (seed is None) != (
+        first_private_key is None
+    ), "Exactly one of seed and first_private_key must be given."
+    chunks = ((start, min(chunk_size, n_keys - start)) for start in range(0, n_keys, chunk_size))
+    key_chunks = imap_in_chunks(
+        func=functools.partial(
+            generate_key_pairs_chunk, seed=seed, first_private_key=first_private_key
+        ),
+        data=chunks,
+        chunk_size=1,
+        executor=executor,
+    )
+    for key_chunk in key_chunks:
+        yield from key_chunk
+
+
+def write_csv_keystore(key_pairs: Iterable[KeyPair], output_file: TextIO):
+    output_file.write("private_key,stark_key\n")
+    for private_key, stark_key in key_pairs:
+        output_file.write(f"{hex(private_key)},{hex(stark_key)}\n")
+
+
+def write_binary_keystore(key_pairs: Iterable[KeyPair], output_file: BinaryIO):
+    for private_key, stark_key in key_pairs:
+        output_file.write(
+            private_key.to_bytes(KEY_BYTES, "big") + stark_key.to_bytes(KEY_BYTES, "big")
+        )
+
+
+def read_binary_keystore(input_file: BinaryIO) -> Iterator[KeyPair]:
+    while True:
+        record = input_file.read(KEYSTORE_RECORD_BYTES)
+        if len(record) == 0:
+            return
+        assert len(record) == KEYSTORE_RECORD_BYTES, "Truncated keystore record."
+        yield (
+            int.from_bytes(record[:KEY_BYTES], "big"),
+            int.from_bytes(record[KEY_BYTES:], "big"),
+        )
+
+
+def parse_cmdline():
+    parser = argparse.ArgumentParser(
+        description="Generates (private key, stark key) pairs and writes them to a keystore: "
+        'either a CSV file with a "private_key,stark_key" hex line per key, or a binary file with '
+        f"a {KEYSTORE_RECORD_BYTES}-byte record (two {KEY_BYTES}-byte big-endian numbers) per key."
+    )
+    keys_group = parser.add_mutually_exclusive_group(required=True)
+    keys_group.add_argument(
+        "--seed",
+        type=lambda seed: int(seed, 16),
+        help="A seed (hex string). The private keys are grind_key(seed + i, EC_ORDER).",
+    )
+    keys_group.add_argument(
+        "--first_private_key",
+        type=lambda key: int(key, 16),
+        help="The first private key (hex string). The private keys are first_private_key + i. "
+        "This is much faster than --seed, but the keys are trivially related (for testing only).",
+    )
+    parser.add_argument("--n_keys", type=int, required=True, help="Number of keys to generate.")
+    parser.add_argument(
+        "--output_file", type=str, default="-", help="Output file, or '-' for the standard output."
+    )
+    parser.add_argument(
+        "--format", choices=["csv", "binary"], default="csv", help="The keystore format."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of worker processes. If 0, the keys are generated in the main process.",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of keys generated at a time (by a single worker).",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_cmdline()
+    with contextlib.ExitStack() as stack:
+        executor = (
+            None
+            if args.workers == 0
+            else stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(max_workers=args.workers)
+            )
+        )
+        key_pairs = generate_key_pairs(
+            n_keys=args.n_keys,
+            seed=args.seed,
+            first_private_key=args.first_private_key,
+            chunk_size=args.chunk_size,
+            executor=executor,
+        )
+        if args.format == "csv":
+            output_file = (
+                sys.stdout
+                if args.output_file == "-"
+                else stack.enter_context(open(args.output_file, "w"))
+            )
+            write_csv_keystore(key_pairs=key_pairs, output_file=output_file)
+        else:
+            binary_output_file = (
+                sys.stdout.buffer
+                if args.output_file == "-"
+                else stack.enter_context(open(args.output_file, "wb"))
+            )
+            write_binary_keystore(key_pairs=key_pairs, output_file=binary_output_file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
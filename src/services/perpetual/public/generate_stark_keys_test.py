@@ -0,0 +1,75 @@
+import concurrent.futures
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services.perpetual.public.generate_stark_keys import (
+    generate_key_pairs,
+    read_binary_keystore,
+    write_binary_keystore,
+    write_csv_keystore,
+)
+from starkware.crypto.signature.signature import EC_ORDER, grind_key, private_to_stark_key
+
+SEED = 0x86F3E7293141F20A8BAFF320E8EE4ACCB9D4A4BF2B4D295E8CEE784DB46E0519
+
+
+@pytest.mark.parametrize("use_executor", [False, True])
+def test_generate_ground_key_pairs(use_executor: bool):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        key_pairs = list(
+            generate_key_pairs(
+                n_keys=7, seed=SEED, chunk_size=3, executor=executor if use_executor else None
+            )
+        )
+    assert [private_key for private_key, _ in key_pairs] == [
+        grind_key(SEED + i, EC_ORDER) for i in range(7)
+    ]
+    for private_key, stark_key in key_pairs:
+        assert stark_key == private_to_stark_key(private_key)
+
+
+@pytest.mark.parametrize("first_private_key", [1, EC_ORDER - 8])
+def test_generate_sequential_key_pairs(first_private_key: int):
+    key_pairs = list(
+        generate_key_pairs(n_keys=7, first_private_key=first_private_key, chunk_size=3)
+    )
+    assert key_pairs == [
+        (first_private_key + i, private_to_stark_key(first_private_key + i)) for i in range(7)
+    ]
+
+    with pytest.raises(AssertionError, match="must be in the range"):
+        list(generate_key_pairs(n_keys=9, first_private_key=EC_ORDER - 8))
+    with pytest.raises(AssertionError, match="Exactly one of seed and first_private_key"):
+        list(generate_key_pairs(n_keys=8, seed=SEED, first_private_key=1))
+
+
+def test_keystores():
+    key_pairs = list(generate_key_pairs(n_keys=5, first_private_key=2**250))
+
+    binary_keystore = io.BytesIO()
+    write_binary_keystore(key_pairs=key_pairs, output_file=binary_keystore)
+    binary_keystore.seek(0)
+    assert list(read_binary_keystore(input_file=binary_keystore)) == key_pairs
+
+    csv_keystore = io.StringIO()
+    write_csv_keystore(key_pairs=key_pairs, output_file=csv_keystore)
+    assert csv_keystore.getvalue().splitlines() == ["private_key,stark_key"] + [
+        f"{hex(private_key)},{hex(stark_key)}" for private_key, stark_key in key_pairs
+    ]
+
+
+def test_generate_stark_keys_cli():
+    tool_file = os.path.join(os.path.dirname(__file__), "generate_stark_keys.py")
+    cli_run = subprocess.run(
+        [sys.executable, tool_file, "--seed", hex(SEED), "--n_keys", "5", "--format", "binary"]
+        + ["--workers", "2", "--chunk_size", "2"],
+        capture_output=True,
+    )
+    assert cli_run.stderr == b""
+    assert list(read_binary_keystore(input_file=io.BytesIO(cli_run.stdout))) == list(
+        generate_key_pairs(n_keys=5, seed=SEED)
+    )
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+###############################################################################
+#                                                                             #
+# Hashes and signs a stream of newline-delimited JSON perpetual messages.     #
+#                                                                             #
+###############################################################################
+
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+import argparse
+import concurrent.futures
+import contextlib
+import functools
+import json
+import sys
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from services.perpetual.public.perpetual_messages import get_msg
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
+from starkware.crypto.signature.signature import sign
+from starkware.python.utils import imap_in_chunks
+
+# Message fields that are not parsed as integers.
+STRING_FIELDS = {"eth_address"}
+DEFAULT_CHUNK_SIZE = 64
+
+
+def parse_field(name: str, value: Any) -> Any:
+    """
+    Converts a JSON field value into the type expected by the message hash functions.
+    Integer fields may be given either as JSON numbers or as decimal/hex ("0x" prefixed) strings.
+    """
+    if name in STRING_FIELDS:
+        assert isinstance(value, str), f"Field {name} must be a string."
+        return value
+    if isinstance(value, str):
+        return int(value, 0)
+    assert isinstance(value, int) and not isinstance(value, bool), f"Invalid value for {name}."
+    return value
+
+
+def parse_message(line: str) -> Tuple[str, Dict[str, Any], Optional[int]]:
+    """
+    Parses a single JSON message of the form:
+      {"type": <message type>, "private_key": <optional key>, <message fields>...}
+    Returns the message type, its fields and the private key (or None if it is not given).
+    """
+    message = json.loads(line)
+    assert isinstance(message, dict), "A message must be a JSON object."
+    message_type = message.pop("type")
+    private_key = message.pop("private_key", None)
+    fields = {name: parse_field(name=name, value=value) for name, value in message.items()}
+    return (
+        message_type,
+        fields,
+        None if private_key is None else parse_field(name="private_key", value=private_key),
+    )
+
+
+def hash_and_sign_message(
+    indexed_line: Tuple[int, str], default_private_key: Optional[int] = None
+) -> str:
+    """
+    Parses, hashes and signs a single message, and returns the result as a JSON line of the form:
+      {"message_hash": <hex>, "r": <hex>, "s": <hex>}
+    indexed_line is a pair of the (1-based) line number and the line itself.
+    """
+    line_number, line = indexed_line
+    try:
+        message_type, fields, private_key = parse_message(line=line)
+        if private_key is None:
+            private_key = default_private_key
+        assert private_key is not None, "No private key was given for the message."
+
+        message_hash = get_msg(message_type, hash_function=pedersen_hash, **fields)
+        r, s = sign(msg_hash=message_hash, priv_key=private_key)
+    except Exception as exception:
+        raise Exception(f"Failed to process line {line_number}: {exception!r}.") from exception
+
+    return json.dumps({"message_hash": hex(message_hash), "r": hex(r), "s": hex(s)})
+
+
+def hash_and_sign_messages(
+    lines: Iterable[str],
+    default_private_key: Optional[int] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_pending_chunks: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Hashes and signs the given JSON messages (one message per line; empty lines are skipped).
+    Yields a JSON result line for every message, in input order.
+
+    The input is consumed lazily: lines are read in chunks, each chunk is parsed, hashed and
+    signed by a single executor task, and at most max_pending_chunks chunks are in flight, so
+    reading, processing and writing overlap while memory usage stays bounded.
+    """
+    indexed_lines = (
+        (line_number, line)
+        for line_number, line in enumerate(lines, start=1)
+        if len(line.strip()) > 0
+    )
+    return imap_in_chunks(
+        func=functools.partial(hash_and_sign_message, default_private_key=default_private_key),
+        data=indexed_lines,
+        chunk_size=chunk_size,
+        executor=executor,
+        max_pending_chunks=max_pending_chunks,
+    )
+
+
+def parse_cmdline():
+    parser = argparse.ArgumentParser(
+        description="Hashes and signs newline-delimited JSON perpetual messages. "
+        'Each input line is a JSON object with a "type" field (one of limit_order, transfer, '
+        "conditional_transfer, withdrawal_to_address and price), an optional "
+        '"private_key" field and the message fields (e.g., "asset_id_synthetic"). '
+        'Outputs a {"message_hash", "r", "s"} JSON line per message, in input order.'
+    )
+    parser.add_argument(
+        "--input_file",
+        type=str,
+        default="-",
+        help="Input file of JSON messages, or '-' for the standard input.",
+    )
+    parser.add_argument(
+        "--output_file",
+        type=str,
+        default="-",
+        help="Output file, or '-' for the standard output.",
+    )
+    parser.add_argument(
+        "--private_key",
+        type=lambda key: int(key, 16),
+        default=None,
+        help="The private key (hex string) for messages without a private_key field.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Number of worker processes. If 0, the messages are processed in the main process.",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of messages sent to a worker at a time.",
+    )
+    parser.add_argument(
+        "--max_pending_chunks",
+        type=int,
+        default=None,
+        help="Maximal number of chunks that are processed concurrently (bounds memory usage).",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_cmdline()
+    with contextlib.ExitStack() as stack:
+        input_file = (
+            sys.stdin if args.input_file == "-" else stack.enter_context(open(args.input_file))
+        )
+        output_file = (
+            sys.stdout
+            if args.output_file == "-"
+            else stack.enter_context(open(args.output_file, "w"))
+        )
+        executor = (
+            None
+            if args.workers == 0
+            else stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(max_workers=args.workers)
+            )
+        )
+        max_pending_chunks = (
+            2 * max(1, args.workers) if args.max_pending_chunks is None else args.max_pending_chunks
+        )
+        for result in hash_and_sign_messages(
+            lines=input_file,
+            default_private_key=args.private_key,
+            executor=executor,
+            chunk_size=args.chunk_size,
+            max_pending_chunks=max_pending_chunks,
+        ):
+            output_file.write(result + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
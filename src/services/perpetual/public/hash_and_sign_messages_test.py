@@ -0,0 +1,125 @@
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+import pytest
+
+from services.perpetual.public.hash_and_sign_messages import hash_and_sign_messages
+from starkware.crypto.signature.signature import sign
+
+PRIVATE_KEY = 0x3C1E9550E66958296D11B60F8E8E7A7AD990D07FA65D5F7652C4A6C87D4E3CC
+
+
+@pytest.fixture(scope="module")
+def perpetual_messages_file() -> Dict[str, dict]:
+    json_file = os.path.join(os.path.dirname(__file__), "perpetual_messages_precomputed.json")
+    return json.load(open(json_file))
+
+
+@pytest.fixture(scope="module")
+def messages(perpetual_messages_file: Dict[str, dict]) -> List[dict]:
+    """
+    Returns a list of messages of all the supported types, each with its expected hash.
+    """
+    ((limit_order_hash, limit_order),) = perpetual_messages_file["limit_order"].items()
+    ((transfer_hash, transfer),) = perpetual_messages_file["transfer"].items()
+    ((withdrawal_hash, withdrawal),) = perpetual_messages_file["withdrawal_to_address"].items()
+    return [
+        {
+            "expected_hash": limit_order_hash,
+            "type": "limit_order",
+            "asset_id_synthetic": limit_order["assetIdSynthetic"],
+            "asset_id_collateral": limit_order["assetIdCollateral"],
+            "is_buying_synthetic": limit_order["isBuyingSynthetic"],
+            "asset_id_fee": limit_order["assetIdFee"],
+            "amount_synthetic": limit_order["amountSynthetic"],
+            "amount_collateral": limit_order["amountCollateral"],
+            "max_amount_fee": limit_order["amountFee"],
+            "nonce": limit_order["nonce"],
+            "position_id": limit_order["positionId"],
+            "expiration_timestamp": limit_order["expirationTimestamp"],
+        },
+        {
+            "expected_hash": transfer_hash,
+            "type": "transfer",
+            # Integer fields may be given as hex strings.
+            "asset_id": hex(transfer["assetId"]),
+            "asset_id_fee": transfer["assetIdFee"],
+            "receiver_public_key": transfer["receiverPublicKey"],
+            "sender_position_id": transfer["senderPositionId"],
+            "receiver_position_id": transfer["receiverPositionId"],
+            "src_fee_position_id": transfer["feePositionId"],
+            "nonce": transfer["nonce"],
+            "amount": transfer["amount"],
+            "max_amount_fee": transfer["maxAmountFee"],
+            "expiration_timestamp": transfer["expirationTimestamp"],
+        },
+        {
+            "expected_hash": withdrawal_hash,
+            "type": "withdrawal_to_address",
+            "private_key": hex(PRIVATE_KEY + 1),
+            "asset_id_collateral": withdrawal["assetIdCollateral"],
+            "eth_address": withdrawal["ethAddress"],
+            "position_id": withdrawal["positionId"],
+            "nonce": withdrawal["nonce"],
+            "expiration_timestamp": withdrawal["expirationTimestamp"],
+            "amount": withdrawal["amount"],
+        },
+    ]
+
+
+def to_input_lines(messages: List[dict]) -> List[str]:
+    return [
+        json.dumps({name: value for name, value in message.items() if name != "expected_hash"})
+        for message in messages
+    ]
+
+
+def check_results(messages: List[dict], results: List[str]):
+    assert len(results) == len(messages)
+    for message, result in zip(messages, results):
+        message_hash = int(message["expected_hash"], 16)
+        private_key = int(message.get("private_key", hex(PRIVATE_KEY)), 16)
+        r, s = sign(msg_hash=message_hash, priv_key=private_key)
+        assert json.loads(result) == {"message_hash": hex(message_hash), "r": hex(r), "s": hex(s)}
+
+
+@pytest.mark.parametrize("use_executor", [False, True])
+def test_hash_and_sign_messages(messages: List[dict], use_executor: bool):
+    # Repeat the messages to have several chunks, and add an empty line which should be skipped.
+    messages = messages * 3
+    lines = to_input_lines(messages=messages) + ["\n"]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        results = hash_and_sign_messages(
+            lines=lines,
+            default_private_key=PRIVATE_KEY,
+            executor=executor if use_executor else None,
+            chunk_size=2,
+            max_pending_chunks=2,
+        )
+        check_results(messages=messages, results=list(results))
+
+
+def test_hash_and_sign_messages_errors(messages: List[dict]):
+    lines = to_input_lines(messages=messages)
+    with pytest.raises(Exception, match="line 1: .*No private key"):
+        list(hash_and_sign_messages(lines=lines))
+
+    with pytest.raises(Exception, match="line 2: .*Unsupported message type"):
+        list(hash_and_sign_messages(lines=[lines[0], '{"type": "foo"}'], default_private_key=1))
+
+
+def test_hash_and_sign_messages_cli(messages: List[dict]):
+    tool_file = os.path.join(os.path.dirname(__file__), "hash_and_sign_messages.py")
+    cli_run = subprocess.run(
+        [sys.executable, tool_file, "--private_key", hex(PRIVATE_KEY), "--workers", "2"],
+        input="\n".join(to_input_lines(messages=messages)),
+        capture_output=True,
+        text=True,
+    )
+    assert cli_run.stderr == ""
+    check_results(messages=messages, results=cli_run.stdout.splitlines())
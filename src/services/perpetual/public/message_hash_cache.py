@@ -0,0 +1,130 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+import dataclasses
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from mypy_extensions import VarArg
+
+from services.perpetual.public.perpetual_messages import get_msg
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
+from starkware.crypto.signature.signature import verify
+
+# A cache key: the message type followed by the (name, value) pairs of its fields, sorted by name.
+MessageKey = Tuple[Hashable, ...]
+
+
+@dataclasses.dataclass
+class MessageHashCacheEntry:
+    message_hash: int
+    expiration_timestamp: int
+    # The last (r, s, public_key) that was verified successfully on this message. Failed
+    # verifications are not cached, so that the size of an entry does not depend on the number of
+    # (possibly invalid) signatures sent with the message.
+    verified_signature: Optional[Tuple[int, int, int]] = None
+
+
+class MessageHashCache:
+    """
+    A cache of perpetual message hashes (and, optionally, of their signature verification results),
+    for flows in which identical messages are sent repeatedly (e.g., cancel/replace of orders).
+
+    Entries are keyed by the full set of message fields and are evicted by their
+    expiration_timestamp (using a heap), rather than by recency, so that the cache holds exactly
+    the messages that may still be executed. Messages without an expiration_timestamp field
+    (e.g., prices) are hashed but not cached.
+    """
+
+    def __init__(self, hash_function: Callable[[VarArg(int)], int] = pedersen_hash):
+        self.hash_function = hash_function
+        self.entries: Dict[MessageKey, MessageHashCacheEntry] = {}
+        # A heap of (expiration_timestamp, insertion counter, key). The counter breaks ties, so that
+        # keys are never compared.
+        self.expiration_heap: List[Tuple[int, int, MessageKey]] = []
+        self.insertion_counter = itertools.count()
+        # Messages that expire before this timestamp are not cached.
+        self.current_timestamp = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def get_key(message_type: str, fields: Dict[str, Any]) -> MessageKey:
+        return (message_type, *sorted(fields.items()))
+
+    def get_entry(self, message_type: str, **fields) -> MessageHashCacheEntry:
+        """
+        Returns the cache entry of the given message, computing its hash if it is not cached.
+        The returned entry is not stored in the cache if the message cannot be cached.
+        """
+        key = self.get_key(message_type=message_type, fields=fields)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        message_hash = get_msg(message_type, hash_function=self.hash_function, **fields)
+        expiration_timestamp: Optional[int] = fields.get("expiration_timestamp")
+        if expiration_timestamp is None:
+            return MessageHashCacheEntry(message_hash=message_hash, expiration_timestamp=-1)
+
+        entry = MessageHashCacheEntry(
+            message_hash=message_hash, expiration_timestamp=expiration_timestamp
+        )
+        if expiration_timestamp >= self.current_timestamp:
+            self.entries[key] = entry
+            heapq.heappush(
+                self.expiration_heap, (expiration_timestamp, next(self.insertion_counter), key)
+            )
+        return entry
+
+    def get_msg(self, message_type: str, **fields) -> int:
+        """
+        Same as perpetual_messages.get_msg, using the cache.
+        """
+        return self.get_entry(message_type, **fields).message_hash
+
+    def verify(self, message_type: str, r: int, s: int, public_key: int, **fields) -> bool:
+        """
+        Verifies the signature (r, s) of the given message by public_key, using the cache for both
+        the message hash and the last successful verification result.
+        """
+        entry = self.get_entry(message_type, **fields)
+        signature = (r, s, public_key)
+        if entry.verified_signature == signature:
+            return True
+        if not verify(msg_hash=entry.message_hash, r=r, s=s, public_key=public_key):
+            return False
+        entry.verified_signature = signature
+        return True
+
+    def evict_expired(self, current_timestamp: int) -> int:
+        """
+        Removes the messages that expire before current_timestamp (in the units of the messages'
+        expiration_timestamp field; hours, for perpetual messages), and returns their number.
+        """
+        self.current_timestamp = max(self.current_timestamp, current_timestamp)
+        n_evicted = 0
+        while len(self.expiration_heap) > 0 and self.expiration_heap[0][0] < self.current_timestamp:
+            _, _, key = heapq.heappop(self.expiration_heap)
+            del self.entries[key]
+            n_evicted += 1
+        return n_evicted
@@ -0,0 +1,86 @@
+import dataclasses
+import json
+import os
+
+import pytest
+
+from services.perpetual.public.message_hash_cache import MessageHashCache
+from starkware.crypto.signature.signature import private_to_stark_key, sign
+
+PRIVATE_KEY = 0x3C1E9550E66958296D11B60F8E8E7A7AD990D07FA65D5F7652C4A6C87D4E3CC
+
+
+@pytest.fixture
+def limit_order() -> dict:
+    """
+    Returns the fields of a limit order message, with its expected hash.
+    """
+    json_file = os.path.join(os.path.dirname(__file__), "perpetual_messages_precomputed.json")
+    ((limit_order_hash, limit_order),) = json.load(open(json_file))["limit_order"].items()
+    return {
+        "expected_hash": int(limit_order_hash, 16),
+        "asset_id_synthetic": limit_order["assetIdSynthetic"],
+        "asset_id_collateral": limit_order["assetIdCollateral"],
+        "is_buying_synthetic": limit_order["isBuyingSynthetic"],
+        "asset_id_fee": limit_order["assetIdFee"],
+        "amount_synthetic": limit_order["amountSynthetic"],
+        "amount_collateral": limit_order["amountCollateral"],
+        "max_amount_fee": limit_order["amountFee"],
+        "nonce": limit_order["nonce"],
+        "position_id": limit_order["positionId"],
+        "expiration_timestamp": limit_order["expirationTimestamp"],
+    }
+
+
+def test_message_hash_cache(limit_order: dict):
+    cache = MessageHashCache()
+    expected_hash = limit_order.pop("expected_hash")
+    expiration_timestamp = limit_order["expiration_timestamp"]
+
+    assert cache.get_msg("limit_order", **limit_order) == expected_hash
+    # The order of the fields does not matter.
+    assert (
+        cache.get_msg("limit_order", **dict(reversed(list(limit_order.items())))) == expected_hash
+    )
+    assert (len(cache), cache.hits, cache.misses) == (1, 1, 1)
+
+    # An order with a later expiration is a different message.
+    later_order = dict(limit_order, expiration_timestamp=expiration_timestamp + 1)
+    assert cache.get_msg("limit_order", **later_order) != expected_hash
+    assert len(cache) == 2
+
+    assert cache.evict_expired(current_timestamp=expiration_timestamp) == 0
+    assert cache.evict_expired(current_timestamp=expiration_timestamp + 1) == 1
+    assert len(cache) == 1
+    # Expired messages are still hashed, but are not cached again.
+    assert cache.get_msg("limit_order", **limit_order) == expected_hash
+    assert (len(cache), cache.misses) == (1, 3)
+    assert cache.evict_expired(current_timestamp=expiration_timestamp + 2) == 1
+    assert len(cache) == 0
+
+
+def test_message_hash_cache_verify(limit_order: dict):
+    cache = MessageHashCache()
+    expected_hash = limit_order.pop("expected_hash")
+    r, s = sign(msg_hash=expected_hash, priv_key=PRIVATE_KEY)
+    public_key = private_to_stark_key(PRIVATE_KEY)
+
+    for _ in range(2):
+        assert cache.verify("limit_order", r=r, s=s, public_key=public_key, **limit_order)
+        assert not cache.verify("limit_order", r=r, s=s + 1, public_key=public_key, **limit_order)
+
+    (entry,) = cache.entries.values()
+    # Only the valid signature is cached.
+    assert dataclasses.asdict(entry) == {
+        "message_hash": expected_hash,
+        "expiration_timestamp": limit_order["expiration_timestamp"],
+        "verified_signature": (r, s, public_key),
+    }
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    # Another valid signature on the same message replaces the cached one.
+    other_r, other_s = sign(msg_hash=expected_hash, priv_key=PRIVATE_KEY, seed=1)
+    assert (other_r, other_s) != (r, s)
+    assert cache.verify("limit_order", r=other_r, s=other_s, public_key=public_key, **limit_order)
+    assert entry.verified_signature == (other_r, other_s, public_key)
+    assert cache.verify("limit_order", r=r, s=s, public_key=public_key, **limit_order)
@@ -0,0 +1,134 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+import dataclasses
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from fastecdsa.point import Point
+
+from services.perpetual.public.perpetual_messages import get_price_msg
+from starkware.crypto.signature.fast_pedersen_hash import (
+    pedersen_hash_from_prefix,
+    pedersen_hash_prefix,
+)
+from starkware.crypto.signature.fixed_base_table import (
+    fixed_base_private_to_stark_key,
+    fixed_base_sign,
+)
+
+# A price observation of an oracle: (oracle_name, asset_pair, price, timestamp).
+PriceObservation = Tuple[int, int, int, int]
+
+
+@dataclasses.dataclass(frozen=True)
+class SignedOraclePrice:
+    """
+    A single signature on an external price with a timestamp.
+    Matches the SignedOraclePrice struct in oracle_price.cairo.
+    """
+
+    signer_key: int
+    external_price: int
+    timestamp: int
+    signed_asset_id: int
+    signature_r: int
+    signature_s: int
+
+    def to_dict(self) -> Dict[str, str]:
+        return {field.name: hex(getattr(self, field.name)) for field in dataclasses.fields(self)}
+
+
+def get_signed_asset_id(oracle_name: int, asset_pair: int) -> int:
+    """
+    Returns the asset id on which an oracle signs its prices for an asset pair (an entry of
+    oracle_price_signed_asset_ids in the general config).
+    """
+    assert 0 <= oracle_name < 2**40
+    assert 0 <= asset_pair < 2**128
+    return (asset_pair << 40) + oracle_name
+
+
+class OraclePricePublisher:
+    """
+    Signs oracle prices on behalf of a set of oracles.
+    The public keys of the oracles are computed once, the part of the price message hash that
+    depends only on the signed asset id is cached per signed asset id, and the signatures are
+    computed using a fixed base table.
+    """
+
+    def __init__(self, oracle_private_keys: Mapping[int, int]):
+        """
+        oracle_private_keys is a mapping from an oracle name to the private key of the oracle.
+        """
+        self.oracle_private_keys = dict(oracle_private_keys)
+        self.signer_keys = {
+            oracle_name: fixed_base_private_to_stark_key(private_key)
+            for oracle_name, private_key in self.oracle_private_keys.items()
+        }
+        self.hash_prefixes: Dict[int, Point] = {}
+
+    def hash_function(self, x: int, y: int) -> int:
+        """
+        Computes the Pedersen hash of x and y, where x is a signed asset id.
+        """
+        prefix = self.hash_prefixes.get(x)
+        if prefix is None:
+            prefix = self.hash_prefixes[x] = pedersen_hash_prefix(x)
+        return pedersen_hash_from_prefix(prefix=prefix, y=y)
+
+    def sign_price(
+        self, oracle_name: int, asset_pair: int, price: int, timestamp: int
+    ) -> SignedOraclePrice:
+        assert oracle_name in self.oracle_private_keys, f"Unknown oracle: {hex(oracle_name)}."
+        message = get_price_msg(
+            oracle_name=oracle_name,
+            asset_pair=asset_pair,
+            timestamp=timestamp,
+            price=price,
+            hash_function=self.hash_function,
+        )
+        r, s = fixed_base_sign(msg_hash=message, priv_key=self.oracle_private_keys[oracle_name])
+        return SignedOraclePrice(
+            signer_key=self.signer_keys[oracle_name],
+            external_price=price,
+            timestamp=timestamp,
+            signed_asset_id=get_signed_asset_id(oracle_name=oracle_name, asset_pair=asset_pair),
+            signature_r=r,
+            signature_s=s,
+        )
+
+    def sign_prices(
+        self, observations: Iterable[PriceObservation]
+    ) -> Dict[int, List[SignedOraclePrice]]:
+        """
+        Signs the given price observations, and returns a mapping from an asset pair to its signed
+        prices, sorted by signer_key (as required by check_oracle_price in oracle_price.cairo).
+        """
+        signed_prices: Dict[int, List[SignedOraclePrice]] = {}
+        for oracle_name, asset_pair, price, timestamp in observations:
+            signed_prices.setdefault(asset_pair, []).append(
+                self.sign_price(
+                    oracle_name=oracle_name, asset_pair=asset_pair, price=price, timestamp=timestamp
+                )
+            )
+
+        for asset_pair, asset_signed_prices in signed_prices.items():
+            asset_signed_prices.sort(key=lambda signed_price: signed_price.signer_key)
+            signer_keys = [signed_price.signer_key for signed_price in asset_signed_prices]
+            assert len(set(signer_keys)) == len(
+                signer_keys
+            ), f"Asset pair {hex(asset_pair)} has more than one price from the same signer."
+        return signed_prices
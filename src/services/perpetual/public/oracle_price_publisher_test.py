@@ -0,0 +1,72 @@
+import pytest
+
+from services.perpetual.public.oracle_price_publisher import (
+    OraclePricePublisher,
+    get_signed_asset_id,
+)
+from services.perpetual.public.perpetual_messages import get_price_msg
+from starkware.crypto.signature.signature import private_to_stark_key, sign, verify
+
+ORACLE_PRIVATE_KEYS = {
+    0x4D616B6572: 0x178047D3869489C055D7EA54C014FFB834A069C9595186ABE04EA4D1223A03F,
+    0x4F72636C65: 0x3C1E9550E66958296D11B60F8E8E7A7AD990D07FA65D5F7652C4A6C87D4E3CC,
+}
+BTC_USD = 0x425443555344000000000000000000
+ETH_USD = 0x455448555344000000000000000000
+
+
+@pytest.fixture(scope="module")
+def publisher() -> OraclePricePublisher:
+    return OraclePricePublisher(oracle_private_keys=ORACLE_PRIVATE_KEYS)
+
+
+def test_sign_prices(publisher: OraclePricePublisher):
+    observations = [
+        (oracle_name, asset_pair, price, timestamp)
+        for asset_pair, price in [(BTC_USD, 0x2BEC57CE2A000), (ETH_USD, 0x1A3A8F6C1C000)]
+        for oracle_name, timestamp in zip(ORACLE_PRIVATE_KEYS, [0x5F9A5E81, 0x5F9A5E82])
+    ]
+    signed_prices = publisher.sign_prices(observations=observations)
+    assert signed_prices.keys() == {BTC_USD, ETH_USD}
+
+    for oracle_name, asset_pair, price, timestamp in observations:
+        private_key = ORACLE_PRIVATE_KEYS[oracle_name]
+        signer_key = private_to_stark_key(private_key)
+        (signed_price,) = [
+            signed_price
+            for signed_price in signed_prices[asset_pair]
+            if signed_price.signer_key == signer_key
+        ]
+        message = get_price_msg(
+            oracle_name=oracle_name, asset_pair=asset_pair, timestamp=timestamp, price=price
+        )
+        assert (signed_price.signature_r, signed_price.signature_s) == sign(
+            msg_hash=message, priv_key=private_key
+        )
+        assert verify(
+            msg_hash=message,
+            r=signed_price.signature_r,
+            s=signed_price.signature_s,
+            public_key=signer_key,
+        )
+        assert signed_price.external_price == price
+        assert signed_price.timestamp == timestamp
+        assert signed_price.signed_asset_id == get_signed_asset_id(
+            oracle_name=oracle_name, asset_pair=asset_pair
+        )
+
+    # The signed prices of every asset must be sorted by signer_key.
+    for asset_signed_prices in signed_prices.values():
+        signer_keys = [signed_price.signer_key for signed_price in asset_signed_prices]
+        assert signer_keys == sorted(signer_keys)
+
+
+def test_sign_prices_errors(publisher: OraclePricePublisher):
+    oracle_name = next(iter(ORACLE_PRIVATE_KEYS))
+    with pytest.raises(AssertionError, match="more than one price from the same signer"):
+        publisher.sign_prices(
+            observations=[(oracle_name, BTC_USD, 1, 2), (oracle_name, BTC_USD, 3, 4)]
+        )
+
+    with pytest.raises(AssertionError, match="Unknown oracle"):
+        publisher.sign_prices(observations=[(0x1234, BTC_USD, 1, 2)])
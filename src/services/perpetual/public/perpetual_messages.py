@@ -1,7 +1,7 @@
-from typing import Callable
+from typing import Callable, Dict, Iterable, List, Tuple
 
+from Crypto.Hash import keccak
 from mypy_extensions import VarArg
-from web3 import Web3
 
 from starkware.crypto.signature.signature import pedersen_hash
 from starkware.python.utils import from_bytes
@@ -12,15 +12,74 @@ CONDITIONAL_TRANSFER = 5
 WITHDRAWAL_TO_ADDRESS = 7
 
 
-def build_condition(fact_registry_address: str, fact: bytes) -> int:
+ETH_ADDRESS_BYTES = 20
+FACT_BYTES = 32
+
+
+def keccak256(data: bytes) -> bytes:
+    return keccak.new(data=data, digest_bits=256).digest()
+
+
+def parse_checksum_address(address: str) -> bytes:
     """
-    Creates a condition from a fact registry address and a fact.
+    Returns the 20 bytes of an Ethereum address given as an EIP-55 checksummed hex string.
+    Like web3, non-checksummed addresses are rejected.
     """
-    condition_keccak = Web3.solidityKeccak(["address", "bytes32"], [fact_registry_address, fact])
+    assert address[:2] == "0x", f"Invalid address: {address}."
+    hex_address = address[2:]
+    assert len(hex_address) == 2 * ETH_ADDRESS_BYTES, f"Invalid address length: {address}."
+    address_bytes = bytes.fromhex(hex_address)
+
+    # In EIP-55, a letter is uppercase iff the matching nibble of the keccak of the lowercase
+    # address is at least 8.
+    address_hash = keccak256(hex_address.lower().encode("ascii")).hex()
+    expected_hex_address = "".join(
+        char.upper() if int(nibble, 16) >= 8 else char
+        for char, nibble in zip(hex_address.lower(), address_hash)
+    )
+    assert hex_address == expected_hex_address, f"Invalid address checksum: {address}."
+    return address_bytes
+
+
+def build_condition_from_address_bytes(fact_registry_address: bytes, fact: bytes) -> int:
+    """
+    Same as build_condition, where the fact registry address is given as 20 bytes.
+    """
+    assert len(fact_registry_address) == ETH_ADDRESS_BYTES, "Invalid address length."
+    assert len(fact) == FACT_BYTES, f"A fact must be {FACT_BYTES} bytes long."
+    # This is the solidity packed encoding of (address, bytes32).
+    condition_keccak = keccak256(fact_registry_address + fact)
     # Reduced to 250 LSB to be a field element.
     return from_bytes(condition_keccak) & (2**250 - 1)
 
 
+def build_condition(fact_registry_address: str, fact: bytes) -> int:
+    """
+    Creates a condition from a fact registry address and a fact.
+    """
+    return build_condition_from_address_bytes(
+        fact_registry_address=parse_checksum_address(fact_registry_address), fact=fact
+    )
+
+
+def build_conditions(pairs: Iterable[Tuple[str, bytes]]) -> List[int]:
+    """
+    Creates a condition for each (fact registry address, fact) pair.
+    Each distinct address is parsed and validated only once.
+    """
+    address_bytes_cache: Dict[str, bytes] = {}
+    conditions = []
+    for fact_registry_address, fact in pairs:
+        address_bytes = address_bytes_cache.get(fact_registry_address)
+        if address_bytes is None:
+            address_bytes = parse_checksum_address(fact_registry_address)
+            address_bytes_cache[fact_registry_address] = address_bytes
+        conditions.append(
+            build_condition_from_address_bytes(fact_registry_address=address_bytes, fact=fact)
+        )
+    return conditions
+
+
 def get_conditional_transfer_msg(
     asset_id: int,
     asset_id_fee: int,
@@ -324,3 +383,24 @@ def get_price_msg(
     second_number = (price << 32) + timestamp
 
     return hash_function(first_number, second_number)
+
+
+# Maps a message type to the function that computes the hash of messages of that type.
+MESSAGE_HASH_FUNCTIONS: Dict[str, Callable[..., int]] = {
+    "limit_order": get_limit_order_msg,
+    "transfer": get_transfer_msg,
+    "conditional_transfer": get_conditional_transfer_msg,
+    "withdrawal_to_address": get_withdrawal_to_address_msg,
+    "price": get_price_msg,
+}
+
+
+def get_msg(
+    message_type: str, hash_function: Callable[[VarArg(int)], int] = pedersen_hash, **fields
+) -> int:
+    """
+    Computes the hash of a message of the given type (a key of MESSAGE_HASH_FUNCTIONS), given its
+    fields as keyword arguments.
+    """
+    assert message_type in MESSAGE_HASH_FUNCTIONS, f"Unsupported message type: {message_type}."
+    return MESSAGE_HASH_FUNCTIONS[message_type](**fields, hash_function=hash_function)
@@ -1,10 +1,14 @@
 import json
 import os
+import random
 from typing import Dict
 
 import pytest
+from web3 import Web3
 
 from services.perpetual.public.perpetual_messages import (
+    build_condition,
+    build_conditions,
     get_conditional_transfer_msg,
     get_limit_order_msg,
     get_transfer_msg,
@@ -86,3 +90,36 @@ def test_withdrawal_to_address_precomputed(perpetual_messages_file: Dict[str, di
             amount=messageData["amount"],
         )
         assert hex(messageHash) == expectedMessageHash
+
+
+def test_build_condition_web3_parity():
+    # Tests that build_condition matches the solidity packed keccak computed by web3.
+    rand = random.Random(0)
+    fact_registry_addresses = [
+        Web3.toChecksumAddress(rand.getrandbits(160).to_bytes(20, "big")) for _ in range(3)
+    ]
+    pairs = [
+        (rand.choice(fact_registry_addresses), rand.getrandbits(256).to_bytes(32, "big"))
+        for _ in range(20)
+    ]
+
+    expected_conditions = [
+        int.from_bytes(Web3.solidityKeccak(["address", "bytes32"], [address, fact]), "big")
+        & (2**250 - 1)
+        for address, fact in pairs
+    ]
+    assert [build_condition(address, fact) for address, fact in pairs] == expected_conditions
+    assert build_conditions(pairs) == expected_conditions
+
+
+def test_build_condition_invalid_address():
+    address = Web3.toChecksumAddress("0xa4864d977b944315389d1765ffa7e66f74ee8cd7")
+    fact = bytes(32)
+    build_condition(address, fact)
+
+    with pytest.raises(AssertionError, match="Invalid address checksum"):
+        build_condition(address.lower(), fact)
+    with pytest.raises(AssertionError, match="Invalid address length"):
+        build_condition(address[:-2], fact)
+    with pytest.raises(AssertionError, match="A fact must be 32 bytes long"):
+        build_condition(address, bytes(31))
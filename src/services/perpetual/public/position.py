@@ -0,0 +1,183 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+"""
+A Python model of the positions of services/perpetual/cairo/position/position.cairo, and their
+hash, as computed by position_hash in services/perpetual/cairo/position/hash.cairo.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from services.perpetual.public.definitions.constants import (
+    ASSET_ID_UPPER_BOUND,
+    BALANCE_LOWER_BOUND,
+    BALANCE_UPPER_BOUND,
+    FUNDING_INDEX_LOWER_BOUND,
+    FUNDING_INDEX_UPPER_BOUND,
+    N_ASSETS_UPPER_BOUND,
+)
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
+
+
+class PositionAsset:
+    """
+    A specific asset in a user position (see PositionAsset in position.cairo).
+    """
+
+    __slots__ = ("asset_id", "balance", "cached_funding_index")
+
+    def __init__(self, asset_id: int, balance: int, cached_funding_index: int):
+        assert 0 <= asset_id < ASSET_ID_UPPER_BOUND, f"Invalid asset id: {asset_id}."
+        assert BALANCE_LOWER_BOUND <= balance < BALANCE_UPPER_BOUND, f"Invalid balance: {balance}."
+        assert (
+            FUNDING_INDEX_LOWER_BOUND <= cached_funding_index < FUNDING_INDEX_UPPER_BOUND
+        ), f"Invalid funding index: {cached_funding_index}."
+        self.asset_id = asset_id
+        self.balance = balance
+        # A snapshot of the funding index at the last time that funding was applied (fxp 32.32).
+        self.cached_funding_index = cached_funding_index
+
+    def to_tuple(self) -> Tuple[int, int, int]:
+        return (self.asset_id, self.balance, self.cached_funding_index)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PositionAsset):
+            return NotImplemented
+        return self.to_tuple() == other.to_tuple()
+
+    def __hash__(self) -> int:
+        return hash(self.to_tuple())
+
+    def __repr__(self) -> str:
+        return (
+            f"PositionAsset(asset_id={self.asset_id}, balance={self.balance}, "
+            f"cached_funding_index={self.cached_funding_index})"
+        )
+
+    def pack(self) -> int:
+        """
+        Returns the asset packed into a field element, as hashed by position_hash_assets.
+        """
+        packed = self.asset_id
+        packed = packed * (FUNDING_INDEX_UPPER_BOUND - FUNDING_INDEX_LOWER_BOUND) + (
+            self.cached_funding_index - FUNDING_INDEX_LOWER_BOUND
+        )
+        return packed * (BALANCE_UPPER_BOUND - BALANCE_LOWER_BOUND) + (
+            self.balance - BALANCE_LOWER_BOUND
+        )
+
+
+class Position:
+    """
+    A user position (see Position in position.cairo). The assets must be sorted by asset id.
+    """
+
+    __slots__ = ("public_key", "collateral_balance", "assets", "funding_timestamp")
+
+    def __init__(
+        self,
+        public_key: int,
+        collateral_balance: int,
+        assets: Sequence[PositionAsset] = (),
+        funding_timestamp: int = 0,
+    ):
+        assert (
+            BALANCE_LOWER_BOUND <= collateral_balance < BALANCE_UPPER_BOUND
+        ), f"Invalid collateral balance: {collateral_balance}."
+        assert len(assets) < N_ASSETS_UPPER_BOUND, f"Too many assets: {len(assets)}."
+        assert all(
+            asset.asset_id < next_asset.asset_id for asset, next_asset in zip(assets, assets[1:])
+        ), "The assets must be sorted by asset id."
+        self.public_key = public_key
+        self.collateral_balance = collateral_balance
+        self.assets = tuple(assets)
+        # An auxiliary field, which is not a part of the position hash.
+        self.funding_timestamp = funding_timestamp
+
+    @property
+    def n_assets(self) -> int:
+        return len(self.assets)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Position):
+            return NotImplemented
+        return (self.public_key, self.collateral_balance, self.assets, self.funding_timestamp) == (
+            other.public_key,
+            other.collateral_balance,
+            other.assets,
+            other.funding_timestamp,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Position(public_key={self.public_key}, "
+            f"collateral_balance={self.collateral_balance}, assets={list(self.assets)}, "
+            f"funding_timestamp={self.funding_timestamp})"
+        )
+
+
+def position_hash_assets(assets: Iterable[PositionAsset], current_hash: int = 0) -> int:
+    """
+    Same as position_hash_assets in hash.cairo.
+    """
+    for asset in assets:
+        current_hash = pedersen_hash(current_hash, asset.pack())
+    return current_hash
+
+
+def position_hash_from_assets_hash(position: Position, assets_hash: int) -> int:
+    """
+    Returns the hash of the position, given the hash of its assets.
+    """
+    result = pedersen_hash(assets_hash, position.public_key)
+    return pedersen_hash(
+        result,
+        (position.collateral_balance - BALANCE_LOWER_BOUND) * N_ASSETS_UPPER_BOUND
+        + position.n_assets,
+    )
+
+
+def position_hash(position: Position) -> int:
+    """
+    Same as position_hash in hash.cairo.
+    """
+    return position_hash_from_assets_hash(
+        position=position, assets_hash=position_hash_assets(assets=position.assets)
+    )
+
+
+def hash_positions(
+    positions: Iterable[Position], assets_hash_cache: Optional[Dict[tuple, int]] = None
+) -> List[int]:
+    """
+    Returns the hashes of the given positions.
+    The hash of the assets is computed once for all the positions with the same assets (e.g., the
+    previous and new values of a position where only the collateral balance changed).
+    assets_hash_cache, if given, maps a tuple of assets to their hash, and is used (and updated)
+    to share the assets hashes between calls.
+    """
+    if assets_hash_cache is None:
+        assets_hash_cache = {}
+    position_hashes = []
+    for position in positions:
+        assets_hash = assets_hash_cache.get(position.assets)
+        if assets_hash is None:
+            assets_hash = position_hash_assets(assets=position.assets)
+            assets_hash_cache[position.assets] = assets_hash
+        position_hashes.append(
+            position_hash_from_assets_hash(position=position, assets_hash=assets_hash)
+        )
+    return position_hashes
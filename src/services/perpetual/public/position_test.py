@@ -0,0 +1,77 @@
+import pytest
+
+from services.perpetual.public import position as position_module
+from services.perpetual.public.definitions.constants import (
+    BALANCE_LOWER_BOUND,
+    FUNDING_INDEX_LOWER_BOUND,
+)
+from services.perpetual.public.position import (
+    Position,
+    PositionAsset,
+    hash_positions,
+    position_hash,
+)
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
+
+PUBLIC_KEY = 0x3B1E2F8A0F4C5A0E8A8B3B4B0E3F9D1A3A2F7A5E1B2C3D4E5F60718293A4B5C
+ASSETS = (
+    PositionAsset(asset_id=0x4254432D3130, balance=-5, cached_funding_index=2**32),
+    PositionAsset(asset_id=0x4554482D3130, balance=2**62, cached_funding_index=-(2**40)),
+)
+
+
+def test_position_hash():
+    position = Position(public_key=PUBLIC_KEY, collateral_balance=-(10**9), assets=ASSETS)
+    # The computation of position_hash in hash.cairo, step by step.
+    assets_hash = 0
+    for asset in ASSETS:
+        asset_packed = asset.asset_id
+        asset_packed = asset_packed * 2**64 + (asset.cached_funding_index + 2**63)
+        asset_packed = asset_packed * 2**64 + (asset.balance + 2**63)
+        assets_hash = pedersen_hash(assets_hash, asset_packed)
+    expected_hash = pedersen_hash(
+        pedersen_hash(assets_hash, PUBLIC_KEY), (-(10**9) + 2**63) * 2**16 + 2
+    )
+    assert position_hash(position) == expected_hash
+
+    # An empty position.
+    assert position_hash(Position(public_key=0, collateral_balance=0)) == pedersen_hash(
+        pedersen_hash(0, 0), (-BALANCE_LOWER_BOUND) * 2**16
+    )
+    # The packing of the lowest values.
+    assert PositionAsset(0, BALANCE_LOWER_BOUND, FUNDING_INDEX_LOWER_BOUND).pack() == 0
+
+
+def test_invalid_position():
+    with pytest.raises(AssertionError, match="Invalid balance"):
+        PositionAsset(asset_id=1, balance=2**63, cached_funding_index=0)
+    with pytest.raises(AssertionError, match="Invalid asset id"):
+        PositionAsset(asset_id=2**120, balance=0, cached_funding_index=0)
+    with pytest.raises(AssertionError, match="sorted by asset id"):
+        Position(public_key=PUBLIC_KEY, collateral_balance=0, assets=ASSETS[::-1])
+
+
+def test_hash_positions(monkeypatch):
+    prev_position = Position(public_key=PUBLIC_KEY, collateral_balance=100, assets=ASSETS)
+    # Only the collateral balance changed.
+    new_position = Position(public_key=PUBLIC_KEY, collateral_balance=200, assets=ASSETS)
+    other_position = Position(public_key=PUBLIC_KEY, collateral_balance=200, assets=ASSETS[:1])
+    positions = [prev_position, new_position, other_position]
+    expected_hashes = [position_hash(position) for position in positions]
+
+    n_hashes = 0
+
+    def counting_pedersen_hash(x: int, y: int) -> int:
+        nonlocal n_hashes
+        n_hashes += 1
+        return pedersen_hash(x, y)
+
+    monkeypatch.setattr(position_module, "pedersen_hash", counting_pedersen_hash)
+    assets_hash_cache: dict = {}
+    assert hash_positions(positions, assets_hash_cache=assets_hash_cache) == expected_hashes
+    # The assets hashes (2 + 1 hashes), and 2 hashes per position.
+    assert n_hashes == 3 + 2 * len(positions)
+
+    n_hashes = 0
+    assert hash_positions(positions, assets_hash_cache=assets_hash_cache) == expected_hashes
+    assert n_hashes == 2 * len(positions)
@@ -0,0 +1,306 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+"""
+Lazy views over the output of the perpetual program, as serialized by program_output_serialize in
+services/perpetual/cairo/output/program_output.cairo.
+The views only compute the offsets of the sections of the output, and read a field (or create an
+object for it) when it is accessed. Modifications and forced actions can be read in bulk, as
+tuples of raw field elements.
+"""
+
+import itertools
+from typing import Iterator, List, Sequence, Tuple, Union, overload
+
+from services.perpetual.public.data_availability import (
+    WORD_BYTES,
+    BytesLike,
+    FundingIndicesInfo,
+    decode_funding_indices_info,
+)
+
+# As in services/perpetual/cairo/output/data_availability.cairo.
+VALIDIUM_MODE = 0
+ROLLUP_MODE = 1
+
+# As in services/perpetual/cairo/output/forced.cairo.
+FORCED_WITHDRAWAL = 0
+FORCED_TRADE = 1
+# The number of serialized fields of each type of forced action (ForcedWithdrawalAction and
+# ForcedTradeAction), excluding the type.
+FORCED_ACTION_SIZES = {FORCED_WITHDRAWAL: 3, FORCED_TRADE: 9}
+
+MODIFICATION_SIZE = 3
+ASSET_CONFIG_HASH_ENTRY_SIZE = 2
+# The biased_delta of a modification is biased by MODIFICATION_DELTA_BIAS (see Modification).
+MODIFICATION_DELTA_BIAS = 2**64
+
+
+class WordArray(Sequence[int]):
+    """
+    A sequence of the 32-byte big-endian words of the given bytes, where each word is converted to
+    an int only when it is accessed.
+    """
+
+    def __init__(self, data: BytesLike):
+        self.view = memoryview(data)
+        assert (
+            len(self.view) % WORD_BYTES == 0
+        ), f"Data size must be a multiple of {WORD_BYTES} bytes."
+
+    def __len__(self) -> int:
+        return len(self.view) // WORD_BYTES
+
+    @overload
+    def __getitem__(self, index: int) -> int: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[int]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return int.from_bytes(self.view[index * WORD_BYTES : (index + 1) * WORD_BYTES], "big")
+
+
+class OutputView:
+    """
+    A view of a structure that starts at a given offset of an output.
+    """
+
+    __slots__ = ("data", "offset")
+
+    def __init__(self, data: Sequence[int], offset: int):
+        self.data = data
+        self.offset = offset
+
+    def read(self, index: int) -> int:
+        """
+        Returns the word at the given index, relative to the start of the structure.
+        """
+        return self.data[self.offset + index]
+
+
+class SharedStateView(OutputView):
+    """
+    A view of a serialized SharedState (see shared_state_serialize in state.cairo), which starts
+    with its size.
+    """
+
+    __slots__ = ()
+
+    @property
+    def size(self) -> int:
+        """
+        The number of words of the serialized shared state, including its size.
+        """
+        return self.read(0) + 1
+
+    @property
+    def positions_root(self) -> int:
+        return self.read(1)
+
+    @property
+    def positions_tree_height(self) -> int:
+        return self.read(2)
+
+    @property
+    def orders_root(self) -> int:
+        return self.read(3)
+
+    @property
+    def orders_tree_height(self) -> int:
+        return self.read(4)
+
+    @property
+    def global_funding_indices(self) -> FundingIndicesInfo:
+        return decode_funding_indices_info(iter(self.data[self.offset + 5 : self.end]))
+
+    @property
+    def oracle_prices_offset(self) -> int:
+        # Skip the funding indices: their count, the (asset id, funding index) pairs, and the
+        # funding timestamp.
+        return self.offset + 5 + 1 + 2 * self.read(5) + 1
+
+    @property
+    def oracle_prices(self) -> List[Tuple[int, int]]:
+        """
+        The oracle prices, as (asset id, price) pairs.
+        """
+        start = self.oracle_prices_offset + 1
+        words = self.data[start : start + 2 * self.data[start - 1]]
+        return list(zip(words[::2], words[1::2]))
+
+    @property
+    def system_time(self) -> int:
+        return self.data[self.end - 1]
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+class ModificationView(OutputView):
+    """
+    A view of a serialized Modification (see modification_serialize in program_output.cairo).
+    """
+
+    __slots__ = ()
+
+    @property
+    def owner_key(self) -> int:
+        return self.read(0)
+
+    @property
+    def position_id(self) -> int:
+        return self.read(1)
+
+    @property
+    def biased_delta(self) -> int:
+        return self.read(2)
+
+    @property
+    def delta(self) -> int:
+        return self.biased_delta - MODIFICATION_DELTA_BIAS
+
+
+class ProgramOutput:
+    """
+    A view of the output of the perpetual program, given as a sequence of field elements (or as
+    bytes of 32-byte big-endian words). The output may be followed by other data (e.g., the data
+    availability output, which starts at offset size).
+    """
+
+    __slots__ = (
+        "data",
+        "prev_shared_state",
+        "new_shared_state",
+        "modifications_offset",
+        "forced_actions_offset",
+        "conditions_offset",
+    )
+
+    def __init__(self, data: Union[Sequence[int], BytesLike]):
+        if isinstance(data, (bytes, bytearray, memoryview)) or not isinstance(data, Sequence):
+            data = WordArray(data)
+        self.data: Sequence[int] = data
+        # Compute the offsets of the variable-size sections, using their sizes. Only a few words
+        # are read.
+        asset_configs_end = 3 + ASSET_CONFIG_HASH_ENTRY_SIZE * self.n_asset_configs
+        self.prev_shared_state = SharedStateView(data=data, offset=asset_configs_end)
+        self.new_shared_state = SharedStateView(data=data, offset=self.prev_shared_state.end)
+        # Skip the minimum expiration timestamp.
+        self.modifications_offset = self.new_shared_state.end + 1
+        self.forced_actions_offset = (
+            self.modifications_offset + 1 + MODIFICATION_SIZE * self.n_modifications
+        )
+        # The forced actions are preceded by their total size, and by their count.
+        self.conditions_offset = self.forced_actions_offset + 2 + data[self.forced_actions_offset]
+        assert self.conditions_offset < len(data) and self.size <= len(
+            data
+        ), "The program output is truncated."
+
+    @property
+    def general_config_hash(self) -> int:
+        return self.data[0]
+
+    @property
+    def data_availability_mode(self) -> int:
+        return self.data[1]
+
+    @property
+    def n_asset_configs(self) -> int:
+        return self.data[2]
+
+    def iter_asset_configs(self) -> Iterator[Tuple[int, ...]]:
+        """
+        Yields the asset config hashes, as (asset id, config hash) pairs.
+        """
+        return iter_tuples(
+            data=self.data,
+            offset=3,
+            n_items=self.n_asset_configs,
+            item_size=ASSET_CONFIG_HASH_ENTRY_SIZE,
+        )
+
+    @property
+    def minimum_expiration_timestamp(self) -> int:
+        return self.data[self.modifications_offset - 1]
+
+    @property
+    def n_modifications(self) -> int:
+        return self.data[self.modifications_offset]
+
+    def get_modification(self, index: int) -> ModificationView:
+        assert 0 <= index < self.n_modifications, f"Modification index out of range: {index}."
+        return ModificationView(
+            data=self.data, offset=self.modifications_offset + 1 + MODIFICATION_SIZE * index
+        )
+
+    def iter_modifications(self) -> Iterator[Tuple[int, ...]]:
+        """
+        Yields the modifications, as (owner key, position id, biased delta) tuples.
+        """
+        return iter_tuples(
+            data=self.data,
+            offset=self.modifications_offset + 1,
+            n_items=self.n_modifications,
+            item_size=MODIFICATION_SIZE,
+        )
+
+    @property
+    def n_forced_actions(self) -> int:
+        return self.data[self.forced_actions_offset + 1]
+
+    def iter_forced_actions(self) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        """
+        Yields the forced actions, as (forced action type, fields) pairs, where fields is a tuple of
+        the fields of the ForcedWithdrawalAction or ForcedTradeAction, in their serialization order.
+        """
+        words = iter(self.data[self.forced_actions_offset + 2 : self.conditions_offset])
+        for _ in range(self.n_forced_actions):
+            forced_type = next(words)
+            assert forced_type in FORCED_ACTION_SIZES, f"Unknown forced action type: {forced_type}."
+            yield forced_type, tuple(itertools.islice(words, FORCED_ACTION_SIZES[forced_type]))
+
+    @property
+    def n_conditions(self) -> int:
+        return self.data[self.conditions_offset]
+
+    @property
+    def conditions(self) -> List[int]:
+        return list(self.data[self.conditions_offset + 1 : self.size])
+
+    @property
+    def size(self) -> int:
+        """
+        The number of words of the program output.
+        """
+        return self.conditions_offset + 1 + self.data[self.conditions_offset]
+
+
+def iter_tuples(
+    data: Sequence[int], offset: int, n_items: int, item_size: int
+) -> Iterator[Tuple[int, ...]]:
+    """
+    Yields n_items consecutive tuples of item_size words, starting at the given offset.
+    """
+    words = iter(data[offset : offset + n_items * item_size])
+    return zip(*[words] * item_size)
@@ -0,0 +1,125 @@
+import pytest
+
+from services.perpetual.public.data_availability import WORD_BYTES, FundingIndicesInfo
+from services.perpetual.public.program_output import (
+    FORCED_TRADE,
+    FORCED_WITHDRAWAL,
+    ROLLUP_MODE,
+    ProgramOutput,
+    WordArray,
+)
+
+ASSET_ID = 0x4254432D3130
+FORCED_TRADE_FIELDS = (11, 12, 13, 14, ASSET_ID, 100, 200, 1, 7)
+PROGRAM_OUTPUT = (
+    # General config hash, data availability mode and the asset config hashes.
+    [0x1234, ROLLUP_MODE, 2, ASSET_ID, 0xABC, ASSET_ID + 1, 0xDEF]
+    # The previous shared state: positions root and height, orders root and height, global funding
+    # indices, oracle prices and system time.
+    + [12, 101, 64, 102, 64, 1, ASSET_ID, 2**63 + 5, 1000, 1, ASSET_ID, 3 * 2**32, 1100]
+    # The new shared state.
+    + [8, 201, 64, 202, 64, 0, 2000, 0, 2100]
+    # Minimum expiration timestamp.
+    + [3000]
+    # Modifications.
+    + [2, 0xAA, 1, 2**64 + 50, 0xBB, 2, 2**64 - 50]
+    # Forced actions, preceded by their total size (excluding the count).
+    + [4 + 10, 2, FORCED_WITHDRAWAL, 0xAA, 1, 30, FORCED_TRADE, *FORCED_TRADE_FIELDS]
+    # Conditions.
+    + [2, 0x111, 0x222]
+)
+# The data availability output, which follows the program output.
+DATA_AVAILABILITY = [0, 4, 1, 2, 3, 4]
+
+
+@pytest.fixture(params=["list", "bytes"])
+def program_output(request) -> ProgramOutput:
+    data = PROGRAM_OUTPUT + DATA_AVAILABILITY
+    if request.param == "bytes":
+        return ProgramOutput(b"".join(word.to_bytes(WORD_BYTES, "big") for word in data))
+    return ProgramOutput(data)
+
+
+def test_program_output(program_output: ProgramOutput):
+    assert program_output.general_config_hash == 0x1234
+    assert program_output.data_availability_mode == ROLLUP_MODE
+    assert list(program_output.iter_asset_configs()) == [(ASSET_ID, 0xABC), (ASSET_ID + 1, 0xDEF)]
+
+    prev_shared_state = program_output.prev_shared_state
+    assert prev_shared_state.positions_root == 101
+    assert prev_shared_state.positions_tree_height == 64
+    assert prev_shared_state.orders_root == 102
+    assert prev_shared_state.global_funding_indices == FundingIndicesInfo(
+        funding_indices={ASSET_ID: 5}, funding_timestamp=1000
+    )
+    assert prev_shared_state.oracle_prices == [(ASSET_ID, 3 * 2**32)]
+    assert prev_shared_state.system_time == 1100
+    new_shared_state = program_output.new_shared_state
+    assert new_shared_state.positions_root == 201
+    assert new_shared_state.global_funding_indices == FundingIndicesInfo(
+        funding_indices={}, funding_timestamp=2000
+    )
+    assert new_shared_state.oracle_prices == []
+    assert new_shared_state.system_time == 2100
+
+    assert program_output.minimum_expiration_timestamp == 3000
+    assert program_output.n_modifications == 2
+    assert list(program_output.iter_modifications()) == [
+        (0xAA, 1, 2**64 + 50),
+        (0xBB, 2, 2**64 - 50),
+    ]
+    modification = program_output.get_modification(1)
+    assert (modification.owner_key, modification.position_id, modification.delta) == (
+        0xBB,
+        2,
+        -50,
+    )
+    with pytest.raises(AssertionError, match="Modification index out of range"):
+        program_output.get_modification(2)
+
+    assert program_output.n_forced_actions == 2
+    assert list(program_output.iter_forced_actions()) == [
+        (FORCED_WITHDRAWAL, (0xAA, 1, 30)),
+        (FORCED_TRADE, FORCED_TRADE_FIELDS),
+    ]
+    assert program_output.n_conditions == 2
+    assert program_output.conditions == [0x111, 0x222]
+    assert program_output.size == len(PROGRAM_OUTPUT)
+
+
+def test_lazy_access():
+    read_indices = set()
+
+    class RecordingList(list):
+        def __getitem__(self, index):
+            if isinstance(index, int):
+                read_indices.add(index)
+            return super().__getitem__(index)
+
+    program_output = ProgramOutput(RecordingList(PROGRAM_OUTPUT))
+    # Only the sizes of the sections are read when the view is created.
+    assert len(read_indices) == 6
+    program_output.new_shared_state.positions_root
+    assert len(read_indices) == 7
+
+
+def test_invalid_program_output():
+    with pytest.raises(AssertionError, match="truncated"):
+        ProgramOutput(PROGRAM_OUTPUT[:-1])
+    data = list(PROGRAM_OUTPUT)
+    # The type of the forced trade, which is followed by its fields and by the conditions.
+    forced_trade_index = len(data) - len(FORCED_TRADE_FIELDS) - 4
+    assert data[forced_trade_index] == FORCED_TRADE
+    data[forced_trade_index] = 5
+    with pytest.raises(AssertionError, match="Unknown forced action type: 5"):
+        list(ProgramOutput(data).iter_forced_actions())
+
+
+def test_word_array():
+    words = WordArray(b"".join(word.to_bytes(WORD_BYTES, "big") for word in [1, 2**255, 3]))
+    assert len(words) == 3
+    assert words[1] == 2**255
+    assert words[-1] == 3
+    assert words[1:] == [2**255, 3]
+    with pytest.raises(IndexError):
+        words[3]
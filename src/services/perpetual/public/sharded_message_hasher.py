@@ -0,0 +1,208 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+import collections
+import concurrent.futures
+import functools
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from services.perpetual.public.perpetual_messages import get_msg
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
+from starkware.crypto.signature.fixed_base_table import fixed_base_sign
+from starkware.crypto.signature.signature import ECSignature
+
+# A parsed message: (message type, message fields, private key or None if it should not be signed).
+Message = Tuple[str, Dict[str, Any], Optional[int]]
+# The message hash and its signature (or None if the message is not signed).
+MessageHashResult = Tuple[int, Optional[ECSignature]]
+
+# The fields that determine the market of each message type. Messages of the same market are sent
+# to the same worker.
+MARKET_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "limit_order": ("asset_id_synthetic", "asset_id_collateral"),
+    "transfer": ("asset_id", "asset_id_fee"),
+    "conditional_transfer": ("asset_id", "asset_id_fee"),
+    "withdrawal_to_address": ("asset_id_collateral",),
+    "price": ("asset_pair",),
+}
+
+# The number of leading hash_function calls of each message type whose inputs depend only on the
+# market of the message (e.g., pedersen(pedersen(asset_id_sell, asset_id_buy), asset_id_fee) for
+# limit orders).
+N_MARKET_HASH_CALLS: Dict[str, int] = {
+    "limit_order": 2,
+    "transfer": 1,
+    "conditional_transfer": 1,
+    "withdrawal_to_address": 0,
+    "price": 0,
+}
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_PENDING_MESSAGES = 4096
+DEFAULT_MAX_PREFIX_CACHE_SIZE = 2**16
+
+
+def get_market(message_type: str, fields: Dict[str, Any]) -> Tuple[Any, ...]:
+    assert message_type in MARKET_FIELDS, f"Unsupported message type: {message_type}."
+    return tuple(fields[name] for name in MARKET_FIELDS[message_type])
+
+
+class MarketHashWorker:
+    """
+    Hashes and signs messages, memoizing the hashes of the market-dependent prefix of each message
+    in an LRU cache. Signatures are computed using the (lazily computed) fixed base table of EC_GEN.
+    """
+
+    def __init__(self, max_prefix_cache_size: int = DEFAULT_MAX_PREFIX_CACHE_SIZE):
+        self.max_prefix_cache_size = max_prefix_cache_size
+        self.prefix_cache: "collections.OrderedDict[Tuple[int, int], int]" = (
+            collections.OrderedDict()
+        )
+
+    def get_msg(self, message_type: str, **fields) -> int:
+        n_cached_calls = N_MARKET_HASH_CALLS.get(message_type, 0)
+        n_calls = 0
+
+        def hash_function(x: int, y: int) -> int:
+            nonlocal n_calls
+            n_calls += 1
+            if n_calls > n_cached_calls:
+                return pedersen_hash(x, y)
+
+            result = self.prefix_cache.get((x, y))
+            if result is not None:
+                self.prefix_cache.move_to_end((x, y))
+                return result
+
+            result = self.prefix_cache[x, y] = pedersen_hash(x, y)
+            if len(self.prefix_cache) > self.max_prefix_cache_size:
+                self.prefix_cache.popitem(last=False)
+            return result
+
+        return get_msg(message_type, hash_function=hash_function, **fields)
+
+    def process_message(self, message: Message) -> MessageHashResult:
+        message_type, fields, private_key = message
+        message_hash = self.get_msg(message_type, **fields)
+        if private_key is None:
+            return message_hash, None
+        return message_hash, fixed_base_sign(msg_hash=message_hash, priv_key=private_key)
+
+
+@functools.lru_cache(maxsize=None)
+def get_market_hash_worker() -> MarketHashWorker:
+    """
+    Returns the MarketHashWorker of the current process.
+    """
+    return MarketHashWorker()
+
+
+def process_batch(batch: List[Tuple[int, Message]]) -> List[Tuple[int, MessageHashResult]]:
+    worker = get_market_hash_worker()
+    return [(index, worker.process_message(message)) for index, message in batch]
+
+
+class ShardedMessageHasher:
+    """
+    Hashes (and signs) messages using a set of worker processes, where all the messages of a market
+    are sent to the same worker, so that the caches of each worker stay small and hot.
+
+    Messages are sent to the workers in batches, and the results are yielded in input order. At
+    most max_pending_messages messages are in flight (sent or waiting to be sent), which bounds the
+    size of the reorder buffer.
+    """
+
+    def __init__(
+        self,
+        n_shards: int,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_pending_messages: int = DEFAULT_MAX_PENDING_MESSAGES,
+    ):
+        assert n_shards > 0, f"Invalid n_shards: {n_shards}."
+        assert batch_size > 0, f"Invalid batch_size: {batch_size}."
+        assert max_pending_messages > 0, f"Invalid max_pending_messages: {max_pending_messages}."
+        self.n_shards = n_shards
+        self.batch_size = batch_size
+        self.max_pending_messages = max_pending_messages
+        # A single process per shard, so that the worker state of a market stays in one process.
+        self.executors = [
+            concurrent.futures.ProcessPoolExecutor(max_workers=1) for _ in range(n_shards)
+        ]
+
+    def __enter__(self) -> "ShardedMessageHasher":
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def shutdown(self):
+        for executor in self.executors:
+            executor.shutdown()
+
+    def get_shard(self, message: Message) -> int:
+        message_type, fields, _ = message
+        return hash(get_market(message_type=message_type, fields=fields)) % self.n_shards
+
+    def process(self, messages: Iterable[Message]) -> Iterator[MessageHashResult]:
+        """
+        Yields the result of every message, in input order. The messages are consumed lazily.
+        """
+        batches: List[List[Tuple[int, Message]]] = [[] for _ in range(self.n_shards)]
+        pending_futures: Set[concurrent.futures.Future] = set()
+        reorder_buffer: Dict[int, MessageHashResult] = {}
+        n_messages = 0
+        next_index = 0
+
+        def submit(shard: int):
+            pending_futures.add(self.executors[shard].submit(process_batch, batches[shard]))
+            batches[shard] = []
+
+        def collect_results(block: bool):
+            if block:
+                # Make sure the message at next_index was sent, and wait for any result.
+                for shard, batch in enumerate(batches):
+                    if len(batch) > 0:
+                        submit(shard=shard)
+                done, _ = concurrent.futures.wait(
+                    pending_futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+            else:
+                done = {future for future in pending_futures if future.done()}
+            for future in done:
+                pending_futures.remove(future)
+                reorder_buffer.update(future.result())
+
+        for index, message in enumerate(messages):
+            n_messages = index + 1
+            shard = self.get_shard(message=message)
+            batches[shard].append((index, message))
+            if len(batches[shard]) == self.batch_size:
+                submit(shard=shard)
+                collect_results(block=False)
+
+            while True:
+                while next_index in reorder_buffer:
+                    yield reorder_buffer.pop(next_index)
+                    next_index += 1
+                if n_messages - next_index < self.max_pending_messages:
+                    break
+                collect_results(block=True)
+
+        while next_index < n_messages:
+            collect_results(block=True)
+            while next_index in reorder_buffer:
+                yield reorder_buffer.pop(next_index)
+                next_index += 1
@@ -0,0 +1,108 @@
+import random
+from typing import List
+
+import pytest
+
+from services.perpetual.public.perpetual_messages import get_msg
+from services.perpetual.public.sharded_message_hasher import (
+    MarketHashWorker,
+    Message,
+    ShardedMessageHasher,
+)
+from starkware.crypto.signature.signature import sign
+
+PRIVATE_KEY = 0x3C1E9550E66958296D11B60F8E8E7A7AD990D07FA65D5F7652C4A6C87D4E3CC
+
+
+@pytest.fixture(scope="module")
+def messages() -> List[Message]:
+    """
+    Returns limit orders and transfers of a few markets, some of them signed.
+    """
+    rand = random.Random(0)
+    messages: List[Message] = []
+    for i in range(40):
+        asset_id_synthetic = rand.choice([0x1, 0x2, 0x3])
+        if i % 4 == 0:
+            fields = dict(
+                asset_id=0xA,
+                asset_id_fee=0xA,
+                receiver_public_key=rand.getrandbits(250),
+                sender_position_id=rand.getrandbits(63),
+                receiver_position_id=rand.getrandbits(63),
+                src_fee_position_id=rand.getrandbits(63),
+                nonce=i,
+                amount=rand.getrandbits(63),
+                max_amount_fee=rand.getrandbits(63),
+                expiration_timestamp=438953,
+            )
+            messages.append(("transfer", fields, None))
+            continue
+
+        fields = dict(
+            asset_id_synthetic=asset_id_synthetic,
+            asset_id_collateral=0xA,
+            is_buying_synthetic=rand.choice([True, False]),
+            asset_id_fee=0xA,
+            amount_synthetic=rand.getrandbits(63),
+            amount_collateral=rand.getrandbits(63),
+            max_amount_fee=rand.getrandbits(63),
+            nonce=i,
+            position_id=rand.getrandbits(63),
+            expiration_timestamp=438953,
+        )
+        messages.append(("limit_order", fields, PRIVATE_KEY if i % 10 == 1 else None))
+    return messages
+
+
+def check_results(messages: List[Message], results: list):
+    assert len(results) == len(messages)
+    for (message_type, fields, private_key), (message_hash, signature) in zip(messages, results):
+        assert message_hash == get_msg(message_type, **fields)
+        assert signature == (
+            None if private_key is None else sign(msg_hash=message_hash, priv_key=private_key)
+        )
+
+
+def test_market_hash_worker(messages: List[Message]):
+    worker = MarketHashWorker(max_prefix_cache_size=2)
+    results = [worker.process_message(message) for message in messages]
+    check_results(messages=messages, results=results)
+    assert len(worker.prefix_cache) <= 2
+
+
+def test_market_hash_worker_lru_eviction():
+    worker = MarketHashWorker(max_prefix_cache_size=2)
+
+    def transfer(asset_id: int) -> Message:
+        fields = dict(
+            asset_id=asset_id,
+            asset_id_fee=0xA,
+            receiver_public_key=1,
+            sender_position_id=2,
+            receiver_position_id=3,
+            src_fee_position_id=4,
+            nonce=5,
+            amount=6,
+            max_amount_fee=7,
+            expiration_timestamp=438953,
+        )
+        return ("transfer", fields, None)
+
+    # The market of asset 0x1 is used again before asset 0x3 is added, so asset 0x2 is evicted.
+    messages = [transfer(asset_id) for asset_id in (0x1, 0x2, 0x1, 0x3)]
+    results = [worker.process_message(message) for message in messages]
+    check_results(messages=messages, results=results)
+    assert list(worker.prefix_cache) == [(0x1, 0xA), (0x3, 0xA)]
+
+
+@pytest.mark.parametrize("batch_size, max_pending_messages", [(4, 16), (16, 3), (100, 1000)])
+def test_sharded_message_hasher(
+    messages: List[Message], batch_size: int, max_pending_messages: int
+):
+    with ShardedMessageHasher(
+        n_shards=2, batch_size=batch_size, max_pending_messages=max_pending_messages
+    ) as hasher:
+        check_results(messages=messages, results=list(hasher.process(messages=iter(messages))))
+        # The hasher may be reused.
+        check_results(messages=messages[:5], results=list(hasher.process(messages=messages[:5])))
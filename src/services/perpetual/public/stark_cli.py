@@ -14,11 +14,39 @@
 # and limitations under the License.                                          #
 ###############################################################################
 
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import itertools
+import json
+import os
+import signal
 import sys
+import traceback
 from argparse import ArgumentParser, RawTextHelpFormatter
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 
+from services.perpetual.public.oracle_price_publisher import OraclePricePublisher
 from services.perpetual.public.perpetual_messages import get_price_msg
-from starkware.crypto.signature.signature import FIELD_PRIME, private_to_stark_key, sign
+from starkware.crypto.signature import fast_pedersen_hash
+from starkware.crypto.signature.fixed_base_table import (
+    fixed_base_private_to_stark_key,
+    fixed_base_sign,
+    get_ec_gen_table,
+)
+from starkware.crypto.signature.signature import (
+    FIELD_PRIME,
+    pedersen_hash,
+    private_to_stark_key,
+    sign,
+    verify,
+)
+from starkware.python.json_rpc.client import JsonRpcUnixClient
+from starkware.python.json_rpc.server import JsonRpcServer
+from starkware.python.utils import imap_in_chunks
+
+BATCH_CHUNK_SIZE = 64
 
 
 class HexedBoundedParam:
@@ -31,17 +59,239 @@ class HexedBoundedParam:
         return num
 
 
-def sign_cli(key, data):
-    r, s = sign(data, key)
+def sign_cli(key, data, sign_function=sign):
+    r, s = sign_function(data, key)
     return " ".join([hex(r), hex(s)])
 
 
-def public_cli(key):
-    return hex(private_to_stark_key(key))
+def public_cli(key, private_to_stark_key_function=private_to_stark_key):
+    return hex(private_to_stark_key_function(key))
+
+
+def hash_price(oracle_name, asset_pair, price, timestamp, hash_function=pedersen_hash):
+    return hex(get_price_msg(oracle_name, asset_pair, timestamp, price, hash_function))[2:]
+
+
+def verify_cli(key, data, r, s):
+    return "true" if verify(msg_hash=data, r=r, s=s, public_key=key) else "false"
+
+
+# For every method that supports batch and server modes: the function computing the result, and
+# the names and parsers of its arguments, in the order they appear in a batch input line. The
+# functions use the fast implementations, whose setup cost is paid once per process.
+BATCH_METHODS: Dict[str, Tuple[Callable[..., str], List[Tuple[str, HexedBoundedParam]]]] = {
+    "hash": (
+        functools.partial(hash_price, hash_function=fast_pedersen_hash.pedersen_hash),
+        [
+            ("oracle", HexedBoundedParam(2**40)),
+            ("asset", HexedBoundedParam(2**128)),
+            ("price", HexedBoundedParam(2**120)),
+            ("time", HexedBoundedParam(2**32)),
+        ],
+    ),
+    "sign": (
+        functools.partial(sign_cli, sign_function=fixed_base_sign),
+        [("key", HexedBoundedParam(FIELD_PRIME)), ("data", HexedBoundedParam(FIELD_PRIME))],
+    ),
+    "get_public": (
+        functools.partial(
+            public_cli, private_to_stark_key_function=fixed_base_private_to_stark_key
+        ),
+        [("key", HexedBoundedParam(FIELD_PRIME))],
+    ),
+    "verify": (
+        verify_cli,
+        [
+            ("key", HexedBoundedParam(FIELD_PRIME)),
+            ("data", HexedBoundedParam(FIELD_PRIME)),
+            ("r", HexedBoundedParam(FIELD_PRIME)),
+            ("s", HexedBoundedParam(FIELD_PRIME)),
+        ],
+    ),
+}
+
 
+def get_batch_line_args(method, line):
+    """
+    Returns the (name, hex string) pairs of the arguments in a batch input line.
+    """
+    _, params = BATCH_METHODS[method]
+    elements = line.split()
+    assert len(elements) == len(params), f"Expected {len(params)} arguments, got {len(elements)}."
+    return [(name, element) for (name, _), element in zip(params, elements)]
 
-def hash_price(oracle_name, asset_pair, price, timestamp):
-    return hex(get_price_msg(oracle_name, asset_pair, timestamp, price))[2:]
+
+def cli_call(method, **kwargs):
+    """
+    Computes the result of a method of BATCH_METHODS, given its arguments as hex strings.
+    """
+    func, params = BATCH_METHODS[method]
+    assert kwargs.keys() == {
+        name for name, _ in params
+    }, f"Expected the arguments {[name for name, _ in params]}, got {list(kwargs.keys())}."
+    return func(*(param(kwargs[name]) for name, param in params))
+
+
+def batch_cli_line(method, indexed_line):
+    """
+    Computes the result of a single batch input line, given with its (1-based) line number.
+    """
+    line_number, line = indexed_line
+    try:
+        return cli_call(method, **dict(get_batch_line_args(method=method, line=line)))
+    except Exception as exception:
+        raise Exception(f"Failed to process line {line_number}: {exception!r}.") from exception
+
+
+def get_indexed_batch_lines(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """
+    Returns the non-empty lines of a batch input with their (1-based) line numbers.
+    """
+    return (
+        (line_number, line)
+        for line_number, line in enumerate(lines, start=1)
+        if len(line.strip()) > 0
+    )
+
+
+def batch_cli(method, lines, executor=None):
+    """
+    Computes the result of every non-empty line of lines, where each line contains the hex
+    arguments of the method separated by whitespaces (in the order of BATCH_METHODS).
+    Yields the results in input order.
+    """
+    assert method in BATCH_METHODS, f"Batch mode is not supported for {method}."
+    indexed_lines = get_indexed_batch_lines(lines=lines)
+    return imap_in_chunks(
+        func=functools.partial(batch_cli_line, method),
+        data=indexed_lines,
+        chunk_size=BATCH_CHUNK_SIZE,
+        executor=executor,
+    )
+
+
+def audit_line(indexed_line):
+    """
+    Verifies the signature in a single verify batch input line. Returns the line number, the line
+    and the reason of the failure (or None if the signature is valid).
+    """
+    line_number, line = indexed_line
+    try:
+        failure = None if batch_cli_line("verify", indexed_line) == "true" else "invalid signature"
+    except Exception as exception:
+        failure = repr(exception.__cause__ or exception)
+    return line_number, line.strip(), failure
+
+
+def audit_cli(lines, executor=None, output_file=sys.stdout):
+    """
+    Verifies the signatures in a verify batch input (see batch_cli). Writes a line for every
+    failing row, in input order, followed by a summary line. Returns the number of failures.
+    """
+    n_rows = n_failures = 0
+    for line_number, line, failure in imap_in_chunks(
+        func=audit_line,
+        data=get_indexed_batch_lines(lines=lines),
+        chunk_size=BATCH_CHUNK_SIZE,
+        executor=executor,
+    ):
+        n_rows += 1
+        if failure is not None:
+            n_failures += 1
+            print(f"Line {line_number} failed ({failure}): {line}", file=output_file)
+    print(
+        f"Verified {n_rows} signatures: {n_rows - n_failures} valid, {n_failures} failed.",
+        file=output_file,
+    )
+    return n_failures
+
+
+def serve_cli(socket_path, workers):
+    """
+    Serves the methods of BATCH_METHODS over JSON-RPC on a Unix socket, until interrupted.
+    Every method is called with its arguments as named hex string parameters (e.g.,
+    {"key": "0x...", "data": "0x..."} for sign), and returns the output of the matching CLI
+    method. If workers > 0, the requests are computed in a pool of worker processes. Otherwise,
+    they are computed in a thread pool, so that the event loop keeps accepting requests.
+    """
+    # Build the fixed base table before accepting requests.
+    get_ec_gen_table()
+    with contextlib.ExitStack() as stack:
+        executor = stack.enter_context(
+            concurrent.futures.ThreadPoolExecutor()
+            if workers == 0
+            else concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=get_ec_gen_table
+            )
+        )
+        server = JsonRpcServer(
+            methods={method: functools.partial(cli_call, method) for method in BATCH_METHODS},
+            executor=executor,
+        )
+
+        async def serve():
+            # Stop gracefully on SIGTERM, so that the worker processes are shut down.
+            stopped = asyncio.Event()
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+            unix_server = await server.start_unix_server(path=socket_path)
+            try:
+                async with unix_server:
+                    await stopped.wait()
+            finally:
+                os.unlink(socket_path)
+
+        asyncio.run(serve())
+
+
+def connect_batch_cli(socket_path, method, lines):
+    """
+    Same as batch_cli, where the results are computed by a server (see serve_cli).
+    """
+    assert method in BATCH_METHODS, f"Batch mode is not supported for {method}."
+    indexed_lines = get_indexed_batch_lines(lines=lines)
+    with JsonRpcUnixClient(path=socket_path) as client:
+        while True:
+            calls = []
+            for line_number, line in itertools.islice(indexed_lines, BATCH_CHUNK_SIZE):
+                try:
+                    calls.append((method, dict(get_batch_line_args(method=method, line=line))))
+                except Exception as exception:
+                    raise Exception(
+                        f"Failed to process line {line_number}: {exception!r}."
+                    ) from exception
+            if len(calls) == 0:
+                return
+            yield from client.call_batch(calls=calls)
+
+
+def publish_prices_cli(prices_file):
+    with open(prices_file, "r") as f:
+        prices_input = json.load(f)
+
+    publisher = OraclePricePublisher(
+        oracle_private_keys={
+            int(oracle_name, 16): int(private_key, 16)
+            for oracle_name, private_key in prices_input["oracle_keys"].items()
+        }
+    )
+    signed_prices = publisher.sign_prices(
+        observations=(
+            (
+                int(price["oracle"], 16),
+                int(price["asset"], 16),
+                int(price["price"], 16),
+                int(price["time"], 16),
+            )
+            for price in prices_input["prices"]
+        )
+    )
+    return json.dumps(
+        {
+            hex(asset_pair)[2:]: [signed_price.to_dict() for signed_price in asset_signed_prices]
+            for asset_pair, asset_signed_prices in signed_prices.items()
+        },
+        indent=4,
+    )
 
 
 def main():
@@ -74,10 +324,41 @@ def main():
     # | 0 (100 bits)         | price (120 bits)             |   timestamp (32 bits)   | #
     # --------------------------------------------------------------------------------- #
     #                                                                                   #
+    # Verify: gets as input:                                                            #
+    #   key: public key (the output of get_public)                                      #
+    #   data: the signed data                                                           #
+    #   r, s: the signature                                                             #
+    # and outputs:                                                                      #
+    #   true if the signature is valid, and false otherwise                             #
+    # Bulk audit: --method verify --batch <file> --audit verifies the signatures in the #
+    #   file (see batch mode below), and outputs the failing rows and a summary line.   #
+    #   Returns a nonzero exit code if any of the signatures failed.                    #
+    #                                                                                   #
+    # Publish_prices: gets as input:                                                    #
+    #   prices file: a JSON file of the form                                            #
+    #     {"oracle_keys": {<oracle>: <private key>, ...},                               #
+    #      "prices": [{"oracle": ..., "asset": ..., "price": ..., "time": ...}, ...]}   #
+    #   (all the values are hex strings, as in the hash method)                         #
+    # and outputs:                                                                      #
+    #   A JSON mapping from each asset to its signed prices (SignedOraclePrice),        #
+    #   sorted by signer_key                                                            #
+    #                                                                                   #
+    # Batch mode (hash, sign and get_public): instead of the method arguments, give     #
+    #   --batch <file or - for the standard input>                                      #
+    # where every line contains the method arguments as hex strings separated by        #
+    # whitespaces: "oracle asset price time" for hash, "key data" for sign and "key"    #
+    # for get_public. A result line is printed for every input line, in input order.    #
+    # Use --workers to compute the results using several processes.                     #
+    #                                                                                   #
+    # Server mode: --serve <socket path> serves hash, sign, get_public and verify over  #
+    #   JSON-RPC on a Unix socket, keeping the precomputed tables warm between calls.   #
+    #   Run the CLI with --connect <socket path> (in addition to the usual arguments,   #
+    #   or to --batch) to compute the results using the server.                         #
+    #                                                                                   #
     #####################################################################################
     """
 
-    def hash_main(args, unknown):
+    def hash_parser():
         parser = ArgumentParser()
         parser.add_argument(
             "-a",
@@ -111,12 +392,14 @@ def main():
             help="The asset time",
             type=HexedBoundedParam(2**32),
         )
+        return parser
 
-        parser.parse_args(unknown, namespace=args)
+    def hash_main(args, unknown):
+        hash_parser().parse_args(unknown, namespace=args)
 
         return hash_price(args.oracle, args.asset, args.price, args.time)
 
-    def sign_main(args, unknown):
+    def sign_parser():
         parser = ArgumentParser()
         parser.add_argument(
             "-k",
@@ -135,11 +418,13 @@ def main():
             help="The data to sign",
             type=HexedBoundedParam(FIELD_PRIME),
         )
+        return parser
 
-        parser.parse_args(unknown, namespace=args)
+    def sign_main(args, unknown):
+        sign_parser().parse_args(unknown, namespace=args)
         return sign_cli(args.key, args.data)
 
-    def public_main(args, unknown):
+    def public_parser():
         parser = ArgumentParser()
         parser.add_argument(
             "-k",
@@ -149,33 +434,181 @@ def main():
             help="The private key (hex string)",
             type=HexedBoundedParam(FIELD_PRIME),
         )
+        return parser
 
-        parser.parse_args(unknown, namespace=args)
+    def public_main(args, unknown):
+        public_parser().parse_args(unknown, namespace=args)
         return public_cli(args.key)
 
+    def verify_parser():
+        parser = ArgumentParser()
+        parser.add_argument(
+            "-k",
+            "--key",
+            required=True,
+            dest="key",
+            help="The public key (hex string)",
+            type=HexedBoundedParam(FIELD_PRIME),
+        )
+        parser.add_argument(
+            "-d",
+            "--data",
+            required=True,
+            dest="data",
+            help="The signed data",
+            type=HexedBoundedParam(FIELD_PRIME),
+        )
+        parser.add_argument(
+            "-r",
+            "--r",
+            required=True,
+            dest="r",
+            help="The r value of the signature",
+            type=HexedBoundedParam(FIELD_PRIME),
+        )
+        parser.add_argument(
+            "-s",
+            "--s",
+            required=True,
+            dest="s",
+            help="The s value of the signature",
+            type=HexedBoundedParam(FIELD_PRIME),
+        )
+        return parser
+
+    def verify_main(args, unknown):
+        verify_parser().parse_args(unknown, namespace=args)
+        return verify_cli(args.key, args.data, args.r, args.s)
+
+    def publish_prices_main(args, unknown):
+        parser = ArgumentParser()
+        parser.add_argument(
+            "-f",
+            "--prices_file",
+            required=True,
+            dest="prices_file",
+            help="A JSON file with the oracle keys and the prices to sign",
+        )
+
+        parser.parse_args(unknown, namespace=args)
+        return publish_prices_cli(args.prices_file)
+
+    # The argument parsers of the methods of BATCH_METHODS, which are also used in server mode.
+    method_parsers = {
+        "hash": hash_parser,
+        "sign": sign_parser,
+        "get_public": public_parser,
+        "verify": verify_parser,
+    }
+
     subparsers = {
         "hash": hash_main,
         "sign": sign_main,
         "get_public": public_main,
+        "verify": verify_main,
+        "publish_prices": publish_prices_main,
     }
 
-    parser = ArgumentParser(description=description, formatter_class=RawTextHelpFormatter)
+    # Abbreviations are not allowed, as they would consume the arguments of the methods (e.g., --s
+    # of verify).
+    parser = ArgumentParser(
+        description=description, formatter_class=RawTextHelpFormatter, allow_abbrev=False
+    )
     parser.add_argument(
         "-m",
         "--method",
-        required=True,
         dest="method",
-        help="The required operation - hash or sign",
+        help="The required operation - hash, sign, get_public, verify or publish_prices",
         choices=subparsers.keys(),
     )
+    parser.add_argument(
+        "--batch",
+        dest="batch",
+        help="A file (or - for the standard input) with the arguments of an operation per line",
+    )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        default=0,
+        help="Number of worker processes in batch and server modes. If 0, runs in the main process",
+    )
+    parser.add_argument(
+        "--audit",
+        dest="audit",
+        action="store_true",
+        help="In batch mode of verify, outputs only the failing rows and a summary",
+    )
+    parser.add_argument(
+        "--serve",
+        dest="serve",
+        help="Serves the methods over JSON-RPC on a Unix socket at the given path",
+    )
+    parser.add_argument(
+        "--connect",
+        dest="connect",
+        help="Computes the result using a server running on a Unix socket at the given path",
+    )
 
     args, unknown = parser.parse_known_args()
+    if args.method is None and args.serve is None:
+        parser.error("the following arguments are required: -m/--method")
+    if args.audit and args.batch is None:
+        parser.error("--audit is only supported in batch mode (--batch)")
     try:
-        result = subparsers[args.method](args, unknown)
-        print(result)
+        if args.serve is not None:
+            serve_cli(socket_path=args.serve, workers=args.workers)
+            return 0
+
+        if args.connect is not None and args.batch is None:
+            assert args.method in BATCH_METHODS, f"Server mode is not supported for {args.method}."
+            # The arguments are parsed (and checked) as in the other modes, and are sent to the
+            # server as hex strings.
+            connect_args = method_parsers[args.method]().parse_args(unknown)
+            with JsonRpcUnixClient(path=args.connect) as client:
+                print(
+                    client.call(
+                        args.method,
+                        **{
+                            name: hex(getattr(connect_args, name))
+                            for name, _ in BATCH_METHODS[args.method][1]
+                        },
+                    )
+                )
+            return 0
+
+        if args.batch is None:
+            result = subparsers[args.method](args, unknown)
+            print(result)
+            return 0
+
+        assert len(unknown) == 0, f"Unexpected arguments in batch mode: {unknown}."
+        with contextlib.ExitStack() as stack:
+            input_file = sys.stdin if args.batch == "-" else stack.enter_context(open(args.batch))
+            executor = (
+                None
+                if args.workers == 0 or args.connect is not None
+                else stack.enter_context(
+                    concurrent.futures.ProcessPoolExecutor(max_workers=args.workers)
+                )
+            )
+            if args.audit:
+                assert args.method == "verify", "--audit is only supported for verify."
+                assert args.connect is None, "--audit is not supported with --connect."
+                n_failures = audit_cli(lines=input_file, executor=executor)
+                return 0 if n_failures == 0 else 1
+
+            if args.connect is not None:
+                results = connect_batch_cli(
+                    socket_path=args.connect, method=args.method, lines=input_file
+                )
+            else:
+                results = batch_cli(method=args.method, lines=input_file, executor=executor)
+            for result in results:
+                print(result)
         return 0
     except Exception:
-        print('Got an error while processing "%s":' % name, file=sys.stderr)
+        print('Got an error while processing "%s":' % args.method, file=sys.stderr)
         traceback.print_exc()
         print(file=sys.stderr)
         return 1
@@ -17,10 +17,13 @@ import json
 import os
 import subprocess
 import sys
+import tempfile
+import time
 
 import pytest
 
-from starkware.crypto.signature.signature import pedersen_hash, sign
+from services.perpetual.public.perpetual_messages import get_price_msg
+from starkware.crypto.signature.signature import pedersen_hash, private_to_stark_key, sign, verify
 
 
 @pytest.fixture(scope="module")
@@ -144,3 +147,267 @@ def test_public_key(key_file, cli_file):
     cli_run = subprocess.run(command, shell=True, capture_output=True)
     assert b"" == cli_run.stderr
     assert bytes(public + "\n", "utf-8") == cli_run.stdout
+
+
+def test_cli_publish_prices(key_file, cli_file):
+    oracle_keys = dict(zip(["4d616b6572", "436f696e62"], list(key_file)[:2]))
+    asset_pairs = ["42544355534400000000000000000000", "45544855534400000000000000000000"]
+    prices = [
+        {"oracle": oracle, "asset": asset_pair, "price": hex(1000 + i), "time": "5f590c1e"}
+        for i, (oracle, asset_pair) in enumerate(
+            (oracle, asset_pair) for asset_pair in asset_pairs for oracle in oracle_keys
+        )
+    ]
+    with tempfile.NamedTemporaryFile("w") as prices_file:
+        json.dump({"oracle_keys": oracle_keys, "prices": prices}, prices_file)
+        prices_file.flush()
+        cli_run = subprocess.run(
+            [sys.executable, cli_file, "--method", "publish_prices", "-f", prices_file.name],
+            capture_output=True,
+        )
+    assert b"" == cli_run.stderr
+    signed_prices = json.loads(cli_run.stdout)
+    assert sorted(signed_prices) == asset_pairs
+    for asset_pair, asset_signed_prices in signed_prices.items():
+        assert len(asset_signed_prices) == len(oracle_keys)
+        signer_keys = [int(signed_price["signer_key"], 16) for signed_price in asset_signed_prices]
+        assert signer_keys == sorted(signer_keys)
+        for signed_price in asset_signed_prices:
+            signed_asset_id = int(signed_price["signed_asset_id"], 16)
+            assert signed_asset_id >> 40 == int(asset_pair, 16)
+            msg_hash = get_price_msg(
+                oracle_name=signed_asset_id % 2**40,
+                asset_pair=signed_asset_id >> 40,
+                timestamp=int(signed_price["timestamp"], 16),
+                price=int(signed_price["external_price"], 16),
+            )
+            assert verify(
+                msg_hash=msg_hash,
+                r=int(signed_price["signature_r"], 16),
+                s=int(signed_price["signature_s"], 16),
+                public_key=int(signed_price["signer_key"], 16),
+            )
+        assert {int(signed_price["signer_key"], 16) for signed_price in asset_signed_prices} == {
+            private_to_stark_key(int(private_key, 16)) for private_key in oracle_keys.values()
+        }
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_cli_batch(data_file, key_file, cli_file, workers):
+    def run_batch(method: str, lines: list) -> subprocess.CompletedProcess:
+        command = " ".join(
+            [
+                sys.executable,
+                cli_file,
+                "--method",
+                method,
+                "--batch",
+                "-",
+                "--workers",
+                str(workers),
+            ]
+        )
+        return subprocess.run(
+            command, shell=True, capture_output=True, input=bytes("\n".join(lines), "utf-8")
+        )
+
+    # Hash.
+    prices = [
+        ("4d616b6572", "42544355534400000000000000000000", hex(price), hex(time))
+        for price, time in [(0xAC9F3163AD52B000, 0x5F590C1E), (1, 2), (3, 4)]
+    ]
+    cli_run = run_batch(method="hash", lines=[" ".join(price) for price in prices])
+    assert b"" == cli_run.stderr
+    assert cli_run.stdout == bytes(
+        "".join(
+            hex(
+                pedersen_hash(
+                    0x425443555344000000000000000000004D616B6572,
+                    int(price, 16) * 2**32 + int(time, 16),
+                )
+            )[2:]
+            + "\n"
+            for _, _, price, time in prices
+        ),
+        "utf-8",
+    )
+
+    # Sign.
+    private_key = data_file["meta_data"]["party_a_order"]["private_key"]
+    msg_hashes = [data_file["meta_data"]["party_a_order"]["message_hash"], "1234", "abcd"]
+    cli_run = run_batch(
+        method="sign", lines=[f"{private_key} {msg_hash}" for msg_hash in msg_hashes]
+    )
+    assert b"" == cli_run.stderr
+    assert cli_run.stdout == bytes(
+        "".join(
+            " ".join(map(hex, sign(int(msg_hash, 16), int(private_key, 16)))) + "\n"
+            for msg_hash in msg_hashes
+        ),
+        "utf-8",
+    )
+
+    # Get public key. Empty lines are skipped.
+    keys = list(key_file.items())[:10]
+    cli_run = run_batch(method="get_public", lines=[private for private, _ in keys] + [""])
+    assert b"" == cli_run.stderr
+    assert cli_run.stdout == bytes("".join(public + "\n" for _, public in keys), "utf-8")
+
+    # An illegal line.
+    cli_run = run_batch(method="get_public", lines=[keys[0][0], keys[1][0] + " 1"])
+    assert b"line 2" in cli_run.stderr
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_cli_server(data_file, key_file, cli_file, workers):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = os.path.join(tmp_dir, "stark_cli.sock")
+        server = subprocess.Popen(
+            [sys.executable, cli_file, "--serve", socket_path, "--workers", str(workers)],
+            stderr=subprocess.PIPE,
+        )
+        try:
+            for _ in range(600):
+                if os.path.exists(socket_path):
+                    break
+                assert server.poll() is None, server.stderr.read()
+                time.sleep(0.1)
+
+            def run_client(*args, input_lines=None) -> subprocess.CompletedProcess:
+                return subprocess.run(
+                    [sys.executable, cli_file, "--connect", socket_path, *args],
+                    capture_output=True,
+                    input=None if input_lines is None else bytes("\n".join(input_lines), "utf-8"),
+                )
+
+            private_key = data_file["meta_data"]["party_a_order"]["private_key"]
+            msg_hash = data_file["meta_data"]["party_a_order"]["message_hash"]
+            r, s = sign(int(msg_hash, 16), int(private_key, 16))
+            cli_run = run_client("--method", "sign", "--key", private_key, "--data", msg_hash)
+            assert b"" == cli_run.stderr
+            assert bytes(f"{hex(r)} {hex(s)}\n", "utf-8") == cli_run.stdout
+
+            cli_run = run_client("--method", "get_public", "--key", private_key)
+            assert b"" == cli_run.stderr
+            public_key = cli_run.stdout.decode().strip()
+            if private_key in key_file:
+                assert public_key == key_file[private_key]
+
+            verify_lines = [f"{public_key} {msg_hash} {hex(r)} {hex(s)}"] * 3 + [
+                f"{public_key} {msg_hash} {hex(r)} {hex(s + 1)}"
+            ]
+            cli_run = run_client("--method", "verify", "--batch", "-", input_lines=verify_lines)
+            assert b"" == cli_run.stderr
+            assert b"true\ntrue\ntrue\nfalse\n" == cli_run.stdout
+
+            keys = list(key_file.items())[:10]
+            cli_run = run_client(
+                "--method", "get_public", "--batch", "-", input_lines=[key for key, _ in keys]
+            )
+            assert b"" == cli_run.stderr
+            assert cli_run.stdout == bytes("".join(public + "\n" for _, public in keys), "utf-8")
+
+            # The same arguments as without --connect are accepted, including the short flags.
+            cli_run = run_client("--method", "sign", "-k", private_key, "-d", msg_hash)
+            assert b"" == cli_run.stderr
+            assert bytes(f"{hex(r)} {hex(s)}\n", "utf-8") == cli_run.stdout
+            cli_run = run_client(
+                "--method",
+                "hash",
+                "-o",
+                "4d616b6572",
+                "-a",
+                "42544355534400000000000000000000",
+                "-p",
+                "ac9f3163ad52b000",
+                "-t",
+                "5f590c1e",
+            )
+            assert b"" == cli_run.stderr
+            assert cli_run.stdout == bytes(
+                hex(
+                    pedersen_hash(
+                        0x425443555344000000000000000000004D616B6572, 0xAC9F3163AD52B0005F590C1E
+                    )
+                )[2:]
+                + "\n",
+                "utf-8",
+            )
+
+            # Out of range arguments are rejected by the client.
+            cli_run = run_client("--method", "sign", "--key", private_key, "--data", "1" * 70)
+            assert b"AssertionError" in cli_run.stderr
+            assert b"JsonRpcError" not in cli_run.stderr
+        finally:
+            server.terminate()
+            server.wait()
+        # The server stops gracefully on SIGTERM, and removes its socket.
+        assert server.returncode == 0
+        assert not os.path.exists(socket_path)
+
+
+def test_cli_verify(data_file, cli_file):
+    private_key = data_file["meta_data"]["party_a_order"]["private_key"]
+    public_key = hex(private_to_stark_key(int(private_key, 16)))
+    msg_hash = data_file["meta_data"]["party_a_order"]["message_hash"]
+    r, s = sign(int(msg_hash, 16), int(private_key, 16))
+
+    for signature_s, expected_output in [(s, b"true\n"), (s + 1, b"false\n")]:
+        command = " ".join(
+            [
+                sys.executable,
+                cli_file,
+                "--method",
+                "verify",
+                "--key",
+                public_key,
+                "--data",
+                msg_hash,
+                "--r",
+                hex(r),
+                "--s",
+                hex(signature_s),
+            ]
+        )
+        cli_run = subprocess.run(command, shell=True, capture_output=True)
+        assert b"" == cli_run.stderr
+        assert expected_output == cli_run.stdout
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_cli_verify_audit(data_file, cli_file, workers):
+    private_key = data_file["meta_data"]["party_a_order"]["private_key"]
+    public_key = hex(private_to_stark_key(int(private_key, 16)))
+    lines = []
+    for i in range(1, 11):
+        r, s = sign(i, int(private_key, 16))
+        lines.append(f"{public_key} {hex(i)} {hex(r)} {hex(s)}")
+    lines[3] = lines[3].replace(public_key, "0x1234")
+    lines[7] = lines[7] + " 0x1"
+
+    with tempfile.NamedTemporaryFile("w") as signatures_file:
+        signatures_file.write("\n".join(lines))
+        signatures_file.flush()
+        cli_run = subprocess.run(
+            [sys.executable, cli_file, "--method", "verify", "--batch", signatures_file.name]
+            + ["--audit", "--workers", str(workers)],
+            capture_output=True,
+        )
+    assert b"" == cli_run.stderr
+    assert cli_run.returncode == 1
+    assert cli_run.stdout.decode().splitlines() == [
+        f"Line 4 failed (invalid signature): {lines[3]}",
+        f"Line 8 failed (AssertionError('Expected 4 arguments, got 5.')): {lines[7]}",
+        "Verified 10 signatures: 8 valid, 2 failed.",
+    ]
+
+    # --audit is rejected outside of batch mode.
+    r, s = sign(1, int(private_key, 16))
+    cli_run = subprocess.run(
+        [sys.executable, cli_file, "--method", "verify", "--audit"]
+        + ["--key", public_key, "--data", "0x1", "--r", hex(r), "--s", hex(s)],
+        capture_output=True,
+    )
+    assert cli_run.returncode == 2
+    assert b"--audit is only supported in batch mode" in cli_run.stderr
+    assert cli_run.stdout == b""
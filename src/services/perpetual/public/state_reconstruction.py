@@ -0,0 +1,386 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+"""
+Reconstruction of the positions of the perpetual system from the outputs of its batches (in rollup
+mode), by replaying the position changes of their data availability output (see
+data_availability.py), and verifying the resulting positions root against the new shared state of
+each batch.
+Snapshots of the state may be saved every few batches, so that a replay can start from the latest
+snapshot rather than from the genesis state.
+"""
+
+import collections
+import json
+import os
+import re
+import shutil
+from typing import (
+    ChainMap,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from services.perpetual.public.data_availability import (
+    BytesLike,
+    FundingIndicesInfo,
+    Page,
+    PositionChange,
+    decode_data_availability_pages,
+)
+from services.perpetual.public.position import (
+    Position,
+    PositionAsset,
+    hash_positions,
+    position_hash,
+)
+from services.perpetual.public.program_output import ROLLUP_MODE, ProgramOutput
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
+from starkware.python.merkle_node_store import OverlayNodeStore, SqliteMerkleNodeStore
+from starkware.python.sparse_merkle_tree import BatchHashFunction, SparseMerkleTree
+
+EMPTY_POSITION = Position(public_key=0, collateral_balance=0)
+SNAPSHOT_DIR_PATTERN = re.compile(r"^snapshot_(\d+)$")
+SNAPSHOT_STATE_FILE_NAME = "state.json"
+SNAPSHOT_NODES_FILE_NAME = "nodes.sqlite"
+
+
+class BatchData:
+    """
+    The outputs of a single batch: the main page of the program output (see ProgramOutput), and the
+    pages of its data availability output (each given as a Page, see data_availability.py).
+    """
+
+    __slots__ = ("batch_id", "program_output", "data_availability_pages")
+
+    def __init__(
+        self,
+        batch_id: int,
+        program_output: Union[Sequence[int], BytesLike],
+        data_availability_pages: List[Page],
+    ):
+        self.batch_id = batch_id
+        self.program_output = program_output
+        self.data_availability_pages = data_availability_pages
+
+
+class StateReconstructor:
+    """
+    Keeps the positions of the system, and their Merkle tree, as of the end of a given batch (or
+    the genesis state, before the first batch).
+    The funding indices of every funding timestamp seen so far are kept as well, as a position
+    change contains only the funding timestamp of the position, and the cached funding indices of
+    its assets are those of that timestamp.
+    """
+
+    def __init__(
+        self,
+        positions_tree_height: int,
+        snapshot_dir: Optional[str] = None,
+        snapshot_interval: Optional[int] = None,
+        batch_hash_func: Optional[BatchHashFunction] = None,
+    ):
+        """
+        If snapshot_interval is given, a snapshot is saved in snapshot_dir every snapshot_interval
+        batches. batch_hash_func, if given, is used to hash the nodes of the positions tree (see
+        SparseMerkleTree), e.g., using several processes.
+        """
+        assert snapshot_interval is None or (
+            snapshot_dir is not None and snapshot_interval > 0
+        ), "snapshot_interval must be positive, and requires snapshot_dir."
+        self.positions_tree_height = positions_tree_height
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+        self.batch_hash_func = batch_hash_func
+        self.positions: Dict[int, Position] = {}
+        # A map from a funding timestamp to the funding indices of that timestamp.
+        self.funding_indices_history: Dict[int, Dict[int, int]] = {}
+        # The id of the next batch to apply.
+        self.next_batch_id = 0
+        self.positions_tree = self.create_positions_tree(nodes=None)
+        # Positions often change several times with the same assets, so the assets hashes are
+        # shared between batches.
+        self.assets_hash_cache: Dict[tuple, int] = {}
+        self.snapshot_nodes: Optional[SqliteMerkleNodeStore] = None
+
+    def create_positions_tree(self, nodes) -> SparseMerkleTree:
+        # The leaves of the positions tree are the hashes of the positions, so an empty leaf is
+        # the hash of an empty position.
+        return SparseMerkleTree(
+            height=self.positions_tree_height,
+            hash_func=pedersen_hash,
+            empty_leaf=position_hash(EMPTY_POSITION),
+            nodes=nodes,
+            batch_hash_func=self.batch_hash_func,
+        )
+
+    @property
+    def positions_root(self) -> int:
+        return self.positions_tree.root
+
+    def close(self):
+        if self.snapshot_nodes is not None:
+            self.snapshot_nodes.close()
+            self.snapshot_nodes = None
+
+    @staticmethod
+    def add_funding_indices(
+        funding_indices_history: MutableMapping[int, Dict[int, int]],
+        funding_indices_info: FundingIndicesInfo,
+    ):
+        funding_indices_history[funding_indices_info.funding_timestamp] = (
+            funding_indices_info.funding_indices
+        )
+
+    def apply_position_change(
+        self, change: PositionChange, funding_indices_history: Mapping[int, Dict[int, int]]
+    ) -> Position:
+        """
+        Returns the new value of the changed position, where funding_indices_history is used
+        instead of the funding indices history of the state.
+        """
+        prev_position = self.positions.get(change.position_id, EMPTY_POSITION)
+        balances = {asset.asset_id: asset.balance for asset in prev_position.assets}
+        balances.update(change.asset_balances)
+        balances = {asset_id: balance for asset_id, balance in balances.items() if balance != 0}
+        funding_indices = funding_indices_history.get(change.funding_timestamp)
+        if funding_indices is None and len(balances) > 0:
+            # The position was not funded since it was last changed (e.g., a deposit), so the
+            # cached funding indices of its assets did not change.
+            assert (
+                prev_position.funding_timestamp == change.funding_timestamp
+            ), f"Unknown funding timestamp of position {change.position_id}."
+            funding_indices = {
+                asset.asset_id: asset.cached_funding_index for asset in prev_position.assets
+            }
+        assets = []
+        for asset_id, balance in sorted(balances.items()):
+            assert funding_indices is not None and (
+                asset_id in funding_indices
+            ), f"Missing funding index of asset {asset_id} in position {change.position_id}."
+            assets.append(
+                PositionAsset(
+                    asset_id=asset_id,
+                    balance=balance,
+                    cached_funding_index=funding_indices[asset_id],
+                )
+            )
+        return Position(
+            public_key=change.public_key,
+            collateral_balance=change.collateral_balance,
+            assets=assets,
+            funding_timestamp=change.funding_timestamp,
+        )
+
+    def apply_batch(self, batch: BatchData, max_n_words_per_memory_page: Optional[int] = None):
+        """
+        Applies the position changes of the given batch, and verifies that the resulting positions
+        root matches the new shared state in its program output.
+        The batch is applied atomically: if it fails, the state is not modified.
+        """
+        assert (
+            batch.batch_id == self.next_batch_id
+        ), f"Expected batch {self.next_batch_id}, got batch {batch.batch_id}."
+        program_output = ProgramOutput(batch.program_output)
+        assert (
+            program_output.data_availability_mode == ROLLUP_MODE
+        ), "Only the positions of batches in rollup mode can be reconstructed."
+        prev_shared_state = program_output.prev_shared_state
+        new_shared_state = program_output.new_shared_state
+        for shared_state in (prev_shared_state, new_shared_state):
+            assert (
+                shared_state.positions_tree_height == self.positions_tree_height
+            ), f"Unexpected positions tree height: {shared_state.positions_tree_height}."
+        assert (
+            prev_shared_state.positions_root == self.positions_root
+        ), f"Batch {batch.batch_id} does not start from the current positions root."
+        # The funding indices of the batch are added to the history only if the batch is applied.
+        funding_indices_history: ChainMap[int, Dict[int, int]] = collections.ChainMap(
+            {}, self.funding_indices_history
+        )
+        self.add_funding_indices(
+            funding_indices_history=funding_indices_history,
+            funding_indices_info=prev_shared_state.global_funding_indices,
+        )
+
+        new_positions: Dict[int, Position] = {}
+        for record in decode_data_availability_pages(
+            pages=batch.data_availability_pages,
+            max_n_words_per_memory_page=max_n_words_per_memory_page,
+        ):
+            if isinstance(record, FundingIndicesInfo):
+                self.add_funding_indices(
+                    funding_indices_history=funding_indices_history, funding_indices_info=record
+                )
+                continue
+            new_positions[record.position_id] = self.apply_position_change(
+                change=record, funding_indices_history=funding_indices_history
+            )
+        self.add_funding_indices(
+            funding_indices_history=funding_indices_history,
+            funding_indices_info=new_shared_state.global_funding_indices,
+        )
+
+        position_hashes = hash_positions(
+            new_positions.values(), assets_hash_cache=self.assets_hash_cache
+        )
+        # The positions tree is updated in a fork, which is committed only if the new root matches.
+        positions_tree = self.positions_tree.fork()
+        new_positions_root = positions_tree.update(zip(new_positions.keys(), position_hashes))
+        if new_positions_root != new_shared_state.positions_root:
+            positions_tree.discard()
+        assert new_positions_root == new_shared_state.positions_root, (
+            f"Positions root mismatch after batch {batch.batch_id}: expected "
+            f"{new_shared_state.positions_root}, got {new_positions_root}."
+        )
+        positions_tree.commit()
+        for position_id, position in new_positions.items():
+            if position == EMPTY_POSITION:
+                self.positions.pop(position_id, None)
+            else:
+                self.positions[position_id] = position
+        self.funding_indices_history.update(funding_indices_history.maps[0])
+        self.next_batch_id += 1
+
+        if self.snapshot_interval is not None and self.next_batch_id % self.snapshot_interval == 0:
+            self.save_snapshot()
+
+    def replay(
+        self, batches: Iterable[BatchData], max_n_words_per_memory_page: Optional[int] = None
+    ):
+        """
+        Applies the given batches, skipping those that were already applied (e.g., that precede the
+        snapshot the state was loaded from). Batch data is only read for the applied batches.
+        """
+        for batch in batches:
+            if batch.batch_id < self.next_batch_id:
+                continue
+            self.apply_batch(batch=batch, max_n_words_per_memory_page=max_n_words_per_memory_page)
+
+    def get_snapshot_path(self, next_batch_id: int) -> str:
+        assert self.snapshot_dir is not None, "No snapshot directory was given."
+        return os.path.join(self.snapshot_dir, f"snapshot_{next_batch_id}")
+
+    def save_snapshot(self) -> str:
+        """
+        Saves the current state, as a directory with the positions and the funding indices history
+        (in a JSON file), and the nodes of the positions tree (in a sqlite database). Returns the
+        path of the snapshot.
+        """
+        snapshot_path = self.get_snapshot_path(next_batch_id=self.next_batch_id)
+        # The snapshot is written to a temporary directory, so an interrupted write leaves no
+        # partial snapshot behind.
+        tmp_path = f"{snapshot_path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        with SqliteMerkleNodeStore(path=os.path.join(tmp_path, SNAPSHOT_NODES_FILE_NAME)) as nodes:
+            nodes.update(self.positions_tree.nodes.items())
+            nodes.commit()
+        state = {
+            "next_batch_id": self.next_batch_id,
+            "positions_tree_height": self.positions_tree_height,
+            "positions": {
+                str(position_id): [
+                    hex(position.public_key),
+                    position.collateral_balance,
+                    position.funding_timestamp,
+                    [asset.to_tuple() for asset in position.assets],
+                ]
+                for position_id, position in self.positions.items()
+            },
+            "funding_indices_history": {
+                str(funding_timestamp): {
+                    str(asset_id): index for asset_id, index in indices.items()
+                }
+                for funding_timestamp, indices in self.funding_indices_history.items()
+            },
+        }
+        with open(os.path.join(tmp_path, SNAPSHOT_STATE_FILE_NAME), "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_path, snapshot_path)
+        return snapshot_path
+
+    def get_latest_snapshot(self, max_next_batch_id: Optional[int] = None) -> Optional[int]:
+        """
+        Returns the largest next batch id of a saved snapshot (up to max_next_batch_id, if given),
+        or None if there is no such snapshot.
+        """
+        if self.snapshot_dir is None or not os.path.isdir(self.snapshot_dir):
+            return None
+        snapshot_ids = [
+            int(match.group(1))
+            for match in map(SNAPSHOT_DIR_PATTERN.match, os.listdir(self.snapshot_dir))
+            if match is not None
+        ]
+        if max_next_batch_id is not None:
+            snapshot_ids = [
+                snapshot_id for snapshot_id in snapshot_ids if snapshot_id <= max_next_batch_id
+            ]
+        return max(snapshot_ids, default=None)
+
+    def load_snapshot(self, next_batch_id: int):
+        """
+        Loads the state from the snapshot that was saved before the given batch.
+        The nodes of the positions tree are read from the snapshot database on demand, while the
+        nodes modified by the following batches are kept in memory, so the snapshot itself is never
+        modified.
+        """
+        snapshot_path = self.get_snapshot_path(next_batch_id=next_batch_id)
+        with open(os.path.join(snapshot_path, SNAPSHOT_STATE_FILE_NAME)) as state_file:
+            state = json.load(state_file)
+        assert (
+            state["positions_tree_height"] == self.positions_tree_height
+        ), "The snapshot has a different positions tree height."
+        self.positions = {
+            int(position_id): Position(
+                public_key=int(public_key, 16),
+                collateral_balance=collateral_balance,
+                assets=[PositionAsset(*asset) for asset in assets],
+                funding_timestamp=funding_timestamp,
+            )
+            for position_id, (public_key, collateral_balance, funding_timestamp, assets) in state[
+                "positions"
+            ].items()
+        }
+        self.funding_indices_history = {
+            int(funding_timestamp): {int(asset_id): index for asset_id, index in indices.items()}
+            for funding_timestamp, indices in state["funding_indices_history"].items()
+        }
+        self.close()
+        self.snapshot_nodes = SqliteMerkleNodeStore(
+            path=os.path.join(snapshot_path, SNAPSHOT_NODES_FILE_NAME)
+        )
+        self.positions_tree = self.create_positions_tree(
+            nodes=OverlayNodeStore(parent=self.snapshot_nodes)
+        )
+        self.next_batch_id = state["next_batch_id"]
+
+    def load_latest_snapshot(self, max_next_batch_id: Optional[int] = None) -> bool:
+        """
+        Loads the latest snapshot (see get_latest_snapshot), if there is one. Returns whether a
+        snapshot was loaded.
+        """
+        next_batch_id = self.get_latest_snapshot(max_next_batch_id=max_next_batch_id)
+        if next_batch_id is None:
+            return False
+        self.load_snapshot(next_batch_id=next_batch_id)
+        return True
@@ -0,0 +1,244 @@
+import os
+from typing import Dict, List
+
+import pytest
+
+from services.perpetual.public.data_availability import (
+    WORD_BYTES,
+    FundingIndicesInfo,
+    serialize_funding_indices_info,
+    serialize_position_change,
+)
+from services.perpetual.public.position import Position, PositionAsset, position_hash
+from services.perpetual.public.program_output import ROLLUP_MODE, VALIDIUM_MODE, ProgramOutput
+from services.perpetual.public.state_reconstruction import (
+    EMPTY_POSITION,
+    BatchData,
+    StateReconstructor,
+)
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
+from starkware.python.sparse_merkle_tree import SparseMerkleTree
+
+POSITIONS_TREE_HEIGHT = 8
+ASSET_A = 0x412D3130
+ASSET_B = 0x422D3130
+PUBLIC_KEY = 0x3B1E2F8A0F4C5A0E8A8B3B4B0E3F9D1A3A2F7A5E1B2C3D4E5F60718293A4B5C
+
+GENESIS_FUNDING_INDICES = FundingIndicesInfo(
+    funding_indices={ASSET_A: 0, ASSET_B: 0}, funding_timestamp=0
+)
+# For each batch, its funding ticks and the new values of its changed positions.
+BATCHES = [
+    (
+        [
+            FundingIndicesInfo(
+                funding_indices={ASSET_A: 2**32, ASSET_B: -(2**31)}, funding_timestamp=100
+            )
+        ],
+        {
+            1: Position(
+                public_key=PUBLIC_KEY,
+                collateral_balance=1000,
+                assets=[
+                    PositionAsset(asset_id=ASSET_A, balance=5, cached_funding_index=2**32),
+                    PositionAsset(asset_id=ASSET_B, balance=-3, cached_funding_index=-(2**31)),
+                ],
+                funding_timestamp=100,
+            ),
+            2: Position(public_key=PUBLIC_KEY + 1, collateral_balance=7),
+        },
+    ),
+    (
+        [FundingIndicesInfo(funding_indices={ASSET_A: 3, ASSET_B: 4}, funding_timestamp=200)],
+        {
+            # A deposit, with no funding.
+            1: Position(
+                public_key=PUBLIC_KEY,
+                collateral_balance=2000,
+                assets=[
+                    PositionAsset(asset_id=ASSET_A, balance=5, cached_funding_index=2**32),
+                    PositionAsset(asset_id=ASSET_B, balance=-3, cached_funding_index=-(2**31)),
+                ],
+                funding_timestamp=100,
+            ),
+            # A withdrawal of the entire collateral.
+            2: EMPTY_POSITION,
+            255: Position(
+                public_key=PUBLIC_KEY + 2,
+                collateral_balance=-5,
+                assets=[PositionAsset(asset_id=ASSET_B, balance=1, cached_funding_index=4)],
+                funding_timestamp=200,
+            ),
+        },
+    ),
+    (
+        [],
+        {
+            # The position is funded with the global funding indices of the previous batch.
+            1: Position(
+                public_key=PUBLIC_KEY,
+                collateral_balance=10,
+                assets=[PositionAsset(asset_id=ASSET_A, balance=6, cached_funding_index=3)],
+                funding_timestamp=200,
+            )
+        },
+    ),
+]
+
+
+def serialize_shared_state(positions_root: int, global_funding_indices: FundingIndicesInfo):
+    shared_state = (
+        [positions_root, POSITIONS_TREE_HEIGHT, 0, 64]
+        + serialize_funding_indices_info(global_funding_indices)
+        # Oracle prices and system time.
+        + [0, 1234]
+    )
+    return [len(shared_state)] + shared_state
+
+
+def build_batches(data_availability_mode: int = ROLLUP_MODE) -> List[BatchData]:
+    tree = SparseMerkleTree(
+        height=POSITIONS_TREE_HEIGHT,
+        hash_func=pedersen_hash,
+        empty_leaf=position_hash(EMPTY_POSITION),
+    )
+    positions: Dict[int, Position] = {}
+    global_funding_indices = GENESIS_FUNDING_INDICES
+    batches = []
+    for batch_id, (funding_ticks, new_positions) in enumerate(BATCHES):
+        prev_shared_state = serialize_shared_state(
+            positions_root=tree.root, global_funding_indices=global_funding_indices
+        )
+        data_availability = [len(funding_ticks)]
+        for funding_tick in funding_ticks:
+            data_availability += serialize_funding_indices_info(funding_tick)
+            global_funding_indices = funding_tick
+        for position_id, position in new_positions.items():
+            data_availability += serialize_position_change(
+                position_id=position_id,
+                prev_position=positions.get(position_id, EMPTY_POSITION),
+                new_position=position,
+            )
+            positions[position_id] = position
+        tree.update(
+            (position_id, position_hash(position))
+            for position_id, position in new_positions.items()
+        )
+        new_shared_state = serialize_shared_state(
+            positions_root=tree.root, global_funding_indices=global_funding_indices
+        )
+        program_output = (
+            [0x1234, data_availability_mode, 1, ASSET_A, 0x5678]
+            + prev_shared_state
+            + new_shared_state
+            # The minimum expiration timestamp, and no modifications, forced actions or conditions.
+            + [0, 0, 0, 0, 0]
+        )
+        # Split the data availability output into pages of 5 words, given as bytes.
+        pages = [
+            b"".join(word.to_bytes(WORD_BYTES, "big") for word in data_availability[i : i + 5])
+            for i in range(0, len(data_availability), 5)
+        ]
+        batches.append(
+            BatchData(
+                batch_id=batch_id, program_output=program_output, data_availability_pages=pages
+            )
+        )
+    return batches
+
+
+def get_expected_positions(n_batches: int) -> Dict[int, Position]:
+    positions: Dict[int, Position] = {}
+    for _, new_positions in BATCHES[:n_batches]:
+        positions.update(new_positions)
+    return {
+        position_id: position
+        for position_id, position in positions.items()
+        if position != EMPTY_POSITION
+    }
+
+
+def test_replay():
+    batches = build_batches()
+    reconstructor = StateReconstructor(positions_tree_height=POSITIONS_TREE_HEIGHT)
+    reconstructor.replay(batches, max_n_words_per_memory_page=5)
+    assert reconstructor.positions == get_expected_positions(n_batches=len(BATCHES))
+    assert reconstructor.next_batch_id == len(BATCHES)
+    assert (
+        reconstructor.positions_root
+        == ProgramOutput(batches[-1].program_output).new_shared_state.positions_root
+    )
+
+    with pytest.raises(AssertionError, match="Expected batch 3, got batch 0"):
+        reconstructor.apply_batch(batches[0])
+
+    reconstructor = StateReconstructor(positions_tree_height=POSITIONS_TREE_HEIGHT)
+    with pytest.raises(AssertionError, match="rollup mode"):
+        reconstructor.apply_batch(build_batches(data_availability_mode=VALIDIUM_MODE)[0])
+
+
+def test_positions_root_mismatch():
+    batch = build_batches()[0]
+    program_output = batch.program_output
+    assert isinstance(program_output, list)
+    # Corrupt the positions root of the previous shared state.
+    program_output[6] += 1
+    reconstructor = StateReconstructor(positions_tree_height=POSITIONS_TREE_HEIGHT)
+    with pytest.raises(AssertionError, match="does not start from the current positions root"):
+        reconstructor.apply_batch(batch)
+    program_output[6] -= 1
+
+    # Corrupt the positions root of the new shared state (which follows the previous one).
+    program_output[5 + program_output[5] + 2] += 1
+    with pytest.raises(AssertionError, match="Positions root mismatch after batch 0"):
+        reconstructor.apply_batch(batch)
+    # The failed batch did not modify the state, so it can be applied again once fixed.
+    assert reconstructor.next_batch_id == 0
+    assert reconstructor.positions == {}
+    assert reconstructor.funding_indices_history == {}
+    program_output[5 + program_output[5] + 2] -= 1
+    reconstructor.apply_batch(batch)
+    assert reconstructor.positions == get_expected_positions(n_batches=1)
+    assert (
+        reconstructor.positions_root
+        == ProgramOutput(program_output).new_shared_state.positions_root
+    )
+
+
+def test_snapshots(tmp_path):
+    snapshot_dir = str(tmp_path)
+    batches = build_batches()
+    reconstructor = StateReconstructor(
+        positions_tree_height=POSITIONS_TREE_HEIGHT, snapshot_dir=snapshot_dir, snapshot_interval=2
+    )
+    reconstructor.replay(batches)
+    assert sorted(os.listdir(snapshot_dir)) == ["snapshot_2"]
+    final_root = reconstructor.positions_root
+
+    # Start from the snapshot, so that only the last batch is applied.
+    reconstructor = StateReconstructor(
+        positions_tree_height=POSITIONS_TREE_HEIGHT, snapshot_dir=snapshot_dir
+    )
+    assert reconstructor.load_latest_snapshot()
+    assert reconstructor.next_batch_id == 2
+    assert reconstructor.positions == get_expected_positions(n_batches=2)
+    assert (
+        reconstructor.positions_root
+        == ProgramOutput(batches[1].program_output).new_shared_state.positions_root
+    )
+    reconstructor.replay(batches)
+    assert reconstructor.positions == get_expected_positions(n_batches=len(BATCHES))
+    assert reconstructor.positions_root == final_root
+    reconstructor.close()
+
+    # The snapshot was not modified by the replay.
+    reconstructor = StateReconstructor(
+        positions_tree_height=POSITIONS_TREE_HEIGHT, snapshot_dir=snapshot_dir
+    )
+    assert not reconstructor.load_latest_snapshot(max_next_batch_id=1)
+    assert reconstructor.load_latest_snapshot(max_next_batch_id=2)
+    assert (
+        reconstructor.positions_root
+        == ProgramOutput(batches[1].program_output).new_shared_state.positions_root
+    )
+    reconstructor.close()
@@ -39,9 +39,23 @@ def pedersen_hash(x: int, y: int) -> int:
     where x_low is the 248 low bits of x, x_high is the 4 high bits of x and similarly for y.
     shift_point, P_0, P_1, P_2, P_3 are constant points generated from the digits of pi.
     """
-    return (
-        HASH_SHIFT_POINT + process_single_element(x, P_0, P_1) + process_single_element(y, P_2, P_3)
-    ).x
+    return pedersen_hash_from_prefix(prefix=pedersen_hash_prefix(x), y=y)
+
+
+def pedersen_hash_prefix(x: int) -> Point:
+    """
+    Returns the part of the Pedersen hash of (x, y) that depends only on x:
+        shift_point + x_low * P_0 + x_high * P1
+    The result can be passed to pedersen_hash_from_prefix to hash x with many values of y.
+    """
+    return HASH_SHIFT_POINT + process_single_element(x, P_0, P_1)
+
+
+def pedersen_hash_from_prefix(prefix: Point, y: int) -> int:
+    """
+    Computes the Pedersen hash of (x, y), given prefix = pedersen_hash_prefix(x).
+    """
+    return (prefix + process_single_element(y, P_2, P_3)).x
 
 
 def pedersen_hash_func(x: bytes, y: bytes) -> bytes:
@@ -0,0 +1,199 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+import functools
+from typing import List, Optional, Sequence, Tuple
+
+from starkware.crypto.signature.math_utils import ECPoint
+from starkware.crypto.signature.signature import (
+    ALPHA,
+    EC_GEN,
+    EC_ORDER,
+    FIELD_PRIME,
+    ECSignature,
+    sign,
+)
+from starkware.python.math_utils import div_ceil
+
+DEFAULT_WINDOW_BITS = 8
+
+# A point on the STARK curve in Jacobian coordinates (X, Y, Z), representing the affine point
+# (X / Z**2, Y / Z**3). Z == 0 represents the point at infinity.
+JacobianPoint = Tuple[int, int, int]
+JACOBIAN_INFINITY: JacobianPoint = (1, 1, 0)
+
+
+def jacobian_double(point: JacobianPoint) -> JacobianPoint:
+    """
+    Doubles a point on the STARK curve, given in Jacobian coordinates.
+    """
+    x, y, z = point
+    if z == 0 or y == 0:
+        return JACOBIAN_INFINITY
+    yy = y * y % FIELD_PRIME
+    s = 4 * x * yy % FIELD_PRIME
+    zz = z * z % FIELD_PRIME
+    m = (3 * x * x + ALPHA * zz * zz) % FIELD_PRIME
+    new_x = (m * m - 2 * s) % FIELD_PRIME
+    new_y = (m * (s - new_x) - 8 * yy * yy) % FIELD_PRIME
+    new_z = 2 * y * z % FIELD_PRIME
+    return new_x, new_y, new_z
+
+
+def jacobian_add_affine(point1: JacobianPoint, point2: ECPoint) -> JacobianPoint:
+    """
+    Adds a point on the STARK curve in Jacobian coordinates and a point in affine coordinates.
+    The points may be equal or opposite.
+    """
+    x1, y1, z1 = point1
+    x2, y2 = point2
+    if z1 == 0:
+        return x2, y2, 1
+    z1z1 = z1 * z1 % FIELD_PRIME
+    h = (x2 * z1z1 - x1) % FIELD_PRIME
+    r = (y2 * z1 * z1z1 - y1) % FIELD_PRIME
+    if h == 0:
+        return jacobian_double(point1) if r == 0 else JACOBIAN_INFINITY
+    hh = h * h % FIELD_PRIME
+    hhh = h * hh % FIELD_PRIME
+    v = x1 * hh % FIELD_PRIME
+    new_x = (r * r - hhh - 2 * v) % FIELD_PRIME
+    new_y = (r * (v - new_x) - y1 * hhh) % FIELD_PRIME
+    new_z = z1 * h % FIELD_PRIME
+    return new_x, new_y, new_z
+
+
+def batch_inverse(values: Sequence[int]) -> List[int]:
+    """
+    Returns the inverses modulo FIELD_PRIME of the given (nonzero) values, using a single modular
+    inversion (Montgomery's trick).
+    """
+    prefix_products = []
+    product = 1
+    for value in values:
+        prefix_products.append(product)
+        product = product * value % FIELD_PRIME
+    inverse = pow(product, -1, FIELD_PRIME)
+
+    inverses = [0] * len(values)
+    for i in reversed(range(len(values))):
+        inverses[i] = inverse * prefix_products[i] % FIELD_PRIME
+        inverse = inverse * values[i] % FIELD_PRIME
+    return inverses
+
+
+def batch_to_affine(points: Sequence[JacobianPoint]) -> List[ECPoint]:
+    """
+    Converts points from Jacobian to affine coordinates, using a single modular inversion.
+    None of the points may be the point at infinity.
+    """
+    assert all(z != 0 for _, _, z in points), "Cannot convert the point at infinity."
+    affine_points = []
+    for (x, y, _), z_inverse in zip(points, batch_inverse([z for _, _, z in points])):
+        zz_inverse = z_inverse * z_inverse % FIELD_PRIME
+        affine_points.append(
+            (x * zz_inverse % FIELD_PRIME, y * zz_inverse * z_inverse % FIELD_PRIME)
+        )
+    return affine_points
+
+
+class FixedBaseTable:
+    """
+    Precomputed multiples of a fixed point on the STARK curve, which allow computing m * point with
+    one point addition per window of window_bits bits of m, and no point doublings.
+    """
+
+    def __init__(
+        self,
+        point: ECPoint,
+        window_bits: int = DEFAULT_WINDOW_BITS,
+        n_bits: int = EC_ORDER.bit_length(),
+    ):
+        assert window_bits > 0, f"window_bits must be positive. Got: {window_bits}."
+        self.window_bits = window_bits
+        self.n_windows = div_ceil(n_bits, window_bits)
+
+        # self.multiples[i][j] = (j + 1) * 2**(window_bits * i) * point, in affine coordinates.
+        self.multiples: List[List[ECPoint]] = []
+        base: ECPoint = (point[0], point[1])
+        for _ in range(self.n_windows):
+            window_multiples = [(base[0], base[1], 1)]
+            for _ in range(2**window_bits - 1):
+                window_multiples.append(jacobian_add_affine(window_multiples[-1], base))
+            # The last entry, 2**window_bits * base, is the base of the next window.
+            *affine_multiples, base = batch_to_affine(window_multiples)
+            self.multiples.append(affine_multiples)
+
+    def mult_jacobian(self, m: int) -> JacobianPoint:
+        """
+        Returns m * point in Jacobian coordinates. Assumes 0 <= m < 2**(window_bits * n_windows).
+        """
+        assert 0 <= m < 2 ** (self.window_bits * self.n_windows), "m is out of range."
+        mask = 2**self.window_bits - 1
+        result = JACOBIAN_INFINITY
+        for window_multiples in self.multiples:
+            digit = m & mask
+            if digit != 0:
+                result = jacobian_add_affine(result, window_multiples[digit - 1])
+            m >>= self.window_bits
+        return result
+
+    def mult(self, m: int) -> ECPoint:
+        """
+        Returns m * point. Assumes 0 < m < 2**(window_bits * n_windows) and that m is not a
+        multiple of the order of the point.
+        """
+        result = self.mult_jacobian(m)
+        assert result[2] != 0, "m is a multiple of the order of the point."
+        (affine_result,) = batch_to_affine([result])
+        return affine_result
+
+    def mult_batch(self, ms: Sequence[int]) -> List[ECPoint]:
+        """
+        Returns [m * point for m in ms], normalizing all the results to affine coordinates using a
+        single modular inversion. The assumptions of mult() hold for every m.
+        """
+        results = [self.mult_jacobian(m) for m in ms]
+        assert all(z != 0 for _, _, z in results), "m is a multiple of the order of the point."
+        return batch_to_affine(results)
+
+
+@functools.lru_cache(maxsize=None)
+def get_ec_gen_table() -> FixedBaseTable:
+    """
+    Returns the (lazily computed) fixed base table of EC_GEN.
+    """
+    return FixedBaseTable(point=EC_GEN)
+
+
+def fixed_base_private_to_stark_key(priv_key: int) -> int:
+    """
+    Same as signature.private_to_stark_key, using the EC_GEN fixed base table.
+    """
+    assert 0 < priv_key < EC_ORDER
+    return get_ec_gen_table().mult(priv_key)[0]
+
+
+def fixed_base_sign(msg_hash: int, priv_key: int, seed: Optional[int] = None) -> ECSignature:
+    """
+    Same as signature.sign, using the EC_GEN fixed base table.
+    """
+    return sign(
+        msg_hash=msg_hash,
+        priv_key=priv_key,
+        seed=seed,
+        ec_gen_mult_function=get_ec_gen_table().mult,
+    )
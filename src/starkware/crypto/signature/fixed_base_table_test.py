@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from starkware.crypto.signature.fixed_base_table import (
+    JACOBIAN_INFINITY,
+    FixedBaseTable,
+    batch_inverse,
+    batch_to_affine,
+    fixed_base_private_to_stark_key,
+    fixed_base_sign,
+    get_ec_gen_table,
+    jacobian_add_affine,
+)
+from starkware.crypto.signature.math_utils import ec_double, ec_mult, ec_neg
+from starkware.crypto.signature.signature import (
+    ALPHA,
+    EC_GEN,
+    EC_ORDER,
+    FIELD_PRIME,
+    private_to_stark_key,
+    sign,
+)
+from starkware.python.random_test_utils import parametrize_random_object
+
+EC_GEN_POINT = (EC_GEN[0], EC_GEN[1])
+
+
+def expected_mult(m: int):
+    return ec_mult(m, EC_GEN_POINT, ALPHA, FIELD_PRIME)
+
+
+def test_edge_scalars():
+    table = get_ec_gen_table()
+    assert table.mult_jacobian(0)[2] == 0
+    with pytest.raises(AssertionError, match="multiple of the order"):
+        table.mult(0)
+    with pytest.raises(AssertionError, match="multiple of the order"):
+        table.mult(EC_ORDER)
+    assert table.mult(1) == EC_GEN_POINT
+    assert table.mult(EC_ORDER - 1) == ec_neg(EC_GEN_POINT, FIELD_PRIME)
+    # Scalars with zero windows.
+    for m in [2**8, 2**64 + 1, 2**248, (2**250 - 1) ^ (0xFF << 16), 0xFF00FF00FF]:
+        assert table.mult(m) == expected_mult(m)
+    with pytest.raises(AssertionError, match="out of range"):
+        table.mult(2 ** (table.window_bits * table.n_windows))
+
+
+@pytest.mark.parametrize("window_bits", [1, 3, 8])
+@parametrize_random_object()
+def test_mult(random_object: random.Random, window_bits: int):
+    table = FixedBaseTable(point=EC_GEN, window_bits=window_bits)
+    ms = [random_object.randrange(1, EC_ORDER) for _ in range(5)]
+    expected = [expected_mult(m) for m in ms]
+    assert [table.mult(m) for m in ms] == expected
+    assert table.mult_batch(ms) == expected
+    assert table.mult_batch([]) == []
+    assert table.mult_batch(ms[:1]) == expected[:1]
+    with pytest.raises(AssertionError, match="multiple of the order"):
+        table.mult_batch([ms[0], 0])
+
+
+def test_jacobian_add_affine():
+    point = (EC_GEN[0], EC_GEN[1], 1)
+    minus_gen = ec_neg(EC_GEN_POINT, FIELD_PRIME)
+    assert jacobian_add_affine(JACOBIAN_INFINITY, EC_GEN_POINT) == point
+    # P + P is a doubling, and P + (-P) is the point at infinity.
+    assert batch_to_affine([jacobian_add_affine(point, EC_GEN_POINT)]) == [
+        ec_double(EC_GEN_POINT, ALPHA, FIELD_PRIME)
+    ]
+    assert jacobian_add_affine(point, minus_gen)[2] == 0
+    # The same, for a point with Z != 1.
+    triple = jacobian_add_affine(jacobian_add_affine(point, EC_GEN_POINT), EC_GEN_POINT)
+    assert triple[2] != 1
+    (affine_triple,) = batch_to_affine([triple])
+    assert affine_triple == expected_mult(3)
+    assert batch_to_affine([jacobian_add_affine(triple, affine_triple)]) == [expected_mult(6)]
+    assert jacobian_add_affine(triple, ec_neg(affine_triple, FIELD_PRIME))[2] == 0
+
+
+@parametrize_random_object()
+def test_batch_inverse(random_object: random.Random):
+    values = [random_object.randrange(1, FIELD_PRIME) for _ in range(10)]
+    assert batch_inverse(values) == [pow(value, -1, FIELD_PRIME) for value in values]
+    assert batch_inverse([]) == []
+    assert batch_to_affine([]) == []
+    with pytest.raises(AssertionError, match="point at infinity"):
+        batch_to_affine([JACOBIAN_INFINITY])
+
+
+@parametrize_random_object()
+def test_private_to_stark_key(random_object: random.Random):
+    for priv_key in [1, EC_ORDER - 1, random_object.randrange(1, EC_ORDER)]:
+        assert fixed_base_private_to_stark_key(priv_key) == private_to_stark_key(priv_key)
+    for priv_key in [0, EC_ORDER]:
+        with pytest.raises(AssertionError):
+            fixed_base_private_to_stark_key(priv_key)
+
+    msg_hash = random_object.randrange(2**250)
+    priv_key = random_object.randrange(1, EC_ORDER)
+    assert fixed_base_sign(msg_hash=msg_hash, priv_key=priv_key) == sign(
+        msg_hash=msg_hash, priv_key=priv_key
+    )
@@ -0,0 +1,199 @@
+###############################################################################
+# Copyright 2026 StarkWare Industries Ltd.                                    #
+#                                                                             #
+# Licensed under the Apache License, Version 2.0 (the "License").             #
+# You may not use this file except in compliance with the License.            #
+# You may obtain a copy of the License at                                     #
+#                                                                             #
+# https://www.starkware.co/open-source-license/                               #
+#                                                                             #
+# Unless required by applicable law or agreed to in writing,                  #
+# software distributed under the License is distributed on an "AS IS" BASIS,  #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.    #
+# See the License for the specific language governing permissions             #
+# and limitations under the License.                                          #
+###############################################################################
+
+"""
+A Python implementation of key_derivation.js: deriving private STARK keys from an Ethereum
+signature, or from a mnemonic and an account path (BIP32 on secp256k1, followed by grind_key).
+"""
+
+import hashlib
+import hmac
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from fastecdsa.curve import secp256k1
+
+from starkware.crypto.signature.fixed_base_table import get_ec_gen_table
+from starkware.crypto.signature.signature import EC_ORDER, grind_key_from_bytes
+
+ETH_SIGNATURE_LENGTH = 130
+BIP32_HARDENED_OFFSET = 2**31
+BIP39_PBKDF2_ROUNDS = 2048
+# A BIP32 node: the private key and the chain code.
+Bip32Node = Tuple[int, bytes]
+
+
+def grind_key_hex(key_seed: str, key_value_limit: int = EC_ORDER) -> int:
+    """
+    Same as grindKey in key_derivation.js: the seed is a hex string (with an optional 0x prefix),
+    and its leading zeros are part of the hashed seed.
+    """
+    hex_seed = key_seed[2:] if key_seed.startswith("0x") else key_seed
+    assert len(hex_seed) % 2 == 0, f"The seed must be a whole number of bytes: {key_seed}."
+    return grind_key_from_bytes(key_seed=bytes.fromhex(hex_seed), key_value_limit=key_value_limit)
+
+
+def get_private_key_from_eth_signature(eth_signature: str) -> int:
+    """
+    Returns a private STARK key derived from an Ethereum signature (a 130 character hex string,
+    with an optional 0x prefix), as in getPrivateKeyFromEthSignature.
+    """
+    signature = eth_signature[2:] if eth_signature.startswith("0x") else eth_signature
+    assert re.fullmatch(
+        f"[0-9a-fA-F]{{{ETH_SIGNATURE_LENGTH}}}", signature
+    ), f"Invalid Ethereum signature: {eth_signature}."
+    # Only r is used.
+    return grind_key_hex(key_seed=signature[:64])
+
+
+def get_account_path(layer: str, application: str, eth_address: str, index: int) -> str:
+    """
+    Returns the STARK key derivation path of an account, as in getAccountPath.
+    """
+    mask = 2**31 - 1
+    layer_int = int(hashlib.sha256(layer.encode()).hexdigest(), 16) & mask
+    application_int = int(hashlib.sha256(application.encode()).hexdigest(), 16) & mask
+    eth_address_int = int(eth_address, 16)
+    eth_address_int1 = eth_address_int & mask
+    eth_address_int2 = (eth_address_int >> 31) & mask
+    return (
+        f"m/2645'/{layer_int}'/{application_int}'/{eth_address_int1}'/{eth_address_int2}'/{index}"
+    )
+
+
+def mnemonic_to_seed(mnemonic: str, passphrase: str = "") -> bytes:
+    """
+    Returns the BIP39 seed of a mnemonic.
+    """
+    return hashlib.pbkdf2_hmac(
+        "sha512",
+        unicodedata.normalize("NFKD", mnemonic).encode(),
+        unicodedata.normalize("NFKD", "mnemonic" + passphrase).encode(),
+        BIP39_PBKDF2_ROUNDS,
+    )
+
+
+def parse_path(path: str) -> List[int]:
+    """
+    Returns the child indices of a BIP32 path (e.g., "m/44'/0'/1"), where hardened indices are
+    offset by BIP32_HARDENED_OFFSET.
+    """
+    elements = path.split("/")
+    assert elements[0] == "m", f"Invalid path: {path}."
+    indices = []
+    for element in elements[1:]:
+        hardened = element.endswith("'")
+        index = int(element[:-1] if hardened else element)
+        assert 0 <= index < BIP32_HARDENED_OFFSET, f"Invalid path: {path}."
+        indices.append(index + BIP32_HARDENED_OFFSET if hardened else index)
+    return indices
+
+
+def get_master_node(seed: bytes) -> Bip32Node:
+    digest = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+    key = int.from_bytes(digest[:32], "big")
+    assert 0 < key < secp256k1.q, "Invalid master key."
+    return key, digest[32:]
+
+
+def get_child_node(node: Bip32Node, index: int) -> Bip32Node:
+    """
+    Returns the child of a BIP32 node (private key derivation).
+    """
+    key, chain_code = node
+    if index >= BIP32_HARDENED_OFFSET:
+        data = b"\x00" + key.to_bytes(32, "big")
+    else:
+        point = key * secp256k1.G
+        data = bytes([2 + (point.y & 1)]) + point.x.to_bytes(32, "big")
+    digest = hmac.new(chain_code, data + index.to_bytes(4, "big"), hashlib.sha512).digest()
+    tweak = int.from_bytes(digest[:32], "big")
+    child_key = (tweak + key) % secp256k1.q
+    assert tweak < secp256k1.q and child_key != 0, f"Invalid child key at index {index}."
+    return child_key, digest[32:]
+
+
+class KeyDeriver:
+    """
+    Derives private STARK keys from a mnemonic and account paths, as in getKeyPairFromPath.
+    The BIP39 seed is computed once, and the BIP32 nodes of the path prefixes are cached, so that
+    deriving the keys of many accounts that share a path prefix (e.g., all the indices of an
+    Ethereum address) costs a single derivation step per account.
+    """
+
+    def __init__(self, mnemonic: str):
+        self.nodes: Dict[Tuple[int, ...], Bip32Node] = {
+            (): get_master_node(seed=mnemonic_to_seed(mnemonic=mnemonic))
+        }
+
+    def get_node(self, indices: Tuple[int, ...]) -> Bip32Node:
+        node = self.nodes.get(indices)
+        if node is None:
+            node = get_child_node(node=self.get_node(indices=indices[:-1]), index=indices[-1])
+            # Only the inner nodes are shared between paths.
+            if len(indices) > 0 and indices[-1] >= BIP32_HARDENED_OFFSET:
+                self.nodes[indices] = node
+        return node
+
+    def get_private_key(self, path: str) -> int:
+        key, _ = self.get_node(indices=tuple(parse_path(path=path)))
+        # Like the JS implementation, grind the key as a 32-byte hex string (including leading
+        # zeros).
+        return grind_key_hex(key_seed=key.to_bytes(32, "big").hex())
+
+    def get_private_keys(self, paths: Iterable[str]) -> List[int]:
+        return [self.get_private_key(path=path) for path in paths]
+
+
+def get_private_key_from_path(mnemonic: str, path: str) -> int:
+    """
+    Returns the private STARK key derived from a mnemonic and a path, as in getKeyPairFromPath.
+    """
+    return KeyDeriver(mnemonic=mnemonic).get_private_key(path=path)
+
+
+def get_stark_keys(private_keys: Sequence[int]) -> List[int]:
+    """
+    Returns the public STARK keys of the given private keys, using the EC_GEN fixed base table and
+    a single modular inversion for all the keys.
+    """
+    return [x for x, _ in get_ec_gen_table().mult_batch(private_keys)]
+
+
+def get_key_pairs_from_eth_signatures(
+    eth_signatures: Sequence[str],
+) -> List[Tuple[int, int]]:
+    """
+    Returns the (private key, public key) STARK key pairs derived from the given Ethereum
+    signatures. The private keys are derived first, and the public keys are then computed in a
+    single batch.
+    """
+    private_keys = [
+        get_private_key_from_eth_signature(eth_signature=eth_signature)
+        for eth_signature in eth_signatures
+    ]
+    return list(zip(private_keys, get_stark_keys(private_keys=private_keys)))
+
+
+def get_key_pairs_from_paths(mnemonic: str, paths: Sequence[str]) -> List[Tuple[int, int]]:
+    """
+    Returns the (private key, public key) STARK key pairs derived from a mnemonic and the given
+    paths. The BIP32 derivation shares the common path prefixes, and the public keys are computed
+    in a single batch.
+    """
+    private_keys = KeyDeriver(mnemonic=mnemonic).get_private_keys(paths=paths)
+    return list(zip(private_keys, get_stark_keys(private_keys=private_keys)))
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+from starkware.crypto.signature.key_derivation import (
+    get_account_path,
+    get_key_pairs_from_eth_signatures,
+    get_key_pairs_from_paths,
+    get_private_key_from_eth_signature,
+    get_private_key_from_path,
+    get_stark_keys,
+    grind_key_hex,
+)
+from starkware.crypto.signature.signature import EC_ORDER, grind_key, private_to_stark_key
+
+# The test vectors of key_derivation.spec.js.
+LAYER = "starkex"
+APPLICATION = "starkdeployement"
+MNEMONIC = (
+    "range mountain blast problem vibrant void vivid doctor cluster enough melody salt layer "
+    "language laptop boat major space monkey unit glimpse pause change vibrant"
+)
+ETH_ADDRESS = "0xa4864d977b944315389d1765ffa7e66F74ee8cd7"
+EXPECTED_PRIVATE_KEYS = {
+    0: 0x06CF0A8BF113352EB863157A45C5E5567ABB34F8D32CDDAFD2C22AA803F4892C,
+    7: 0x0341751BDC42841DA35AB74D13A1372C1F0250617E8A2EF96034D9F46E6847AF,
+    598: 0x041A4D591A868353D28B7947EB132AA4D00C4A022743689FFD20A3628D6CA28C,
+}
+ETH_SIGNATURE = (
+    "0x21fbf0696d5e0aa2ef41a2b4ffb623bcaf070461d61cf7251c74161f82fec3a43"
+    "70854bc0a34b3ab487c1bc021cd318c734c51ae29374f2beb0e6f2dd49b4bf41c"
+)
+
+
+@pytest.fixture(scope="module")
+def key_file() -> dict:
+    json_file = os.path.join(os.path.dirname(__file__), "src", "config", "keys_precomputed.json")
+    return json.load(open(json_file))
+
+
+def test_get_private_key_from_path():
+    paths = {
+        index: get_account_path(
+            layer=LAYER, application=APPLICATION, eth_address=ETH_ADDRESS, index=index
+        )
+        for index in EXPECTED_PRIVATE_KEYS
+    }
+    assert paths[7] == "m/2645'/579218131'/891216374'/1961790679'/2135936222'/7"
+    for index, path in paths.items():
+        assert (
+            get_private_key_from_path(mnemonic=MNEMONIC, path=path) == EXPECTED_PRIVATE_KEYS[index]
+        )
+
+    key_pairs = get_key_pairs_from_paths(mnemonic=MNEMONIC, paths=list(paths.values()))
+    assert key_pairs == [
+        (private_key, private_to_stark_key(private_key))
+        for private_key in EXPECTED_PRIVATE_KEYS.values()
+    ]
+
+
+def test_grind_key_hex():
+    seed = "86F3E7293141F20A8BAFF320E8EE4ACCB9D4A4BF2B4D295E8CEE784DB46E0519"
+    expected_key = 0x5C8C8683596C732541A59E03007B2D30DBBBB873556FE65B5FB63C16688F941
+    assert grind_key_hex(key_seed=seed) == expected_key
+    assert grind_key(int(seed, 16), EC_ORDER) == expected_key
+    # Unlike grind_key, leading zeros are part of the seed.
+    assert grind_key_hex(key_seed="0x00" + seed) != expected_key
+
+
+def test_get_private_key_from_eth_signature():
+    expected_key = 0x766F11E90CD7C7B43085B56DA35C781F8C067AC0D578EABDCEEBC4886435BDA
+    assert get_private_key_from_eth_signature(eth_signature=ETH_SIGNATURE) == expected_key
+    assert (
+        get_key_pairs_from_eth_signatures(eth_signatures=[ETH_SIGNATURE] * 2)
+        == [(expected_key, private_to_stark_key(expected_key))] * 2
+    )
+
+    with pytest.raises(AssertionError, match="Invalid Ethereum signature"):
+        get_private_key_from_eth_signature(eth_signature=ETH_SIGNATURE[:-1])
+
+
+def test_get_stark_keys(key_file: dict):
+    private_keys = [int(private_key, 16) for private_key in key_file]
+    assert [hex(stark_key) for stark_key in get_stark_keys(private_keys=private_keys)] == list(
+        key_file.values()
+    )
@@ -20,7 +20,7 @@ import json
 import math
 import os
 import secrets
-from typing import Optional, Tuple, Union
+from typing import Callable, Optional, Tuple, Union
 
 from ecdsa.rfc6979 import generate_k
 
@@ -134,7 +134,14 @@ def generate_k_rfc6979(msg_hash: int, priv_key: int, seed: Optional[int] = None)
     )
 
 
-def sign(msg_hash: int, priv_key: int, seed: Optional[int] = None) -> ECSignature:
+def sign(
+    msg_hash: int,
+    priv_key: int,
+    seed: Optional[int] = None,
+    ec_gen_mult_function: Callable[[int], ECPoint] = private_key_to_ec_point_on_stark_curve,
+) -> ECSignature:
+    # ec_gen_mult_function(k) computes k * EC_GEN. It can be replaced by a faster implementation,
+    # e.g., one that uses precomputed multiples of EC_GEN.
     # Note: msg_hash must be smaller than 2**N_ELEMENT_BITS_ECDSA.
     # Message whose hash is >= 2**N_ELEMENT_BITS_ECDSA cannot be signed.
     # This happens with a very small probability.
@@ -152,7 +159,7 @@ def sign(msg_hash: int, priv_key: int, seed: Optional[int] = None) -> ECSignatur
             seed += 1
 
         # Cannot fail because 0 < k < EC_ORDER and EC_ORDER is prime.
-        x = ec_mult(k, EC_GEN, ALPHA, FIELD_PRIME)[0]
+        x = ec_gen_mult_function(k)[0]
 
         # DIFF: in classic ECDSA, we take int(x) % n.
         r = int(x)
@@ -260,7 +267,7 @@ def verify(msg_hash: int, r: int, s: int, public_key: Union[int, ECPoint]) -> bo
     return r == x
 
 
-def grind_key(key_seed: int, key_value_limit: int) -> int:  # type: ignore[return]
+def grind_key(key_seed: int, key_value_limit: int) -> int:
     """
     Given a cryptographically-secure seed and a limit, deterministically generates a pseudorandom
     key in the range [0, limit).
@@ -268,21 +275,30 @@ def grind_key(key_seed: int, key_value_limit: int) -> int:  # type: ignore[retur
     it may be vulnerable to side-channel attacks); this function is not recommended for use with key
     generation on mainnet.
     """
+    return grind_key_from_bytes(key_seed=to_bytes_no_pad(key_seed), key_value_limit=key_value_limit)
+
+
+def to_bytes_no_pad(x: int) -> bytes:
+    # To conform with the JS implementation, convert integer to bytes using minimal amount of
+    # bytes possible. We would like 0.to_bytes() to be b'\x00', so a minimal length of 1 is
+    # enforced.
+    return x.to_bytes(length=max(1, div_ceil(x.bit_length(), 8)), byteorder="big", signed=False)
+
+
+def grind_key_from_bytes(key_seed: bytes, key_value_limit: int) -> int:  # type: ignore[return]
+    """
+    Same as grind_key, where the seed is given as bytes. This matches the JS implementation
+    (grindKey in key_derivation.js) for seeds given as hex strings with leading zeros.
+    """
     # Simply taking a uniform value in [0, 2**256) and returning the result modulo key_value_limit
     # is not necessarily uniform on [0, key_value_limit). We define max_allowed_value to be a
     # multiple of the limit, so that a uniform sample of [0, max_allowed_value) mod key_value_limit
     # is uniform on [0, key_value_limit).
     max_allowed_value = 2**256 - (2**256 % key_value_limit)
 
-    def to_bytes_no_pad(x: int) -> bytes:
-        # To conform with the JS implementation, convert integer to bytes using minimal amount of
-        # bytes possible. We would like 0.to_bytes() to be b'\x00', so a minimal length of 1 is
-        # enforced.
-        return x.to_bytes(length=max(1, div_ceil(x.bit_length(), 8)), byteorder="big", signed=False)
-
     # Increment the index (salt) until the hash value falls in the range [0, max_allowed_value).
     for index in itertools.count():
-        hash_input = to_bytes_no_pad(key_seed) + to_bytes_no_pad(index)
+        hash_input = key_seed + to_bytes_no_pad(index)
         key = int(hashlib.sha256(hash_input).hexdigest(), 16)
         if key < max_allowed_value:
             return key % key_value_limit
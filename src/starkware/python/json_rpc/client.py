@@ -3,7 +3,10 @@ JSON-RPC client implementation.
 """
 
 import json
-from typing import Any, Dict
+import socket
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from starkware.python.json_rpc.common import JSON_RPC_VERSION, JsonRpcError
 
 
 class JsonRpcMethod:
@@ -11,20 +14,30 @@ class JsonRpcMethod:
     Represents a JSON-RPC method that can be called to generate a JSON-RPC request.
     """
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, request_id: Optional[int] = None):
         self.name = name
+        self.request_id = request_id
 
-    def call(self, *args, **kwargs) -> str:
+    def to_dict(self, **kwargs) -> Dict[str, Any]:
         """
-        Returns a JSON-RPC call.
+        Returns a JSON-RPC call, as a dict.
         """
-        assert len(args) == 0, "JSON-RPC call can only contain named arguments."
-
-        call_dict: Dict[str, Any] = {"jsonrpc": "2.0", "method": self.name, "id": None}
+        call_dict: Dict[str, Any] = {
+            "jsonrpc": JSON_RPC_VERSION,
+            "method": self.name,
+            "id": self.request_id,
+        }
         if len(kwargs) != 0:
             call_dict["params"] = kwargs
 
-        return json.dumps(call_dict)
+        return call_dict
+
+    def call(self, *args, **kwargs) -> str:
+        """
+        Returns a JSON-RPC call.
+        """
+        assert len(args) == 0, "JSON-RPC call can only contain named arguments."
+        return json.dumps(self.to_dict(**kwargs))
 
 
 class JsonRpcEncoder:
@@ -34,3 +47,71 @@ class JsonRpcEncoder:
 
     def __getattr__(self, name: str) -> JsonRpcMethod:
         return JsonRpcMethod(name=name)
+
+
+def get_result(response: Dict[str, Any]) -> Any:
+    """
+    Returns the result of a JSON-RPC response, or raises a JsonRpcError if it is an error.
+    """
+    if "error" in response:
+        raise JsonRpcError(code=response["error"]["code"], message=response["error"]["message"])
+    return response["result"]
+
+
+class JsonRpcUnixClient:
+    """
+    A blocking JSON-RPC client over a Unix socket, for a server that reads newline-delimited
+    requests (see server.JsonRpcServer).
+    """
+
+    def __init__(self, path: str):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.file = self.socket.makefile("rwb")
+        self.next_request_id = 0
+
+    def __enter__(self) -> "JsonRpcUnixClient":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def send(self, request: Any) -> Any:
+        self.file.write(json.dumps(request).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        assert len(line) > 0, "The connection was closed by the server."
+        return json.loads(line)
+
+    def get_request_id(self) -> int:
+        self.next_request_id += 1
+        return self.next_request_id
+
+    def call(self, method: str, **params) -> Any:
+        """
+        Calls a method with the given named parameters, and returns its result.
+        """
+        request = JsonRpcMethod(name=method, request_id=self.get_request_id()).to_dict(**params)
+        return get_result(response=self.send(request=request))
+
+    def call_batch(self, calls: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Calls the given (method, named parameters) pairs in a single batch request, and returns
+        their results, in order. Raises a JsonRpcError if any of the calls failed.
+        """
+        if len(calls) == 0:
+            return []
+        requests = [
+            JsonRpcMethod(name=method, request_id=self.get_request_id()).to_dict(**params)
+            for method, params in calls
+        ]
+        responses = self.send(request=requests)
+        if isinstance(responses, dict):
+            # The whole batch was rejected.
+            get_result(response=responses)
+        responses_by_id = {response["id"]: response for response in responses}
+        return [get_result(response=responses_by_id[request["id"]]) for request in requests]
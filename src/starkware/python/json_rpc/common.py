@@ -0,0 +1,28 @@
+"""
+JSON-RPC definitions shared by the client and the server.
+"""
+
+JSON_RPC_VERSION = "2.0"
+
+# Error codes defined by the JSON-RPC 2.0 specification.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# An error raised by the called method.
+SERVER_ERROR = -32000
+
+
+class JsonRpcError(Exception):
+    """
+    An error returned in a JSON-RPC response.
+    """
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"JSON-RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+
+    def to_dict(self) -> dict:
+        return {"code": self.code, "message": self.message}
@@ -0,0 +1,147 @@
+"""
+JSON-RPC server implementation.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from starkware.python.json_rpc.common import (
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    JSON_RPC_VERSION,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    SERVER_ERROR,
+    JsonRpcError,
+)
+
+# The maximal length of a single request line (a batch request is sent in a single line).
+MAX_REQUEST_LENGTH = 2**26
+
+
+class JsonRpcServer:
+    """
+    A JSON-RPC 2.0 server over newline-delimited JSON streams (e.g., a Unix socket).
+
+    Every line is a request or a batch request, and the response is written as a single line.
+    Requests on the same connection (and the requests of a batch) are handled concurrently, so
+    responses may be written out of order; clients match them by id.
+
+    Methods may be coroutine functions or regular functions. Regular functions are run on the
+    given executor (or on the event loop thread, if no executor is given).
+    """
+
+    def __init__(self, methods: Dict[str, Callable[..., Any]], executor: Optional[Executor] = None):
+        self.methods = methods
+        self.executor = executor
+
+    async def call_method(self, name: str, params: Any) -> Any:
+        if not isinstance(name, str) or name not in self.methods:
+            raise JsonRpcError(code=METHOD_NOT_FOUND, message=f"Method not found: {name}.")
+        method = self.methods[name]
+
+        args: List[Any] = []
+        kwargs: Dict[str, Any] = {}
+        if isinstance(params, list):
+            args = params
+        elif isinstance(params, dict):
+            kwargs = params
+        elif params is not None:
+            raise JsonRpcError(code=INVALID_REQUEST, message="params must be an array or object.")
+        try:
+            inspect.signature(method).bind(*args, **kwargs)
+        except TypeError as exception:
+            raise JsonRpcError(code=INVALID_PARAMS, message=str(exception))
+
+        if inspect.iscoroutinefunction(method):
+            return await method(*args, **kwargs)
+        if self.executor is None:
+            return method(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(method, *args, **kwargs)
+        )
+
+    async def handle_single_request(self, request: Any) -> Optional[dict]:
+        """
+        Handles a single (already parsed) request. Returns None for notifications.
+        """
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or request.get("jsonrpc") != JSON_RPC_VERSION:
+                raise JsonRpcError(code=INVALID_REQUEST, message="Invalid request.")
+            result = await self.call_method(
+                name=request.get("method"), params=request.get("params")
+            )
+            response = {"jsonrpc": JSON_RPC_VERSION, "result": result, "id": request_id}
+        except JsonRpcError as error:
+            response = {"jsonrpc": JSON_RPC_VERSION, "error": error.to_dict(), "id": request_id}
+        except Exception as exception:
+            response = {
+                "jsonrpc": JSON_RPC_VERSION,
+                "error": JsonRpcError(code=SERVER_ERROR, message=repr(exception)).to_dict(),
+                "id": request_id,
+            }
+
+        if isinstance(request, dict) and "id" not in request:
+            # A notification.
+            return None
+        return response
+
+    async def handle_request(self, request_str: str) -> Optional[str]:
+        """
+        Handles a request or a batch request, and returns the response (or None if there is
+        nothing to respond).
+        """
+        try:
+            request = json.loads(request_str)
+        except ValueError as exception:
+            error = JsonRpcError(code=PARSE_ERROR, message=str(exception))
+            return json.dumps({"jsonrpc": JSON_RPC_VERSION, "error": error.to_dict(), "id": None})
+
+        if not isinstance(request, list):
+            response = await self.handle_single_request(request=request)
+            return None if response is None else json.dumps(response)
+
+        if len(request) == 0:
+            error = JsonRpcError(code=INVALID_REQUEST, message="Empty batch request.")
+            return json.dumps({"jsonrpc": JSON_RPC_VERSION, "error": error.to_dict(), "id": None})
+        responses = await asyncio.gather(
+            *(self.handle_single_request(request=single_request) for single_request in request)
+        )
+        responses = [response for response in responses if response is not None]
+        return None if len(responses) == 0 else json.dumps(responses)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        tasks: Set[asyncio.Task] = set()
+
+        async def respond(line: bytes):
+            response = await self.handle_request(request_str=line.decode())
+            if response is not None:
+                writer.write(response.encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if len(line) == 0:
+                    break
+                if len(line.strip()) == 0:
+                    continue
+                task = asyncio.create_task(respond(line=line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def start_unix_server(self, path: str) -> asyncio.AbstractServer:
+        """
+        Starts serving on a Unix socket at the given path.
+        """
+        return await asyncio.start_unix_server(
+            self.handle_connection, path=path, limit=MAX_REQUEST_LENGTH
+        )
@@ -0,0 +1,110 @@
+"""
+JSON-RPC server test.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import pytest
+
+from starkware.python.json_rpc.client import JsonRpcUnixClient
+from starkware.python.json_rpc.common import (
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    SERVER_ERROR,
+    JsonRpcError,
+)
+from starkware.python.json_rpc.server import JsonRpcServer
+
+
+def add(x: int, y: int = 0) -> int:
+    return x + y
+
+
+async def async_div(x: int, y: int) -> int:
+    await asyncio.sleep(0)
+    return x // y
+
+
+@pytest.fixture
+def server() -> JsonRpcServer:
+    return JsonRpcServer(methods={"add": add, "div": async_div})
+
+
+@pytest.mark.asyncio
+async def test_handle_request(server: JsonRpcServer):
+    async def handle(request) -> object:
+        response = await server.handle_request(request_str=json.dumps(request))
+        return None if response is None else json.loads(response)
+
+    assert await handle(
+        {"jsonrpc": "2.0", "method": "add", "params": {"x": 1, "y": 2}, "id": 7}
+    ) == {
+        "jsonrpc": "2.0",
+        "result": 3,
+        "id": 7,
+    }
+    assert (await handle({"jsonrpc": "2.0", "method": "div", "params": [7, 2], "id": 1}))[
+        "result"
+    ] == 3
+    # Notifications have no response.
+    assert await handle({"jsonrpc": "2.0", "method": "add", "params": {"x": 1}}) is None
+
+    def error_code(response: dict) -> int:
+        return response["error"]["code"]
+
+    assert (
+        error_code(await handle({"jsonrpc": "2.0", "method": "mul", "id": 1})) == METHOD_NOT_FOUND
+    )
+    assert (
+        error_code(await handle({"jsonrpc": "2.0", "method": "add", "params": {"z": 1}, "id": 1}))
+        == INVALID_PARAMS
+    )
+    assert (
+        error_code(await handle({"jsonrpc": "2.0", "method": "div", "params": [1, 0], "id": 1}))
+        == SERVER_ERROR
+    )
+    assert error_code(await handle({"method": "add", "id": 1})) == INVALID_REQUEST
+    assert error_code(await handle([])) == INVALID_REQUEST
+    assert error_code(json.loads(await server.handle_request(request_str="{"))) == PARSE_ERROR
+
+    # Batch request.
+    assert await handle(
+        [
+            {"jsonrpc": "2.0", "method": "add", "params": {"x": 1, "y": 2}, "id": 1},
+            {"jsonrpc": "2.0", "method": "add", "params": {"x": 1}},
+            {"jsonrpc": "2.0", "method": "mul", "id": 2},
+        ]
+    ) == [
+        {"jsonrpc": "2.0", "result": 3, "id": 1},
+        {
+            "jsonrpc": "2.0",
+            "error": {"code": METHOD_NOT_FOUND, "message": "Method not found: mul."},
+            "id": 2,
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unix_socket(server: JsonRpcServer):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "server.sock")
+        unix_server = await server.start_unix_server(path=path)
+
+        def run_client():
+            with JsonRpcUnixClient(path=path) as client:
+                assert client.call("add", x=1, y=2) == 3
+                assert client.call_batch([("add", {"x": i}) for i in range(100)]) == list(
+                    range(100)
+                )
+                with pytest.raises(JsonRpcError, match="ZeroDivisionError"):
+                    client.call("div", x=1, y=0)
+                with pytest.raises(JsonRpcError, match="Method not found"):
+                    client.call_batch([("add", {"x": 1}), ("mul", {})])
+
+        async with unix_server:
+            await asyncio.gather(*(asyncio.to_thread(run_client) for _ in range(3)))
@@ -0,0 +1,207 @@
+import collections
+import sqlite3
+from typing import Dict, Iterator, MutableMapping, Optional
+
+# Node values are stored as VALUE_BYTES big-endian bytes.
+VALUE_BYTES = 32
+DEFAULT_CACHE_SIZE = 2**20
+
+
+def encode_node_index(node_index: int) -> bytes:
+    # Node indices may exceed the range of a sqlite integer (e.g., 2**65 for a tree of height 64).
+    # As node indices are positive, the minimal big-endian encoding is unique.
+    assert node_index > 0, f"Invalid node index: {node_index}."
+    return node_index.to_bytes((node_index.bit_length() + 7) // 8, "big")
+
+
+class SqliteMerkleNodeStore(MutableMapping[int, int]):
+    """
+    A persistent node store for SparseMerkleTree, kept in a sqlite database file, so that a tree
+    can be reopened without rehashing it.
+    Writes are kept in memory until commit() writes all of them in a single transaction (or
+    discard() drops them); hence, commit() should be called after every batch of updates.
+    Reads are served from the pending writes, then from an LRU cache of up to cache_size nodes, and
+    only then from the database.
+    """
+
+    def __init__(
+        self, path: str, table_name: str = "merkle_nodes", cache_size: int = DEFAULT_CACHE_SIZE
+    ):
+        assert table_name.isidentifier(), f"Invalid table name: {table_name}."
+        assert cache_size > 0, f"Invalid cache size: {cache_size}."
+        self.table_name = table_name
+        self.cache_size = cache_size
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table_name} "
+                "(node_index BLOB PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID"
+            )
+        # A map from a node index to its new value, or None if the node was deleted.
+        self.pending_writes: Dict[int, Optional[int]] = {}
+        self.cache: "collections.OrderedDict[int, Optional[int]]" = collections.OrderedDict()
+
+    def __enter__(self) -> "SqliteMerkleNodeStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Closes the database. Pending writes that were not committed are lost.
+        """
+        self.connection.close()
+
+    def commit(self):
+        """
+        Writes all the pending writes to the database, in a single transaction.
+        """
+        if len(self.pending_writes) == 0:
+            return
+        with self.connection:
+            self.connection.executemany(
+                f"DELETE FROM {self.table_name} WHERE node_index = ?",
+                [
+                    (encode_node_index(node_index),)
+                    for node_index, value in self.pending_writes.items()
+                    if value is None
+                ],
+            )
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table_name} (node_index, value) VALUES (?, ?)",
+                [
+                    (encode_node_index(node_index), value.to_bytes(VALUE_BYTES, "big"))
+                    for node_index, value in self.pending_writes.items()
+                    if value is not None
+                ],
+            )
+        for node_index, value in self.pending_writes.items():
+            self._cache_node(node_index=node_index, value=value)
+        self.pending_writes.clear()
+
+    def discard(self):
+        """
+        Drops all the pending writes.
+        """
+        self.pending_writes.clear()
+
+    def _cache_node(self, node_index: int, value: Optional[int]):
+        if node_index in self.cache:
+            self.cache.move_to_end(node_index)
+        self.cache[node_index] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _read_node(self, node_index: int) -> Optional[int]:
+        if node_index in self.pending_writes:
+            return self.pending_writes[node_index]
+        if node_index in self.cache:
+            self.cache.move_to_end(node_index)
+            return self.cache[node_index]
+        row = self.connection.execute(
+            f"SELECT value FROM {self.table_name} WHERE node_index = ?",
+            (encode_node_index(node_index),),
+        ).fetchone()
+        value = None if row is None else int.from_bytes(row[0], "big")
+        # Missing nodes are cached as well, as most nodes of a sparse tree are missing.
+        self._cache_node(node_index=node_index, value=value)
+        return value
+
+    def get(self, node_index: int, default: Optional[int] = None) -> Optional[int]:  # type: ignore
+        # Overrides MutableMapping.get, which is implemented by catching the KeyError of
+        # __getitem__, as most nodes of a sparse tree are missing.
+        value = self._read_node(node_index=node_index)
+        return default if value is None else value
+
+    def __getitem__(self, node_index: int) -> int:
+        value = self._read_node(node_index=node_index)
+        if value is None:
+            raise KeyError(node_index)
+        return value
+
+    def __setitem__(self, node_index: int, value: int):
+        assert 0 <= value < 2 ** (8 * VALUE_BYTES), f"Node value out of range: {value}."
+        self.pending_writes[node_index] = value
+
+    def __delitem__(self, node_index: int):
+        if self._read_node(node_index=node_index) is None:
+            raise KeyError(node_index)
+        self.pending_writes[node_index] = None
+
+    def __iter__(self) -> Iterator[int]:
+        for (encoded_node_index,) in self.connection.execute(
+            f"SELECT node_index FROM {self.table_name}"
+        ):
+            node_index = int.from_bytes(encoded_node_index, "big")
+            if node_index not in self.pending_writes:
+                yield node_index
+        for node_index, value in list(self.pending_writes.items()):
+            if value is not None:
+                yield node_index
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class OverlayNodeStore(MutableMapping[int, int]):
+    """
+    A copy-on-write view of a parent node store: reads fall through to the parent, while writes are
+    kept in the overlay until commit() applies them to the parent (or discard() drops them).
+    Hence, creating an overlay takes O(1), and its memory usage is proportional to the number of
+    nodes written to it.
+    """
+
+    def __init__(self, parent: MutableMapping[int, int]):
+        self.parent = parent
+        # A map from a node index to its new value, or None if the node was deleted.
+        self.changes: Dict[int, Optional[int]] = {}
+
+    def commit(self):
+        """
+        Applies the changes to the parent store.
+        """
+        for node_index, value in self.changes.items():
+            if value is None:
+                self.parent.pop(node_index, None)
+            else:
+                self.parent[node_index] = value
+        self.changes.clear()
+
+    def discard(self):
+        """
+        Drops the changes.
+        """
+        self.changes.clear()
+
+    def get(self, node_index: int, default: Optional[int] = None) -> Optional[int]:  # type: ignore
+        if node_index in self.changes:
+            value = self.changes[node_index]
+            return default if value is None else value
+        return self.parent.get(node_index, default)
+
+    def __getitem__(self, node_index: int) -> int:
+        value = self.get(node_index)
+        if value is None:
+            raise KeyError(node_index)
+        return value
+
+    def __setitem__(self, node_index: int, value: int):
+        self.changes[node_index] = value
+
+    def __delitem__(self, node_index: int):
+        if self.get(node_index) is None:
+            raise KeyError(node_index)
+        self.changes[node_index] = None
+
+    def __iter__(self) -> Iterator[int]:
+        for node_index in self.parent:
+            if node_index not in self.changes:
+                yield node_index
+        for node_index, value in self.changes.items():
+            if value is not None:
+                yield node_index
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -0,0 +1,62 @@
+import os
+import random
+
+import pytest
+
+from starkware.python.merkle_node_store import SqliteMerkleNodeStore
+from starkware.python.merkle_tree_test_utils import hash_func
+from starkware.python.random_test_utils import parametrize_random_object
+from starkware.python.sparse_merkle_tree import SparseMerkleTree
+
+HEIGHT = 64
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return os.path.join(tmp_path, "nodes.sqlite")
+
+
+def test_node_store(db_path: str):
+    with SqliteMerkleNodeStore(path=db_path) as store:
+        store[2**65] = 1
+        store[1] = 2**256 - 1
+        assert dict(store) == {2**65: 1, 1: 2**256 - 1}
+        store.commit()
+        del store[1]
+        assert store.get(1) is None
+        with pytest.raises(KeyError):
+            del store[1]
+        store.discard()
+        assert store[1] == 2**256 - 1
+        del store[1]
+        store.commit()
+        assert dict(store) == {2**65: 1}
+        store[3] = 3
+
+    # Uncommitted writes are lost.
+    with SqliteMerkleNodeStore(path=db_path) as store:
+        assert dict(store) == {2**65: 1}
+        with pytest.raises(AssertionError, match="out of range"):
+            store[2] = 2**256
+
+
+@parametrize_random_object()
+def test_persistent_tree(db_path: str, random_object: random.Random):
+    memory_tree = SparseMerkleTree(height=HEIGHT, hash_func=hash_func)
+    # A tiny cache, to test that evicted nodes are read back from the database.
+    with SqliteMerkleNodeStore(path=db_path, cache_size=8) as store:
+        tree = SparseMerkleTree(height=HEIGHT, hash_func=hash_func, nodes=store)
+        for _ in range(5):
+            modifications = [
+                (random_object.randrange(2**HEIGHT), random_object.choice([0, 1, 2]))
+                for _ in range(5)
+            ] + [(3, random_object.randrange(3))]
+            assert tree.update(modifications) == memory_tree.update(modifications)
+            store.commit()
+        root = tree.root
+
+    # Cold start, without rehashing.
+    with SqliteMerkleNodeStore(path=db_path) as store:
+        tree = SparseMerkleTree(height=HEIGHT, hash_func=hash_func, nodes=store)
+        assert tree.root == root
+        assert dict(store) == memory_tree.nodes
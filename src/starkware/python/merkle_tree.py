@@ -1,4 +1,20 @@
-from typing import Any, Collection, Tuple
+import bisect
+from typing import Any, Collection, Iterator, List, Tuple
+
+
+def get_sorted_modifications(
+    height: int, modifications: Collection[Tuple[int, Any]]
+) -> Tuple[List[int], List[Any]]:
+    """
+    Returns the modified leaf indices in ascending order, and the corresponding modifications.
+    The last modification to an index is preferred.
+    """
+    last_modifications = dict(modifications)
+    leaf_indices = sorted(last_modifications)
+    assert (
+        0 <= leaf_indices[0] and leaf_indices[-1] < 2**height
+    ), f"Leaf index out of range for a tree of height {height}."
+    return leaf_indices, [last_modifications[index] for index in leaf_indices]
 
 
 def build_update_tree(height, modifications: Collection[Tuple[int, Any]]):
@@ -14,16 +30,119 @@ def build_update_tree(height, modifications: Collection[Tuple[int, Any]]):
     if len(modifications) == 0:
         return None
 
-    # A layer is a dictionary from index in current merkle layer (0 to 2**layer_height) to a tree.
-    # A tree is either None, a leaf, or a pair of trees.
-    layer = dict(modifications)
-
+    # A layer is a pair of parallel lists: the indices in the current merkle layer (0 to
+    # 2**layer_height), in ascending order, and the corresponding trees. The parents of a layer are
+    # found in a single pass, as siblings are adjacent.
+    indices, nodes = get_sorted_modifications(height=height, modifications=modifications)
     for _ in range(height):
-        parents = set(index // 2 for index in layer.keys())
-        layer = {index: (layer.get(index * 2), layer.get(index * 2 + 1)) for index in parents}
-    assert len(layer) == 1
+        parent_indices: List[int] = []
+        parent_nodes: List[Any] = []
+        i = 0
+        n_nodes = len(indices)
+        while i < n_nodes:
+            index = indices[i]
+            if index & 1 == 1:
+                parent_nodes.append((None, nodes[i]))
+                i += 1
+            elif i + 1 < n_nodes and indices[i + 1] == index + 1:
+                parent_nodes.append((nodes[i], nodes[i + 1]))
+                i += 2
+            else:
+                parent_nodes.append((nodes[i], None))
+                i += 1
+            parent_indices.append(index >> 1)
+        indices, nodes = parent_indices, parent_nodes
+    assert len(nodes) == 1
     # We reached layer_height=0, the top layer with only the root (with index 0).
-    return layer[0]
+    return nodes[0]
+
+
+class UpdateTreeNode:
+    """
+    A node of an update tree (see build_update_tree) of height at least 1, whose children are
+    constructed only when accessed. Behaves like the pair (left_child, right_child), so it can be
+    passed to decode_node.
+    Holds a slice of the sorted modified leaf indices (and modifications) of the whole tree,
+    which are shared by all the nodes.
+    """
+
+    __slots__ = ("leaf_indices", "leaf_modifications", "height", "index", "start", "end")
+
+    def __init__(
+        self,
+        leaf_indices: List[int],
+        leaf_modifications: List[Any],
+        height: int,
+        index: int,
+        start: int,
+        end: int,
+    ):
+        self.leaf_indices = leaf_indices
+        self.leaf_modifications = leaf_modifications
+        # The height of the node above the leaves, and its index in its layer.
+        self.height = height
+        self.index = index
+        # The slice of leaf_indices of the leaves below the node.
+        self.start = start
+        self.end = end
+
+    def _get_child(self, index: int, start: int, end: int):
+        if start == end:
+            return None
+        if self.height == 1:
+            return self.leaf_modifications[start]
+        return UpdateTreeNode(
+            leaf_indices=self.leaf_indices,
+            leaf_modifications=self.leaf_modifications,
+            height=self.height - 1,
+            index=index,
+            start=start,
+            end=end,
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        # The index of the leftmost leaf below the right child.
+        middle_leaf_index = (2 * self.index + 1) << (self.height - 1)
+        middle = bisect.bisect_left(self.leaf_indices, middle_leaf_index, self.start, self.end)
+        yield self._get_child(index=2 * self.index, start=self.start, end=middle)
+        yield self._get_child(index=2 * self.index + 1, start=middle, end=self.end)
+
+    def __len__(self) -> int:
+        return 2
+
+    def __getitem__(self, i: int):
+        return tuple(self)[i]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (tuple, UpdateTreeNode)):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return repr(tuple(self))
+
+
+def build_lazy_update_tree(height, modifications: Collection[Tuple[int, Any]]):
+    """
+    Same as build_update_tree, except that the pairs of trees are UpdateTreeNode instances, which
+    construct their children only when accessed. The memory usage is linear in the number of
+    modifications, regardless of the height, and a node is constructed only when it is visited.
+    """
+    if len(modifications) == 0:
+        return None
+    leaf_indices, leaf_modifications = get_sorted_modifications(
+        height=height, modifications=modifications
+    )
+    if height == 0:
+        return leaf_modifications[0]
+    return UpdateTreeNode(
+        leaf_indices=leaf_indices,
+        leaf_modifications=leaf_modifications,
+        height=height,
+        index=0,
+        start=0,
+        end=len(leaf_indices),
+    )
 
 
 def decode_node(node):
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from starkware.python.merkle_tree import (
+    UpdateTreeNode,
+    build_lazy_update_tree,
+    build_update_tree,
+    decode_node,
+)
+from starkware.python.random_test_utils import parametrize_random_object
+
+
+def build_update_tree_reference(height, modifications):
+    """
+    A straightforward construction of the tree induced by the modifications, layer by layer.
+    """
+    if len(modifications) == 0:
+        return None
+    layer = dict(modifications)
+    for _ in range(height):
+        parents = set(index // 2 for index in layer.keys())
+        layer = {index: (layer.get(index * 2), layer.get(index * 2 + 1)) for index in parents}
+    assert len(layer) == 1
+    return layer[0]
+
+
+@pytest.mark.parametrize("build", [build_update_tree, build_lazy_update_tree])
+@parametrize_random_object()
+def test_build_update_tree(build, random_object: random.Random):
+    for height in [0, 1, 2, 5, 64]:
+        n_modifications = random_object.randrange(1, 50)
+        modifications = [
+            (random_object.randrange(min(2**height, 40)), random_object.randrange(100))
+            for _ in range(n_modifications)
+        ] + [(2**height - 1, "last")]
+        assert build(height, modifications) == build_update_tree_reference(height, modifications)
+
+    assert build(10, []) is None
+    with pytest.raises(AssertionError, match="Leaf index out of range"):
+        build(2, [(4, 1)])
+
+
+def test_decode_lazy_node():
+    tree = build_lazy_update_tree(3, [(5, "a"), (1, "b"), (0, "c"), (1, "d")])
+    assert isinstance(tree, UpdateTreeNode)
+    left_child, right_child, case = decode_node(tree)
+    assert case == "both"
+    assert left_child == (("c", "d"), None)
+    assert right_child == ((None, "a"), None)
+    left_grandchild, right_grandchild, case = decode_node(right_child)
+    assert (left_grandchild, right_grandchild, case) == ((None, "a"), None, "left")
+    assert decode_node(left_grandchild) == (None, "a", "right")
+    assert tree[1][0][1] == "a"
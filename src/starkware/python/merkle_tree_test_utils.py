@@ -0,0 +1,9 @@
+import hashlib
+
+
+def hash_func(x: int, y: int) -> int:
+    """
+    A fast hash function for Merkle tree tests (the Pedersen hash is too slow for large trees).
+    """
+    digest = hashlib.sha256(x.to_bytes(32, "big") + y.to_bytes(32, "big")).digest()
+    return int.from_bytes(digest, "big") % 2**251
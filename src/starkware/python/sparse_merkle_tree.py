@@ -0,0 +1,395 @@
+import concurrent.futures
+import copy
+import functools
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
+
+from starkware.python.merkle_node_store import OverlayNodeStore
+
+HashFunction = Callable[[int, int], int]
+# A function that hashes a list of pairs, e.g., using several processes.
+BatchHashFunction = Callable[[List[Tuple[int, int]]], List[int]]
+# A map from the value of a node to the values of its children.
+Preimage = Dict[int, Tuple[int, int]]
+
+
+def get_empty_subtree_hashes(height: int, hash_func: HashFunction, empty_leaf: int) -> List[int]:
+    """
+    Returns a list whose i-th element is the root of an empty subtree of height i (a subtree whose
+    leaves are all empty_leaf), for 0 <= i <= height.
+    """
+    empty_hashes = [empty_leaf]
+    for _ in range(height):
+        empty_hashes.append(hash_func(empty_hashes[-1], empty_hashes[-1]))
+    return empty_hashes
+
+
+class SparseMerkleTree:
+    """
+    A binary Merkle tree of a given height, where most of the leaves are empty.
+
+    Nodes are identified by their heap index: the root is 1, and the children of node i are 2 * i
+    and 2 * i + 1. Hence, leaf i is node 2**height + i, and a node at height h (where the leaves
+    are at height 0) with index i in its layer is node 2**(height - h) + i.
+    Only nodes whose value differs from the root of an empty subtree of the same height are kept
+    in the node store, so the memory usage is proportional to the number of non-empty leaves
+    times the height, and not to the number of leaves.
+    """
+
+    def __init__(
+        self,
+        height: int,
+        hash_func: HashFunction,
+        empty_leaf: int = 0,
+        nodes: Optional[MutableMapping[int, int]] = None,
+        batch_hash_func: Optional[BatchHashFunction] = None,
+    ):
+        """
+        Constructs a tree whose node values are taken from nodes (a mapping from a node index to its
+        value, where missing nodes are empty), or an empty tree if nodes is None.
+        If batch_hash_func is given, it is used to hash the nodes of each layer of an update.
+        """
+        assert height >= 0, f"Invalid tree height: {height}."
+        self.height = height
+        self.hash_func = hash_func
+        self.batch_hash_func = batch_hash_func
+        self.empty_hashes = get_empty_subtree_hashes(
+            height=height, hash_func=hash_func, empty_leaf=empty_leaf
+        )
+        self.nodes: MutableMapping[int, int] = {} if nodes is None else nodes
+        # The tree this tree was forked from (see fork()), if any.
+        self.parent: Optional["SparseMerkleTree"] = None
+        # The number of modifications of the tree (incremented by every update and commit), and
+        # that of the parent when this tree was forked from it.
+        self.generation = 0
+        self.parent_generation = 0
+
+    @property
+    def n_leaves(self) -> int:
+        return 2**self.height
+
+    @property
+    def root(self) -> int:
+        return self.get_node(node_index=1)
+
+    def get_node_height(self, node_index: int) -> int:
+        return self.height + 1 - node_index.bit_length()
+
+    def get_node(self, node_index: int) -> int:
+        """
+        Returns the value of the given node.
+        """
+        self.assert_not_stale()
+        return self._read_node(node_index=node_index)
+
+    def _read_node(self, node_index: int) -> int:
+        # Same as get_node, without the staleness check (which update_layers does once).
+        value = self.nodes.get(node_index)
+        if value is None:
+            return self.empty_hashes[self.get_node_height(node_index=node_index)]
+        return value
+
+    def get_leaf(self, index: int) -> int:
+        assert 0 <= index < self.n_leaves, f"Leaf index out of range: {index}."
+        return self.get_node(node_index=self.n_leaves + index)
+
+    def set_node(self, node_index: int, height: int, value: int):
+        if value == self.empty_hashes[height]:
+            self.nodes.pop(node_index, None)
+        else:
+            self.nodes[node_index] = value
+
+    def update(
+        self, modifications: Iterable[Tuple[int, int]], preimage: Optional[Preimage] = None
+    ) -> int:
+        """
+        Applies a batch of leaf modifications, given as (leaf index, new value) pairs, where a later
+        modification of a leaf overrides an earlier one. Returns the new root.
+        Only the ancestors of the modified leaves are rehashed, layer by layer, so that an ancestor
+        shared by several modified leaves is hashed once.
+        If preimage is given, the preimages of the previous and new values of the ancestors of the
+        modified leaves are added to it. These are exactly the preimages that the merkle_multi_update
+        hints read when applying the same modifications (see get_merkle_facts): for every node on
+        the update paths, the hint reads both preimage[prev_root] and preimage[new_root], to fill
+        the inputs of the hash builtin instances that it checks. A single preimage may be shared by
+        several trees.
+        """
+        # A map from the node index of each modified node in the current layer to its value.
+        layer: Dict[int, int] = {}
+        for index, value in modifications:
+            assert 0 <= index < self.n_leaves, f"Leaf index out of range: {index}."
+            layer[self.n_leaves + index] = value
+        if len(layer) == 0:
+            return self.root
+        return self.update_layers(layer=layer, layer_height=0, preimage=preimage)
+
+    def update_layers(
+        self, layer: Dict[int, int], layer_height: int, preimage: Optional[Preimage] = None
+    ) -> int:
+        """
+        Sets the values of the given nodes (a map from a node index to its value), which are all at
+        height layer_height, and rehashes their ancestors. Returns the new root.
+        The preimages of the modified ancestors are added to preimage, if given (see update()).
+        """
+        self.assert_not_stale()
+        self.generation += 1
+        # The previous values of the modified nodes of the layer below (when preimage is given).
+        prev_children: Dict[int, int] = {}
+        for height in range(layer_height, self.height + 1):
+            if preimage is not None:
+                prev_values = {
+                    node_index: self._read_node(node_index=node_index) for node_index in layer
+                }
+                if height > layer_height:
+                    for node_index, prev_value in prev_values.items():
+                        # The children of the node were already written, except for those that were
+                        # not modified.
+                        preimage[prev_value] = (
+                            self._get_prev_node(
+                                node_index=2 * node_index, prev_values=prev_children
+                            ),
+                            self._get_prev_node(
+                                node_index=2 * node_index + 1, prev_values=prev_children
+                            ),
+                        )
+                prev_children = prev_values
+            for node_index, value in layer.items():
+                self.set_node(node_index=node_index, height=height, value=value)
+            if height == self.height:
+                break
+            # The modified nodes of this layer were already written, so both children of each parent
+            # are read from the node store.
+            parent_indices = sorted(set(node_index // 2 for node_index in layer))
+            pairs = [
+                (
+                    self._read_node(node_index=2 * parent_index),
+                    self._read_node(node_index=2 * parent_index + 1),
+                )
+                for parent_index in parent_indices
+            ]
+            parent_values = self.hash_batch(pairs)
+            if preimage is not None:
+                preimage.update(zip(parent_values, pairs))
+            layer = dict(zip(parent_indices, parent_values))
+        return self.root
+
+    def _get_prev_node(self, node_index: int, prev_values: Dict[int, int]) -> int:
+        if node_index in prev_values:
+            return prev_values[node_index]
+        return self._read_node(node_index=node_index)
+
+    def fork(self) -> "SparseMerkleTree":
+        """
+        Returns a copy of the tree, in O(1). The nodes of the tree are shared with the fork, while
+        the nodes modified in the fork are kept in it, until commit() applies them to this tree or
+        discard() drops them. Forks can be forked as well.
+        A fork becomes stale (and can no longer be used, even for reads) once the tree it was forked
+        from is modified, e.g., by committing another fork of it.
+        """
+        fork = copy.copy(self)
+        fork.nodes = OverlayNodeStore(parent=self.nodes)
+        fork.parent = self
+        fork.generation = 0
+        fork.parent_generation = self.generation
+        return fork
+
+    def assert_not_stale(self):
+        if self.parent is not None:
+            self.parent.assert_not_stale()
+            assert (
+                self.parent.generation == self.parent_generation
+            ), "The tree was modified after this fork was created."
+
+    def commit(self):
+        """
+        Applies the modifications of a fork to the tree it was forked from, and empties the fork.
+        """
+        assert self.parent is not None, "Only a fork can be committed."
+        assert isinstance(self.nodes, OverlayNodeStore)
+        self.assert_not_stale()
+        self.nodes.commit()
+        self.parent.generation += 1
+        self.parent_generation = self.parent.generation
+
+    def discard(self):
+        """
+        Drops the modifications of a fork, which is then identical to the tree it was forked from.
+        """
+        assert self.parent is not None, "Only a fork can be discarded."
+        assert isinstance(self.nodes, OverlayNodeStore)
+        self.assert_not_stale()
+        self.nodes.discard()
+
+    def hash_batch(self, pairs: List[Tuple[int, int]]) -> List[int]:
+        return hash_batch(
+            pairs=pairs, hash_func=self.hash_func, batch_hash_func=self.batch_hash_func
+        )
+
+    def get_multi_proof(self, leaf_indices: Iterable[int]) -> Iterator[Tuple[int, int]]:
+        """
+        Yields a proof of the values of the given leaves: the (node index, value) pairs of the
+        siblings of their ancestors (and of the leaves themselves) which are not ancestors of the
+        given leaves, layer by layer from the bottom, in ascending order within each layer.
+        Siblings that are roots of empty subtrees are omitted, as the verifier knows their values.
+        Each node is yielded at most once, regardless of the number of leaves that share it.
+        """
+        layer = sorted(set(self.n_leaves + index for index in leaf_indices))
+        assert len(layer) > 0, "No leaves to prove."
+        assert (
+            self.n_leaves <= layer[0] and layer[-1] < 2 * self.n_leaves
+        ), "Leaf index out of range."
+        for height in range(self.height):
+            layer_set = set(layer)
+            for node_index in layer:
+                sibling_index = node_index ^ 1
+                if sibling_index in layer_set:
+                    continue
+                value = self.get_node(node_index=sibling_index)
+                if value != self.empty_hashes[height]:
+                    yield sibling_index, value
+            # The parents of a sorted layer are sorted, and equal parents are adjacent.
+            parents: List[int] = []
+            for node_index in layer:
+                if len(parents) == 0 or parents[-1] != node_index // 2:
+                    parents.append(node_index // 2)
+            layer = parents
+
+
+def compute_subtree_nodes(
+    leaves: List[Tuple[int, int]], height: int, hash_func: HashFunction, empty_leaf: int
+) -> Dict[int, int]:
+    """
+    Returns the non-empty nodes of a tree of the given height with the given (leaf index, value)
+    pairs, by heap index.
+    """
+    tree = SparseMerkleTree(height=height, hash_func=hash_func, empty_leaf=empty_leaf)
+    tree.update(modifications=leaves)
+    return dict(tree.nodes)
+
+
+def build_tree_in_parallel(
+    height: int,
+    hash_func: HashFunction,
+    modifications: Collection[Tuple[int, int]],
+    executor: concurrent.futures.Executor,
+    n_partition_bits: int,
+    empty_leaf: int = 0,
+    nodes: Optional[MutableMapping[int, int]] = None,
+) -> SparseMerkleTree:
+    """
+    Builds a tree from scratch, given its non-empty leaves as (leaf index, value) pairs (where a
+    later pair overrides an earlier one, as in build_update_tree).
+    The leaves are partitioned into 2**n_partition_bits subtrees by the top n_partition_bits bits of
+    their indices. Each non-empty subtree is built by the executor, and the top n_partition_bits
+    layers are then hashed in the calling process.
+    Note that hash_func must be picklable when using a ProcessPoolExecutor.
+    """
+    assert 0 <= n_partition_bits <= height, f"Invalid number of partition bits: {n_partition_bits}."
+    subtree_height = height - n_partition_bits
+    subtree_leaves: Dict[int, List[Tuple[int, int]]] = {}
+    for index, value in modifications:
+        assert 0 <= index < 2**height, f"Leaf index out of range: {index}."
+        subtree_leaves.setdefault(index >> subtree_height, []).append(
+            (index & (2**subtree_height - 1), value)
+        )
+
+    tree = SparseMerkleTree(height=height, hash_func=hash_func, empty_leaf=empty_leaf, nodes=nodes)
+    assert len(tree.nodes) == 0, "The node store must be empty."
+    subtree_indices = sorted(subtree_leaves)
+    all_subtree_nodes = executor.map(
+        functools.partial(
+            compute_subtree_nodes, height=subtree_height, hash_func=hash_func, empty_leaf=empty_leaf
+        ),
+        [subtree_leaves[subtree_index] for subtree_index in subtree_indices],
+    )
+    subtree_roots: Dict[int, int] = {}
+    for subtree_index, subtree_nodes in zip(subtree_indices, all_subtree_nodes):
+        # The root of the subtree is node 2**n_partition_bits + subtree_index of the tree, and a
+        # node at depth d in the subtree is at depth n_partition_bits + d in the tree.
+        subtree_root_index = 2**n_partition_bits + subtree_index
+        for node_index, value in subtree_nodes.items():
+            depth = node_index.bit_length() - 1
+            tree.nodes[(subtree_root_index << depth) + node_index - 2**depth] = value
+        subtree_roots[subtree_root_index] = subtree_nodes.get(1, tree.empty_hashes[subtree_height])
+    if len(subtree_roots) > 0:
+        tree.update_layers(layer=subtree_roots, layer_height=subtree_height)
+    return tree
+
+
+def get_merkle_facts(preimage: Preimage) -> Dict[str, List[int]]:
+    """
+    Returns the given preimage in the format of the merkle_facts program input (a map from the
+    decimal string of the value of a node to the values of its children).
+    """
+    return {str(value): list(children) for value, children in preimage.items()}
+
+
+def hash_batch(
+    pairs: List[Tuple[int, int]],
+    hash_func: HashFunction,
+    batch_hash_func: Optional[BatchHashFunction] = None,
+) -> List[int]:
+    if batch_hash_func is not None:
+        return batch_hash_func(pairs)
+    return [hash_func(x, y) for x, y in pairs]
+
+
+def verify_multi_proof(
+    height: int,
+    hash_func: HashFunction,
+    root: int,
+    leaves: Iterable[Tuple[int, int]],
+    proof: Iterable[Tuple[int, int]],
+    empty_leaf: int = 0,
+    batch_hash_func: Optional[BatchHashFunction] = None,
+) -> bool:
+    """
+    Verifies a proof generated by SparseMerkleTree.get_multi_proof for the given (leaf index, value)
+    pairs, against the given root. The proof is consumed as a stream, layer by layer, and the nodes
+    of each layer are hashed in a single batch.
+    """
+    n_leaves = 2**height
+    empty_hashes = get_empty_subtree_hashes(
+        height=height, hash_func=hash_func, empty_leaf=empty_leaf
+    )
+    layer: Dict[int, int] = {}
+    for index, value in leaves:
+        assert 0 <= index < n_leaves, f"Leaf index out of range: {index}."
+        if layer.setdefault(n_leaves + index, value) != value:
+            # Contradicting leaf values.
+            return False
+    assert len(layer) > 0, "No leaves to prove."
+
+    proof_iterator = iter(proof)
+    next_proof_node = next(proof_iterator, None)
+    for height_below in range(height):
+        parent_indices = sorted(set(node_index // 2 for node_index in layer))
+        pairs = []
+        for parent_index in parent_indices:
+            children = []
+            for child_index in (2 * parent_index, 2 * parent_index + 1):
+                if child_index in layer:
+                    children.append(layer[child_index])
+                elif next_proof_node is not None and next_proof_node[0] == child_index:
+                    children.append(next_proof_node[1])
+                    next_proof_node = next(proof_iterator, None)
+                else:
+                    children.append(empty_hashes[height_below])
+            pairs.append((children[0], children[1]))
+        layer = dict(
+            zip(
+                parent_indices,
+                hash_batch(pairs=pairs, hash_func=hash_func, batch_hash_func=batch_hash_func),
+            )
+        )
+    # The whole proof must be used.
+    return next_proof_node is None and layer[1] == root
@@ -0,0 +1,295 @@
+import concurrent.futures
+import random
+from typing import List, Tuple
+
+import pytest
+
+from starkware.python.merkle_tree import build_update_tree, decode_node
+from starkware.python.merkle_tree_test_utils import hash_func
+from starkware.python.random_test_utils import parametrize_random_object
+from starkware.python.sparse_merkle_tree import (
+    SparseMerkleTree,
+    build_tree_in_parallel,
+    get_empty_subtree_hashes,
+    get_merkle_facts,
+    verify_multi_proof,
+)
+
+
+def naive_root(leaves: List[int]) -> int:
+    layer = leaves
+    while len(layer) > 1:
+        layer = [hash_func(layer[i], layer[i + 1]) for i in range(0, len(layer), 2)]
+    return layer[0]
+
+
+def test_empty_tree():
+    empty_hashes = get_empty_subtree_hashes(height=3, hash_func=hash_func, empty_leaf=5)
+    assert empty_hashes[0] == 5
+    assert empty_hashes[3] == naive_root([5] * 8)
+    tree = SparseMerkleTree(height=3, hash_func=hash_func, empty_leaf=5)
+    assert tree.root == empty_hashes[3]
+    assert tree.update([]) == tree.root
+    assert len(tree.nodes) == 0
+
+
+@parametrize_random_object()
+def test_update(random_object: random.Random):
+    height = 5
+    tree = SparseMerkleTree(height=height, hash_func=hash_func)
+    leaves = [0] * 2**height
+    for _ in range(10):
+        modifications = [
+            (
+                random_object.randrange(2**height),
+                random_object.choice([0, random_object.getrandbits(250)]),
+            )
+            for _ in range(random_object.randrange(1, 10))
+        ]
+        for index, value in modifications:
+            leaves[index] = value
+        assert tree.update(modifications) == naive_root(leaves)
+        assert [tree.get_leaf(index) for index in range(2**height)] == leaves
+
+    # Clearing all the leaves leaves no stored nodes.
+    assert tree.update((index, 0) for index in range(2**height)) == tree.empty_hashes[height]
+    assert len(tree.nodes) == 0
+
+
+def test_update_high_tree():
+    height = 64
+    hash_calls = []
+
+    def counting_hash_func(x: int, y: int) -> int:
+        hash_calls.append((x, y))
+        return hash_func(x, y)
+
+    tree = SparseMerkleTree(height=height, hash_func=counting_hash_func)
+    hash_calls.clear()
+    # Two adjacent leaves, and a far leaf.
+    modifications = [(2**63, 1), (2**63 + 1, 2), (0, 3), (0, 4)]
+    root = tree.update(modifications)
+    # The parent of the adjacent leaves is hashed once, and the root is hashed once.
+    assert len(hash_calls) == 2 * height - 1
+    assert tree.get_leaf(0) == 4
+
+    # Compute the root directly.
+    right_subtree = hash_func(1, 2)
+    left_subtree = 4
+    for height_below in range(1, height - 1):
+        right_subtree = hash_func(right_subtree, tree.empty_hashes[height_below])
+    for height_below in range(0, height - 1):
+        left_subtree = hash_func(left_subtree, tree.empty_hashes[height_below])
+    assert root == hash_func(left_subtree, right_subtree)
+    # The 3 leaves, 2 * (height - 1) inner nodes and the root.
+    assert len(tree.nodes) == 3 + 2 * (height - 1) + 1
+
+    with pytest.raises(AssertionError, match="Leaf index out of range"):
+        tree.update([(2**height, 1)])
+
+
+@parametrize_random_object()
+def test_multi_proof(random_object: random.Random):
+    height = 8
+    batch_sizes = []
+
+    def batch_hash_func(pairs: List[Tuple[int, int]]) -> List[int]:
+        batch_sizes.append(len(pairs))
+        return [hash_func(x, y) for x, y in pairs]
+
+    tree = SparseMerkleTree(height=height, hash_func=hash_func, batch_hash_func=batch_hash_func)
+    tree.update(
+        (random_object.randrange(2**height), random_object.getrandbits(250)) for _ in range(50)
+    )
+    assert len(batch_sizes) == height
+
+    for n_leaves in [1, 2, 10, 2**height]:
+        leaf_indices = random_object.sample(range(2**height), n_leaves)
+        leaves = [(index, tree.get_leaf(index)) for index in leaf_indices]
+        proof = list(tree.get_multi_proof(leaf_indices=leaf_indices))
+
+        # The proof consists of the non-empty siblings of the paths, excluding the paths.
+        paths = {(2**height + index) >> i for index in leaf_indices for i in range(height + 1)}
+        expected_proof_nodes = {node_index ^ 1 for node_index in paths if node_index > 1} - paths
+        assert [node_index for node_index, _ in proof] == sorted(
+            (node_index for node_index in expected_proof_nodes if node_index in tree.nodes),
+            key=lambda node_index: (-node_index.bit_length(), node_index),
+        )
+
+        def verify(leaves, proof) -> bool:
+            return verify_multi_proof(
+                height=height, hash_func=hash_func, root=tree.root, leaves=leaves, proof=proof
+            )
+
+        assert verify(leaves=leaves, proof=iter(proof))
+        bad_leaves = [(leaf_indices[0], leaves[0][1] + 1)] + leaves[1:]
+        assert not verify(leaves=bad_leaves, proof=proof)
+        if len(proof) > 0:
+            assert not verify(leaves=leaves, proof=proof[:-1])
+            assert not verify(leaves=leaves, proof=proof + proof[-1:])
+            node_index, value = proof[0]
+            assert not verify(leaves=leaves, proof=[(node_index, value + 1)] + proof[1:])
+
+
+def test_multi_proof_high_tree():
+    height = 64
+    tree = SparseMerkleTree(height=height, hash_func=hash_func)
+    tree.update([(0, 1), (1, 2), (2**63, 3), (2**64 - 1, 4)])
+    # All the siblings of the paths in the left half of the tree are empty (leaf 2**62 is empty as
+    # well), so the proof consists of the root of the right half.
+    proof = list(tree.get_multi_proof(leaf_indices=[0, 1, 2**62]))
+    right_half_index = 3
+    assert proof == [(right_half_index, tree.get_node(node_index=right_half_index))]
+    assert verify_multi_proof(
+        height=height,
+        hash_func=hash_func,
+        root=tree.root,
+        leaves=[(0, 1), (1, 2), (2**62, 0)],
+        proof=proof,
+    )
+
+
+@pytest.mark.parametrize("height, n_partition_bits", [(10, 0), (10, 3), (10, 10), (64, 4)])
+@parametrize_random_object()
+def test_build_tree_in_parallel(height: int, n_partition_bits: int, random_object: random.Random):
+    modifications = [
+        (
+            random_object.randrange(2**height),
+            random_object.choice([0, random_object.getrandbits(8)]),
+        )
+        for _ in range(100)
+    ]
+    expected_tree = SparseMerkleTree(height=height, hash_func=hash_func)
+    expected_tree.update(modifications)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        tree = build_tree_in_parallel(
+            height=height,
+            hash_func=hash_func,
+            modifications=modifications,
+            executor=executor,
+            n_partition_bits=n_partition_bits,
+        )
+    assert tree.root == expected_tree.root
+    assert tree.nodes == expected_tree.nodes
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        tree = build_tree_in_parallel(
+            height=height,
+            hash_func=hash_func,
+            modifications=[],
+            executor=executor,
+            n_partition_bits=n_partition_bits,
+        )
+    assert tree.root == expected_tree.empty_hashes[height]
+
+
+def test_fork():
+    height = 64
+    tree = SparseMerkleTree(height=height, hash_func=hash_func)
+    tree.update([(0, 1), (2**63, 2)])
+    root = tree.root
+    nodes = dict(tree.nodes)
+
+    fork = tree.fork()
+    fork.update([(1, 3)])
+    # The fork holds only the modified path.
+    assert len(fork.nodes.changes) == height + 1
+    assert tree.root == root and tree.nodes == nodes
+    assert fork.get_leaf(1) == 3 and fork.get_leaf(2**63) == 2
+    expected_tree = SparseMerkleTree(height=height, hash_func=hash_func)
+    expected_tree.update([(0, 1), (2**63, 2), (1, 3)])
+    assert fork.root == expected_tree.root
+
+    # Nested forks.
+    nested_fork = fork.fork()
+    nested_fork.update([(2**63, 0)])
+    assert nested_fork.get_leaf(1) == 3 and nested_fork.get_leaf(2**63) == 0
+    assert fork.root == expected_tree.root
+    nested_fork.discard()
+    assert nested_fork.root == fork.root
+    nested_fork.update([(0, 0)])
+    nested_fork.commit()
+    expected_tree.update([(0, 0)])
+    assert fork.root == expected_tree.root
+    assert tree.root == root
+
+    other_fork = tree.fork()
+    other_fork.update([(5, 5)])
+    fork.commit()
+    assert tree.root == expected_tree.root
+    assert dict(tree.nodes) == expected_tree.nodes
+    assert len(fork.nodes.changes) == 0
+    # Committing a fork makes the other forks of the same tree stale, but not its own forks, as
+    # its content does not change.
+    with pytest.raises(AssertionError, match="modified after this fork was created"):
+        other_fork.update([(5, 6)])
+    # Reads of a stale fork would mix its changes with the new nodes of the tree.
+    with pytest.raises(AssertionError, match="modified after this fork was created"):
+        other_fork.get_leaf(1)
+    with pytest.raises(AssertionError, match="modified after this fork was created"):
+        other_fork.root
+    with pytest.raises(AssertionError, match="modified after this fork was created"):
+        list(other_fork.get_multi_proof([5]))
+    assert nested_fork.root == fork.root
+    nested_fork.update([(5, 6)])
+    with pytest.raises(AssertionError, match="modified after this fork was created"):
+        other_fork.commit()
+    with pytest.raises(AssertionError, match="Only a fork can be committed"):
+        tree.commit()
+
+
+def merkle_multi_update_model(
+    height: int, prev_root: int, new_root: int, update_tree, preimage: dict, used_preimage: set
+):
+    """
+    Follows the hints and checks of merkle_multi_update, where the leaves of update_tree (see
+    build_update_tree) are pairs of the previous and new values of the leaves. As in
+    merkle_multi_update_inner, the preimages of both the previous and the new value of every
+    internal node on the update paths are read.
+    """
+    if height == 0:
+        assert update_tree == (prev_root, new_root)
+        return
+    left_child, right_child, case = decode_node(update_tree)
+    used_preimage.update({prev_root, new_root})
+    prev_left, prev_right = preimage[prev_root]
+    new_left, new_right = preimage[new_root]
+    assert hash_func(prev_left, prev_right) == prev_root
+    assert hash_func(new_left, new_right) == new_root
+    if case == "right":
+        assert prev_left == new_left
+    else:
+        merkle_multi_update_model(
+            height - 1, prev_left, new_left, left_child, preimage, used_preimage
+        )
+    if case == "left":
+        assert prev_right == new_right
+    else:
+        merkle_multi_update_model(
+            height - 1, prev_right, new_right, right_child, preimage, used_preimage
+        )
+
+
+@parametrize_random_object()
+def test_update_preimage(random_object: random.Random):
+    preimage: dict = {}
+    used_preimage: set = set()
+    # A positions tree and an orders tree, sharing a preimage.
+    for height in [10, 6]:
+        tree = SparseMerkleTree(height=height, hash_func=hash_func)
+        tree.update(
+            (random_object.randrange(2**height), random_object.getrandbits(8)) for _ in range(20)
+        )
+        modifications = [
+            (random_object.randrange(2**height), random_object.choice([0, 1, 2])) for _ in range(10)
+        ]
+        update_tree = build_update_tree(
+            height,
+            [(index, (tree.get_leaf(index), new_value)) for index, new_value in modifications],
+        )
+        prev_root = tree.root
+        new_root = tree.update(modifications, preimage=preimage)
+        merkle_multi_update_model(height, prev_root, new_root, update_tree, preimage, used_preimage)
+
+    assert set(preimage) == used_preimage
+    assert get_merkle_facts({1: (2, 3)}) == {"1": [2, 3]}
@@ -1,5 +1,7 @@
 import asyncio
 import bisect
+import collections
+import concurrent.futures
 import contextlib
 import itertools
 import logging
@@ -19,6 +21,7 @@ from typing import (
     Awaitable,
     Callable,
     Coroutine,
+    Deque,
     Dict,
     Generic,
     Iterable,
@@ -482,6 +485,48 @@ def iter_blockify(data: Iterable[T], chunk_size: int) -> Iterable[List[T]]:
         yield chunk
 
 
+def _map_chunk(func: Callable[[T], V], chunk: List[T]) -> List[V]:
+    return [func(element) for element in chunk]
+
+
+def imap_in_chunks(
+    func: Callable[[T], V],
+    data: Iterable[T],
+    chunk_size: int,
+    executor: Optional[concurrent.futures.Executor] = None,
+    max_pending_chunks: Optional[int] = None,
+) -> Iterator[V]:
+    """
+    Applies func to every element of data and yields the results in the order of data.
+    data is consumed lazily, in chunks of chunk_size; each chunk is mapped by a single executor
+    task, and at most max_pending_chunks chunks are in flight at any time, so memory usage does not
+    depend on the length of data. While the executor maps the pending chunks, the caller keeps
+    reading the next chunks and consuming the results of the completed ones.
+    If executor is None, the chunks are mapped in the calling thread.
+    Note that when using a ProcessPoolExecutor, func must be picklable.
+    """
+    if executor is None:
+        for chunk in iter_blockify(data=data, chunk_size=chunk_size):
+            yield from _map_chunk(func=func, chunk=chunk)
+        return
+
+    max_pending_chunks = 16 if max_pending_chunks is None else max_pending_chunks
+    assert (
+        max_pending_chunks > 0
+    ), f"max_pending_chunks must be positive. Got: {max_pending_chunks}."
+    pending: Deque[concurrent.futures.Future] = collections.deque()
+    try:
+        for chunk in iter_blockify(data=data, chunk_size=chunk_size):
+            if len(pending) == max_pending_chunks:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(_map_chunk, func, chunk))
+        while len(pending) > 0:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
 async def gather_in_chunks(
     awaitables: Iterable[Awaitable[T]], chunk_size: Optional[int] = None
 ) -> List[T]:
@@ -1,4 +1,5 @@
 import asyncio
+import concurrent.futures
 import dataclasses
 import functools
 import random
@@ -18,6 +19,7 @@ from starkware.python.utils import (
     composite,
     execute_coroutine_threadsafe,
     gather_in_chunks,
+    imap_in_chunks,
     indent,
     is_in_sorted_sequence,
     iter_blockify,
@@ -113,6 +115,51 @@ def test_blockify_iterable():
     ]
 
 
+def _square(x: int) -> int:
+    return x * x
+
+
+@pytest.mark.parametrize("use_executor", [False, True])
+def test_imap_in_chunks(use_executor: bool):
+    data_length = 23
+    get_data_generator = lambda: (i for i in range(data_length))
+    expected = [i * i for i in range(data_length)]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        for chunk_size in (1, 4, data_length, data_length + 1):
+            result = imap_in_chunks(
+                func=_square,
+                data=get_data_generator(),
+                chunk_size=chunk_size,
+                executor=executor if use_executor else None,
+                max_pending_chunks=2,
+            )
+            assert list(result) == expected
+
+    # Edge cases.
+    assert list(imap_in_chunks(func=_square, data=[], chunk_size=2)) == []
+    with pytest.raises(expected_exception=AssertionError, match="chunk_size"):
+        list(imap_in_chunks(func=_square, data=get_data_generator(), chunk_size=0))
+
+
+def test_imap_in_chunks_is_lazy():
+    consumed = []
+
+    def gen_data():
+        for i in count():
+            consumed.append(i)
+            yield i
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        result = imap_in_chunks(
+            func=_square, data=gen_data(), chunk_size=3, executor=executor, max_pending_chunks=2
+        )
+        assert [next(result) for _ in range(4)] == [0, 1, 4, 9]
+        # At most max_pending_chunks chunks beyond the current one are read from the input.
+        assert len(consumed) <= 3 * 4
+        result.close()
+
+
 @pytest.mark.asyncio
 async def test_gather_in_chunks():
     async def foo(i: int):